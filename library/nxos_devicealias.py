@@ -16,6 +16,8 @@ version_added: 2.9
 short_description: Configuration of device alias.
 description:
     - Configuration of device alias for Cisco MDS NXOS.
+    - A warning is returned for each device-alias removed or renamed that zones still have as a member, the zones of
+      all the vsans are then read in one more batch.
 author:
     - Suhas Bharadwaj (@srbharadwaj) (subharad@cisco.com)
 options:
@@ -65,8 +67,153 @@ options:
                 required:
                     True
                 type: str
-
-
+    da_file:
+        description:
+            - File of device-aliases to be added or removed, in place of da for large imports, on the controller
+              for network_cli/httpapi connections.
+            - The file is read one line at a time, once to validate every line before the switch is read and once to
+              diff the entries against the device-alias database, which is then always fetched whole. Only the count
+              of the entries already in the state of the file is returned in the messages.
+        type: dict
+        suboptions:
+            path:
+                description:
+                    - Path of the file
+                required: True
+                type: path
+            format:
+                description:
+                    - C(csv) starts with a header line naming the name, pwwn and optional remove columns, e.g.
+                      'name,pwwn,remove' followed by 'host1_hba0,21:00:00:24:ff:11:22:33,false'.
+                    - C(jsonl) has one {"name", "pwwn", "remove"} object per line.
+                choices: ['csv', 'jsonl']
+                type: str
+                default: csv
+    da_fetch_threshold:
+        description:
+            - Maximum number of device-alias names and pwwns referenced by the playbook for which only those entries
+              are fetched from the switch, in one batch of 'show device-alias name <name>' and
+              'show device-alias pwwn <pwwn>' commands.
+            - The whole device-alias database is fetched if more of them are referenced, or if the database
+              does not hold more entries than referenced.
+        type: int
+        default: 20
+    verify:
+        description:
+            - After the commands are pushed, read back only the device-alias entries, distribution and mode
+              changed by the module, in one batch, and report any difference from the intended state in C(drift)
+              and in the warnings.
+            - The whole device-alias database is read back if more than da_fetch_threshold entries changed.
+        type: bool
+        default: False
+    lock_wait:
+        description:
+            - How long to wait for a device-alias lock held by another session before failing.
+            - The lock is re-probed with 'show device-alias status' only, with exponential backoff.
+            - The time spent waiting is returned in C(lock_wait).
+        type: dict
+        suboptions:
+            timeout:
+                description:
+                    - Maximum number of seconds to wait for the lock, 0 fails at once
+                type: int
+                default: 0
+            delay:
+                description:
+                    - Number of seconds to wait before the first re-probe, doubled after every re-probe
+                type: float
+                default: 1.0
+            max_delay:
+                description:
+                    - Maximum number of seconds between two re-probes
+                type: float
+                default: 16.0
+    fabric_coordination:
+        description:
+            - Coordinate the hosts of a fabric that run this task in parallel, so that only one seed switch
+              applies the changes to the CFS distributed device-alias database and the other switches only verify.
+            - The seed is elected through a claim file in a local lock directory, on the controller for
+              network_cli/httpapi connections. The other hosts wait for the seed to be done, then compute the
+              commands against their own switch and report them in C(drift) instead of pushing them.
+        type: dict
+        suboptions:
+            key:
+                description:
+                    - Name of the fabric, hosts with the same key coordinate with each other.
+                    - Use a key that is unique per playbook run, e.g. built from a run_once fact.
+                required: True
+                type: str
+            lock_dir:
+                description:
+                    - Directory in which the claim and done files are created
+                type: path
+                default: /tmp/mds_fabric_coordination
+            timeout:
+                description:
+                    - Number of seconds to wait for the seed switch, claim files older than that are stale
+                type: int
+                default: 600
+    interaction_budget:
+        description:
+            - Maximum number of device interactions allowed for the module run, the module fails if any of them is exceeded.
+            - The actual counts are always returned in C(interactions).
+        type: dict
+        suboptions:
+            round_trips:
+                description:
+                    - Maximum number of show command batches and config pushes sent to the switch
+                type: int
+            config_pushes:
+                description:
+                    - Maximum number of config pushes sent to the switch
+                type: int
+            cli_lines:
+                description:
+                    - Maximum number of CLI lines sent to the switch
+                type: int
+            bytes:
+                description:
+                    - Maximum number of bytes sent to and received from the switch
+                type: int
+    plan:
+        description:
+            - Split the run into a plan and an apply step, e.g. to compute the changes ahead of a change window.
+            - With mode C(plan) the commands are computed as in a normal run but not pushed. They are written to a
+              plan file together with the messages and a digest of the output of 'show device-alias status' and
+              'show device-alias database', taken before the switch is read. The whole database is read for the digest,
+              so that a plan is also invalidated by a rename or a pwwn change that keeps the number of entries.
+            - With mode C(apply) the plan file is loaded and the planned commands are pushed if the digest of
+              that output still matches, else the module fails. The switch databases are not read again.
+        type: dict
+        suboptions:
+            mode:
+                description:
+                    - Whether to write the plan file or to apply it
+                required: True
+                choices: ['plan', 'apply']
+                type: str
+            path:
+                description:
+                    - Path of the plan file, on the controller for network_cli/httpapi connections.
+                      Use one file per switch, e.g. named after the inventory_hostname.
+                required: True
+                type: path
+    state_from_files:
+        description:
+            - Directory of captured show command outputs from which the state of the switch is read instead of the switch,
+              to plan the changes offline. Each file holds the text output of one command and is named after it, with
+              spaces and other special characters replaced by '_', e.g. show_device-alias_status.txt and show_device-alias_database.txt.
+            - Nothing is pushed, the commands that would be sent are returned in C(commands). The whole databases are read
+              from the files, so the fetch thresholds do not apply.
+            - With plan mode C(plan) the plan file is written from the captured outputs, including the probed status.
+            - Use connection local and transport nxapi in the provider so that no connection to the switch is opened.
+        type: path
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - The files are named after the host, module name and timestamp of the run.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
 '''
 
 EXAMPLES = '''
@@ -97,6 +244,13 @@ EXAMPLES = '''
       -
         new_name: bcd1
         old_name: abc1
+-
+  name: "Import the device-aliases of a CSV file"
+  nxos_devicealias:
+    da_file:
+      path: "aliases/fabric-a.csv"
+    distribute: true
+    provider: "{{ creds }}"
 
 '''
 
@@ -112,401 +266,143 @@ commands:
     - device-alias name somename1 pwwn 10:00:00:00:89:a1:02:03
     - device-alias commit
     - no terminal dont-ask
+da_fetch_strategy:
+  description: whether the device-alias entries were fetched individually (targeted), with the whole database (full) or not at all (none)
+  returned: always
+  type: str
+  sample: targeted
+drift:
+  description: differences between the intended and the read back state, when verify is set
+  returned: when verify is set and commands were pushed
+  type: list
+  sample: ["device-alias test1_add is None, expected 56:02:22:11:22:88:11:67"]
+lock_wait:
+  description: number of seconds spent waiting for the device-alias lock, if it was locked
+  returned: always
+  type: dict
+  sample: {"device-alias": 3.01}
+fabric_role:
+  description: whether this switch applied the changes (seed) or only verified them (follower), when fabric_coordination is set
+  returned: when fabric_coordination is set
+  type: str
+  sample: seed
+interactions:
+  description: number of round-trips, config pushes, CLI lines and bytes exchanged with the switch
+  returned: always
+  type: dict
+  sample: {"round_trips": 4, "config_pushes": 1, "cli_lines": 12, "bytes": 2648}
+plan:
+  description: path of the plan file, digest of the probed status and number of config pushes of the plan
+  returned: when plan is set
+  type: dict
+  sample: {"path": "/tmp/plans/sw1-da.json", "digest": "8d1f0c6e2b7a3f9d41e5c0a7b6e2d9f3a1c4b5e6", "pushes": 1}
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.network.nxos.nxos import load_config, nxos_argument_spec, run_commands
-import string
+from ansible.module_utils.network.nxos.nxos import nxos_argument_spec
+from ansible.module_utils.mds import exit_json, load_config
+from ansible.module_utils.mds import get_fetch_threshold, is_planning, mds_plan_spec, start_plan
+from ansible.module_utils.mds import mds_interaction_spec, mds_lock_wait_spec, mds_profile_spec, run_profiled
+from ansible.module_utils.mds import coordinate_fabric, mds_fabric_coordination_spec, wait_for_lock
+from ansible.module_utils.mds import input_file_spec
+from ansible.module_utils.mds_devicealias import devicealias_spec, getDeviceAliasCommands, showDeviceAliasStatus
+from ansible.module_utils.mds_devicealias import getDeviceAliasProbeCmds, validateDeviceAliasParams, verifyDeviceAliasChanges
+from ansible.module_utils.mds_index import getAliasReferenceWarnings
 
 __metaclass__ = type
 
 
-class showDeviceAliasStatus(object):
-    """docstring for showDeviceAliasStatus"""
-
-    def __init__(self, module):
-        self.module = module
-        self.distribute = ""
-        self.mode = ""
-        self.locked = False
-        self.update()
-
-    def execute_show_cmd(self, cmd):
-        output = execute_show_command(cmd, self.module)[0]
-        return output
-
-    def update(self):
-        command = 'show device-alias status'
-        output = self.execute_show_cmd(command).split("\n")
-        for o in output:
-            if "Fabric Distribution" in o:
-                self.distribute = o.split(":")[1].strip().lower()
-            if "Mode" in o:
-                self.mode = o.split("Mode:")[1].strip().lower()
-            if "Locked" in o:
-                self.locked = True
-
-    def isLocked(self):
-        return self.locked
-
-    def getDistribute(self):
-        return self.distribute.lower()
-
-    def getMode(self):
-        return self.mode.lower()
-
-
-class showDeviceAliasDatabase(object):
-    """docstring for showDeviceAliasDatabase"""
-
-    def __init__(self, module):
-        self.module = module
-        self.da_dict = {}
-        self.update()
-
-    def execute_show_cmd(self, cmd):
-        output = execute_show_command(cmd, self.module)[0]
-        return output
-
-    def update(self):
-        command = 'show device-alias database'
-        # output = execute_show_command(command, self.module)[0].split("\n")
-        output = self.execute_show_cmd(command)
-        self.da_list = output.split("\n")
-        for eachline in self.da_list:
-            if 'device-alias' in eachline:
-                sv = eachline.strip().split()
-                self.da_dict[sv[2]] = sv[4]
-
-    def isNameInDaDatabase(self, name):
-        return name in self.da_dict.keys()
-
-    def isPwwnInDaDatabase(self, pwwn):
-        newpwwn = ':'.join(["0" + str(ep) if len(ep) == 1 else ep for ep in pwwn.split(":")])
-        return newpwwn in self.da_dict.values()
-
-    def isNamePwwnPresentInDatabase(self, name, pwwn):
-        newpwwn = ':'.join(["0" + str(ep) if len(ep) == 1 else ep for ep in pwwn.split(":")])
-        if name in self.da_dict.keys():
-            if newpwwn == self.da_dict[name]:
-                return True
-        return False
-
-    def getPwwnByName(self, name):
-        if name in self.da_dict.keys():
-            return self.da_dict[name]
-        else:
-            return None
-
-    def getNameByPwwn(self, pwwn):
-        newpwwn = ':'.join(["0" + str(ep) if len(ep) == 1 else ep for ep in pwwn.split(":")])
-        for n, p in self.da_dict.items():
-            if p == newpwwn:
-                return n
-        return None
-
-
-def isPwwnValid(pwwn):
-    pwwnsplit = pwwn.split(":")
-    if len(pwwnsplit) != 8:
-        return False
-    for eachpwwnsplit in pwwnsplit:
-        if len(eachpwwnsplit) > 2 or len(eachpwwnsplit) < 1:
-            return False
-        if not all(c in string.hexdigits for c in eachpwwnsplit):
-            return False
-    return True
-
-
-def isNameValid(name):
-    validdacharacters = '-','_','$','^'
-    if not name[0].isalpha():
-        # Illegal first character. Name must start with a letter
-        return False
-    if len(name) > 64:
-        return False
-    for character in name:
-        if not character.isalnum() and character not in validdacharacters:
-            return False
-    return True
-
-
-def execute_show_command(command, module, command_type='cli_show'):
-    output = 'text'
-    commands = [{
-        'command': command,
-        'output': output,
-    }]
-    out = run_commands(module, commands)
-    return out
-
-
-def flatten_list(command_lists):
-    flat_command_list = []
-    for command in command_lists:
-        if isinstance(command, list):
-            flat_command_list.extend(command)
-        else:
-            flat_command_list.append(command)
-    return flat_command_list
-
-
 def main():
-    element_spec = dict(
-        name=dict(required=True, type='str'),
-        pwwn=dict(type='str'),
-        remove=dict(type='bool', default=False)
-    )
-
-    element_spec_rename = dict(
-        old_name=dict(required=True, type='str'),
-        new_name=dict(required=True, type='str'),
-    )
-
     argument_spec = dict(
-        distribute=dict(type='bool'),
-        mode=dict(type='str', choices=['enhanced', 'basic']),
-        da=dict(type='list', elements='dict', options=element_spec),
-        rename=dict(type='list', elements='dict', options=element_spec_rename)
+        da_file=dict(type='dict', options=input_file_spec),
+        da_fetch_threshold=dict(type='int', default=20),
+        verify=dict(type='bool', default=False)
     )
 
+    argument_spec.update(devicealias_spec)
     argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_fabric_coordination_spec)
+    argument_spec.update(mds_interaction_spec)
+    argument_spec.update(mds_lock_wait_spec)
+    argument_spec.update(mds_plan_spec)
+    argument_spec.update(mds_profile_spec)
 
     module = AnsibleModule(argument_spec=argument_spec,
+                           mutually_exclusive=[('plan', 'fabric_coordination'), ('da', 'da_file')],
                            supports_check_mode=True)
 
     warnings = list()
-    messages = list()
     commands_to_execute = list()
     result = {'changed': False}
 
-    distribute = module.params['distribute']
-    mode = module.params['mode']
     da = module.params['da']
     rename = module.params['rename']
 
     # Step 0.0: Validate syntax of name and pwwn
     #       Also validate syntax of rename arguments
-    if da is not None:
-        for eachdict in da:
-            name = eachdict['name']
-            pwwn = eachdict['pwwn']
-            remove = eachdict['remove']
-            if pwwn is not None:
-                pwwn = pwwn.lower()
-            if not remove:
-                if pwwn is None:
-                    module.fail_json(
-                        msg='This device alias name ' +
-                        str(name) +
-                        ' which needs to be added, does not have pwwn specified . Please specify a valid pwwn')
-                if not isNameValid(name):
-                    module.fail_json(msg='This pwwn name is invalid : ' + str(name) +
-                                     '. Note that name cannot be more than 64 alphanumeric chars, it must start with a letter, and can only contain "-", "_", "$", or "^" characters')
-                if not isPwwnValid(pwwn):
-                    module.fail_json(msg='This pwwn is invalid : ' + str(pwwn) + '. Please check that its a valid pwwn')
-    if rename is not None:
-        for eachdict in rename:
-            oldname = eachdict['old_name']
-            newname = eachdict['new_name']
-            if not isNameValid(oldname):
-                module.fail_json(msg='This pwwn name is invalid : ' + str(oldname) +
-                                 '. Note that name cannot be more than 64 alphanumeric chars, it must start with a letter, and can only contain "-", "_", "$", or "^" characters')
-            if not isNameValid(newname):
-                module.fail_json(msg='This pwwn name is invalid : ' + str(newname) +
-                                 '. Note that name cannot be more than 64 alphanumeric chars, it must start with a letter, and can only contain "-", "_", "$", or "^" characters')
+    validateDeviceAliasParams(module, da, rename, module.params['da_file'])
 
-    # Step 0.1: Check DA status
-    shDAStausObj = showDeviceAliasStatus(module)
-    d = shDAStausObj.getDistribute()
-    m = shDAStausObj.getMode()
-    if shDAStausObj.isLocked():
-        module.fail_json(msg='device-alias has acquired lock on the switch. Hence cannot procced.')
-
-    # Step 1: Process distribute
-    commands = []
-    if distribute is not None:
-        if distribute:
-            # playbook has distribute as True(enabled)
-            if d == "disabled":
-                # but switch distribute is disabled(false), so set it to true(enabled)
-                commands.append("device-alias distribute")
-                messages.append('device-alias distribute changed from disabled to enabled')
-            else:
-                messages.append('device-alias distribute remains unchanged. current distribution mode is enabled')
-        else:
-            # playbook has distribute as False(disabled)
-            if d == "enabled":
-                # but switch distribute is enabled(true), so set it to false(disabled)
-                commands.append("no device-alias distribute")
-                messages.append('device-alias distribute changed from enabled to disabled')
-            else:
-                messages.append('device-alias distribute remains unchanged. current distribution mode is disabled')
-
-    cmds = flatten_list(commands)
-    if cmds:
-        commands_to_execute = commands_to_execute + cmds
-        if module.check_mode:
-            # Check mode implemented at the da_add/da_remove stage
-            pass
-        else:
-            result['changed'] = True
-            load_config(module, cmds)
+    start_plan(module, 'nxos_devicealias', getDeviceAliasProbeCmds())
 
-    # Step 2: Process mode
-    commands = []
-    if mode is not None:
-        if mode == 'basic':
-            # playbook has mode as basic
-            if m == 'enhanced':
-                # but switch mode is enhanced, so set it to basic
-                commands.append("no device-alias mode enhanced")
-                messages.append('device-alias mode changed from enhanced to basic')
-            else:
-                messages.append('device-alias mode remains unchanged. current mode is basic')
+    da_fetch_threshold = get_fetch_threshold(module, 'da_fetch_threshold')
 
-        else:
-            # playbook has mode as enhanced
-            if m == 'basic':
-                # but switch mode is basic, so set it to enhanced
-                commands.append("device-alias mode enhanced")
-                messages.append('device-alias mode changed from basic to enhanced')
-            else:
-                messages.append('device-alias mode remains unchanged. current mode is enhanced')
-
-    if commands:
-        if distribute:
-            commands.append("device-alias commit")
-            commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
-        else:
-            if distribute is None and d == 'enabled':
-                commands.append("device-alias commit")
-                commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
+    # Followers of a coordinated fabric wait here for the seed switch to apply the changes
+    coordinator = coordinate_fabric(module, 'device-alias')
+    apply_config = coordinator is None or coordinator.isSeed()
+    not_applied = []
 
-    cmds = flatten_list(commands)
-
-    if cmds:
+    # Step 0.1: Check DA status
+    shDAStausObj = showDeviceAliasStatus(module)
+    lock_wait = {}
+    if shDAStausObj.isLocked():
+        waited, locked = wait_for_lock(module, shDAStausObj.isLocked, shDAStausObj.update)
+        lock_wait['device-alias'] = waited
+        if locked:
+            module.fail_json(msg='device-alias has acquired lock on the switch. Hence cannot procced.', lock_wait=lock_wait)
+
+    # Step 1-5: Process distribute, mode, da and rename
+    batches, messages, verify_checks, da_fetch_strategy, _ = getDeviceAliasCommands(module, module.params, shDAStausObj, da_fetch_threshold)
+
+    # Zones that use a device-alias by name lose that member when it is removed or renamed
+    if apply_config:
+        warnings = warnings + getAliasReferenceWarnings(module, verify_checks, rename)
+    for cmds, pushedmessages in batches:
         commands_to_execute = commands_to_execute + cmds
         if module.check_mode:
             # Check mode implemented at the end
             pass
+        elif not apply_config:
+            not_applied = not_applied + cmds
         else:
             result['changed'] = True
             load_config(module, cmds)
+            messages = messages + pushedmessages
 
-    # Step 3: Process da
-    commands = []
-    shDADatabaseObj = showDeviceAliasDatabase(module)
-    if da is not None:
-        da_remove_list = []
-        da_add_list = []
-        for eachdict in da:
-            name = eachdict['name']
-            pwwn = eachdict['pwwn']
-            remove = eachdict['remove']
-            if pwwn is not None:
-                pwwn = pwwn.lower()
-            if remove:
-                if shDADatabaseObj.isNameInDaDatabase(name):
-                    commands.append("no device-alias name " + name)
-                    da_remove_list.append(name)
-                else:
-                    messages.append(name + ' - This device alias name is not in switch device-alias database, hence cannot be removed.')
-            else:
-                if shDADatabaseObj.isNamePwwnPresentInDatabase(name, pwwn):
-                    messages.append(name + ' : ' + pwwn + ' - This device alias name,pwwn is already in switch device-alias database, \
-                        hence nothing to configure')
-                else:
-                    if shDADatabaseObj.isNameInDaDatabase(name):
-                        module.fail_json(
-                            msg=name +
-                            ' - This device alias name is already present in switch device-alias database but assigned to another pwwn (' +
-                            shDADatabaseObj.getPwwnByName(name) +
-                            ') hence cannot be added')
-
-                    elif shDADatabaseObj.isPwwnInDaDatabase(pwwn):
-                        module.fail_json(
-                            msg=pwwn +
-                            ' - This device alias pwwn is already present in switch device-alias database but assigned to another name (' +
-                            shDADatabaseObj.getNameByPwwn(pwwn) +
-                            ') hence cannot be added')
-
-                    else:
-                        commands.append("device-alias name " + name + " pwwn " + pwwn)
-                        da_add_list.append(name)
-
-        if len(da_add_list) != 0 or len(da_remove_list) != 0:
-            commands = ["device-alias database"] + commands
-            if distribute:
-                commands.append("device-alias commit")
-                commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
-            else:
-                if distribute is None and d == 'enabled':
-                    commands.append("device-alias commit")
-                    commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
-
-        cmds = flatten_list(commands)
-        if cmds:
-            commands_to_execute = commands_to_execute + cmds
-            if module.check_mode:
-                # Check mode implemented at the end
-                pass
-            else:
-                result['changed'] = True
-                load_config(module, cmds)
-                if len(da_remove_list) != 0:
-                    messages.append('the required device-alias were removed. ' + ','.join(da_remove_list))
-                if len(da_add_list) != 0:
-                    messages.append('the required device-alias were added. ' + ','.join(da_add_list))
-
-    # Step 5: Process rename
-    commands = []
-    if rename is not None:
-        for eachdict in rename:
-            oldname = eachdict['old_name']
-            newname = eachdict['new_name']
-            if shDADatabaseObj.isNameInDaDatabase(newname):
-                module.fail_json(
-                    changed=False,
-                    commands=cmds,
-                    msg=newname +
-                    " - this name is already present in the device-alias database, hence we cannot rename " +
-                    oldname +
-                    " with this one")
-            if shDADatabaseObj.isNameInDaDatabase(oldname):
-                commands.append('device-alias rename ' + oldname + ' ' + newname)
-            else:
-                module.fail_json(changed=False, commands=cmds, msg=oldname +
-                                 " - this name is not present in the device-alias database, hence we cannot rename.")
+    if coordinator is not None:
+        result['fabric_role'] = 'seed' if coordinator.isSeed() else 'follower'
+        coordinator.markDone()
+    if not_applied:
+        result['drift'] = ["still needed after the fabric seed switch applied its changes: " + cmd
+                           for cmd in not_applied if 'terminal dont-ask' not in cmd]
+        warnings = warnings + result['drift']
 
-        if len(commands) != 0:
-            commands = ["device-alias database"] + commands
-            if distribute:
-                commands.append("device-alias commit")
-                commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
-            else:
-                if distribute is None and d == 'enabled':
-                    commands.append("device-alias commit")
-                    commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
-        cmds = flatten_list(commands)
-        if cmds:
-            commands_to_execute = commands_to_execute + cmds
-            if module.check_mode:
-                # Check mode implemented at the end
-                pass
-            else:
-                result['changed'] = True
-                load_config(module, cmds)
+    if module.params['verify'] and verify_checks and apply_config and not module.check_mode and not is_planning():
+        result['drift'] = verifyDeviceAliasChanges(module, verify_checks, da_fetch_threshold)
+        for eachdrift in result['drift']:
+            warnings.append("verify: " + eachdrift)
 
     # Step END: check for 'check' mode
     if module.check_mode:
-        module.exit_json(changed=False, commands=commands_to_execute, msg="Check Mode: No cmds issued to the hosts")
+        exit_json(module, changed=False, commands=commands_to_execute, da_fetch_strategy=da_fetch_strategy,
+                  lock_wait=lock_wait, warnings=warnings, msg="Check Mode: No cmds issued to the hosts")
 
     result['messages'] = messages
     result['commands'] = commands_to_execute
+    result['da_fetch_strategy'] = da_fetch_strategy
+    result['lock_wait'] = lock_wait
     result['warnings'] = warnings
-    module.exit_json(**result)
+    exit_json(module, **result)
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main, 'nxos_devicealias')
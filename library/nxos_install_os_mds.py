@@ -72,6 +72,12 @@ options:
             - Selecting 'no' means do not use ISSU. Forced disruptive.
         choices: ['required','desired', 'yes', 'no']
         default: 'no'
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - The files are named after the host, module name and timestamp of the run.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
 '''
 
 EXAMPLES = '''
@@ -124,6 +130,7 @@ import re
 from time import sleep
 from ansible.module_utils.network.nxos.nxos import load_config, run_commands
 from ansible.module_utils.network.nxos.nxos import nxos_argument_spec, check_args
+from ansible.module_utils.mds import mds_profile_spec, run_profiled
 from ansible.module_utils.basic import AnsibleModule
 
 
@@ -566,6 +573,7 @@ def main():
     )
 
     argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_profile_spec)
 
     module = AnsibleModule(argument_spec=argument_spec,
                            supports_check_mode=True)
@@ -597,4 +605,4 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main, 'nxos_install_os_mds')
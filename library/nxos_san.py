@@ -0,0 +1,401 @@
+#!/usr/bin/python
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'network'}
+
+
+DOCUMENTATION = '''
+---
+module: nxos_san
+extends_documentation_fragment: nxos
+version_added: 2.9
+short_description: Configuration of vsan, device-alias and zone/zoneset in one pass.
+description:
+    - Configuration of vsan, device-alias and zone/zoneset for Cisco MDS NXOS, with the options of the
+      nxos_vsan, nxos_devicealias and nxos_zone_zoneset modules in one task.
+    - The state of the switch is read in two batches of show commands and the changes are pushed with a single
+      config push, ordered as vsans, device-aliases, zones and zoneset activations.
+    - If zones are configured in a vsan that the same task creates, the vsans are pushed first so that the zone
+      status of the new vsans can be read.
+author:
+    - Suhas Bharadwaj (@srbharadwaj) (subharad@cisco.com)
+options:
+    vsan:
+        description:
+            - List of vsan details to be added or removed, see the vsan option of nxos_vsan
+        type: list
+    device_alias:
+        description:
+            - Device-alias configuration, see the options of nxos_devicealias
+        type: dict
+        suboptions:
+            distribute:
+                description:
+                    - Enable/Disable device-alias distribution
+                type: bool
+            mode:
+                description:
+                    - Mode of devices-alias, basic or enhanced
+                choices: ['basic', 'enhanced']
+                type: str
+            da:
+                description:
+                    - List of device-alias to be added or removed
+                type: list
+            rename:
+                description:
+                    - List of device-alias to be renamed
+                type: list
+    zone_zoneset_details:
+        description:
+            - List of zone/zoneset details to be added or removed, see the zone_zoneset_details option of nxos_zone_zoneset
+        type: list
+    zone_fetch_threshold:
+        description:
+            - Maximum number of zones (or zonesets) referenced in a vsan for which only those are fetched from the switch
+        type: int
+        default: 20
+    da_fetch_threshold:
+        description:
+            - Maximum number of device-alias names and pwwns referenced for which only those entries are fetched from the switch
+        type: int
+        default: 20
+    zone_capacity:
+        description:
+            - Fail before anything is pushed if the zone changes would exceed a limit of the switch,
+              see the zone_capacity option of nxos_zone_zoneset.
+        type: dict
+    verify:
+        description:
+            - After the commands are pushed, read back the vsans, device-aliases and zone objects changed by the module
+              and report any difference from the intended state in C(drift) and in the warnings.
+        type: bool
+        default: False
+    lock_wait:
+        description:
+            - How long to wait for a device-alias or zone lock held by another session before failing,
+              see the lock_wait option of nxos_zone_zoneset.
+        type: dict
+    interaction_budget:
+        description:
+            - Maximum number of device interactions allowed for the module run, see the interaction_budget option of nxos_vsan.
+        type: dict
+    plan:
+        description:
+            - Split the run into a plan and an apply step, see the plan option of nxos_vsan.
+            - The digest covers 'show vsan', 'show vsan membership', 'show device-alias status',
+              'show device-alias database' and 'show zone status vsan <vsan>' of the zoned vsans, as far as the task configures them.
+        type: dict
+    state_from_files:
+        description:
+            - Directory of captured show command outputs from which the state of the switch is read instead of the switch,
+              see the state_from_files option of nxos_vsan.
+        type: path
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
+'''
+
+EXAMPLES = '''
+---
+-
+  name: "Build a fabric in one task"
+  nxos_san:
+    vsan:
+      -
+        id: 922
+        name: vsan-SAN-A
+        interface:
+          - fc1/1
+    device_alias:
+      distribute: true
+      da:
+        -
+          name: host1_hba0
+          pwwn: "21:00:00:24:ff:11:22:33"
+    zone_zoneset_details:
+      -
+        vsan: 922
+        zone:
+          -
+            name: zoneA
+            members:
+              -
+                device-alias: host1_hba0
+        zoneset:
+          -
+            name: zsetname1
+            members:
+              -
+                name: zoneA
+            action: activate
+    provider: "{{ creds }}"
+'''
+
+RETURN = '''
+commands:
+  description: commands sent to the device
+  returned: always
+  type: list
+  sample:
+    - terminal dont-ask
+    - vsan database
+    - vsan 922 interface fc1/1
+    - device-alias database
+    - device-alias name host1_hba0 pwwn 21:00:00:24:ff:11:22:33
+    - device-alias commit
+    - zone name zoneA vsan 922
+    - member device-alias host1_hba0
+    - zoneset activate name zsetname1 vsan 922
+    - no terminal dont-ask
+da_fetch_strategy:
+  description: whether the device-alias entries were fetched individually (targeted), with the whole database (full) or not at all (none)
+  returned: always
+  type: str
+  sample: targeted
+zone_fetch_strategy:
+  description: per vsan, whether only the referenced zones were fetched (targeted) or the whole zone database of the vsan (full)
+  returned: always
+  type: dict
+  sample: {"922": "targeted"}
+drift:
+  description: differences between the intended and the read back state, when verify is set
+  returned: when verify is set and commands were pushed
+  type: list
+  sample: ["interface fc1/1 is not in vsan 922"]
+zone_capacity:
+  description: estimated number of zones and zonesets of the switch and zone database usage once the changes are committed
+  returned: when zone commands are planned and zone_capacity is enabled
+  type: dict
+  sample: {"zones": 1210, "zonesets": 2, "db_usage": 482210, "db_max": 4000000}
+lock_wait:
+  description: number of seconds spent waiting for the device-alias lock and the zone lock of each vsan, if they were locked
+  returned: always
+  type: dict
+  sample: {"device-alias": 3.01, "922": 1.0}
+interactions:
+  description: number of round-trips, config pushes, CLI lines and bytes exchanged with the switch
+  returned: always
+  type: dict
+  sample: {"round_trips": 3, "config_pushes": 1, "cli_lines": 18, "bytes": 4210}
+plan:
+  description: path of the plan file, digest of the probed status and number of config pushes of the plan
+  returned: when plan is set
+  type: dict
+  sample: {"path": "/tmp/plans/sw1-san.json", "digest": "8d1f0c6e2b7a3f9d41e5c0a7b6e2d9f3a1c4b5e6", "pushes": 1}
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.network.nxos.nxos import nxos_argument_spec
+from ansible.module_utils.mds import exit_json, load_config, prefetch_commands, wait_for_lock
+from ansible.module_utils.mds import get_fetch_threshold, is_planning, mds_plan_spec, start_plan
+from ansible.module_utils.mds import mds_interaction_spec, mds_lock_wait_spec, mds_profile_spec, run_profiled
+from ansible.module_utils.mds_vsan import GetVsanInfoFromSwitch, getVsanCommands, verifyVsanChanges, vsan_element_spec
+from ansible.module_utils.mds_devicealias import devicealias_spec, getDeviceAliasCommands, getDeviceAliasFetch, getPlannedDeviceAliases
+from ansible.module_utils.mds_devicealias import getDeviceAliasProbeCmds, getShowDeviceAliasCmds
+from ansible.module_utils.mds_devicealias import showDeviceAliasStatus, verifyDeviceAliasChanges
+from ansible.module_utils.mds_zone import ShowZoneStatus, checkZoneCapacity, getShowZoneStatusCmd, getVsanReadCmds, getZoneCommands
+from ansible.module_utils.mds_zone import checkZoneReferences, getAliasDatabase, getAliasReadCmds, getReferencedAliasNames
+from ansible.module_utils.mds_zone import mds_zone_capacity_spec, verifyZoneChanges, zonedetails_spec
+from ansible.module_utils.mds_validate import failOnInputErrors, getDeviceAliasErrors, getVsanErrors, getZoneErrors
+
+__metaclass__ = type
+
+
+def stripDontAsk(cmds):
+    # The sections are pushed together, with a single terminal dont-ask around them
+    return [cmd for cmd in cmds if cmd not in ("terminal dont-ask", "no terminal dont-ask")]
+
+
+def main():
+    argument_spec = dict(
+        vsan=dict(type='list', elements='dict', options=vsan_element_spec),
+        device_alias=dict(type='dict', options=devicealias_spec),
+        zone_zoneset_details=dict(type='list', elements='dict', options=zonedetails_spec),
+        zone_fetch_threshold=dict(type='int', default=20),
+        da_fetch_threshold=dict(type='int', default=20),
+        verify=dict(type='bool', default=False)
+    )
+
+    argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_interaction_spec)
+    argument_spec.update(mds_lock_wait_spec)
+    argument_spec.update(mds_plan_spec)
+    argument_spec.update(mds_profile_spec)
+    argument_spec.update(mds_zone_capacity_spec)
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    warnings = list()
+    messages = list()
+    result = {'changed': False}
+
+    vsan_list = module.params['vsan'] or []
+    da_params = module.params['device_alias']
+    listOfZoneDetails = module.params['zone_zoneset_details'] or []
+    zonevsans = sorted(set([z['vsan'] for z in listOfZoneDetails]))
+
+    # All the input errors are reported at once, before the switch is read
+    errors = getVsanErrors(vsan_list) + getZoneErrors(listOfZoneDetails)
+    if da_params is not None:
+        errors = errors + getDeviceAliasErrors(da_params['da'], da_params['rename'])
+    failOnInputErrors(module, errors)
+
+    probe = []
+    if vsan_list:
+        probe = probe + ['show vsan', 'show vsan membership']
+    if da_params is not None:
+        probe = probe + getDeviceAliasProbeCmds()
+    probe = probe + [getShowZoneStatusCmd(vsan) for vsan in zonevsans]
+    start_plan(module, 'nxos_san', probe, ignore=r'operational state|^(Current Total Zone DB Usage|SFC size):')
+    da_fetch_threshold = get_fetch_threshold(module, 'da_fetch_threshold')
+    zone_fetch_threshold = get_fetch_threshold(module, 'zone_fetch_threshold')
+
+    # Step0: read the vsans, device-alias status and zone status in one batch
+    statuscmds = []
+    if vsan_list:
+        statuscmds = statuscmds + ['show vsan', 'show vsan membership']
+    if da_params is not None:
+        statuscmds.append('show device-alias status')
+    # The zone status of the vsans probed for the plan is read from the probe outputs
+    statusvsans = zonevsans if module.params['plan'] else None
+    if listOfZoneDetails and statusvsans is None:
+        statuscmds.append(getShowZoneStatusCmd())
+    prefetch_commands(module, statuscmds, check_rc=True)
+
+    # Step1: vsans
+    vsan_commands = []
+    vsan_checks = []
+    if vsan_list:
+        dictSwVsanObjs = GetVsanInfoFromSwitch(module).getVsanInfoObjects()
+        vsan_commands, vsan_messages, vsan_checks = getVsanCommands(module, vsan_list, dictSwVsanObjs)
+        messages = messages + vsan_messages
+    if vsan_commands:
+        vsan_commands = ["vsan database"] + vsan_commands
+
+    shDAStausObj = None
+    if da_params is not None:
+        shDAStausObj = showDeviceAliasStatus(module)
+    shZoneStatusObj = None
+    if listOfZoneDetails:
+        shZoneStatusObj = ShowZoneStatus(module, statusvsans)
+
+    # Zones of a vsan created by this task can only be read once the vsan exists,
+    # push the vsans first in that case
+    commands = []
+    newvsans = [vsan for vsan in zonevsans if shZoneStatusObj.isVsanAbsent(vsan) and "vsan " + str(vsan) in vsan_commands]
+    if newvsans:
+        if module.check_mode or is_planning():
+            for vsan in newvsans:
+                warnings.append("zone changes of vsan " + str(vsan) + " cannot be computed before the vsan is created, run the task again once it exists")
+            listOfZoneDetails = [z for z in listOfZoneDetails if z['vsan'] not in newvsans]
+        else:
+            cmds = ["terminal dont-ask"] + vsan_commands + ["no terminal dont-ask"]
+            result['changed'] = True
+            load_config(module, cmds)
+            commands = commands + cmds
+            vsan_commands = []
+            shZoneStatusObj.update(newvsans)
+
+    lock_wait = {}
+    if shDAStausObj is not None and shDAStausObj.isLocked():
+        waited, locked = wait_for_lock(module, shDAStausObj.isLocked, shDAStausObj.update)
+        lock_wait['device-alias'] = waited
+        if locked:
+            module.fail_json(msg='device-alias has acquired lock on the switch. Hence cannot procced.', lock_wait=lock_wait)
+
+    # Step2: read the device-alias entries and the zones of all the vsans in one batch
+    readcmds = []
+    da_fetch_strategy = 'none'
+    plannedaliases = {}
+    if da_params is not None:
+        da_fetch_strategy, da_names, da_pwwns = getDeviceAliasFetch(da_params['da'], da_params['rename'],
+                                                                    shDAStausObj.getNumberOfEntries(),
+                                                                    da_fetch_threshold)
+        if da_fetch_strategy != 'none':
+            readcmds = readcmds + getShowDeviceAliasCmds(da_names, da_pwwns)
+        plannedaliases = getPlannedDeviceAliases(da_params['da'], da_params['rename'])
+    for eachZoneZonesetDetail in listOfZoneDetails:
+        vsan = eachZoneZonesetDetail['vsan']
+        if not shZoneStatusObj.isVsanAbsent(vsan) and not shZoneStatusObj.isLocked(vsan):
+            readcmds = readcmds + getVsanReadCmds(eachZoneZonesetDetail, shZoneStatusObj, zone_fetch_threshold)
+    # The device-aliases added to zones that the device_alias option does not set are read as well,
+    # unless the device-alias database is already dumped for the device_alias option
+    aliasnames = [name for name in getReferencedAliasNames(listOfZoneDetails) if name not in plannedaliases]
+    if da_fetch_strategy != 'full':
+        readcmds = readcmds + getAliasReadCmds(aliasnames, zone_fetch_threshold)
+    prefetch_commands(module, readcmds)
+
+    # Step3: device-aliases, before the zones that may use them
+    da_commands = []
+    da_checks = []
+    shDADatabaseObj = None
+    if da_params is not None:
+        batches, da_messages, da_checks, da_fetch_strategy, shDADatabaseObj = getDeviceAliasCommands(module, da_params, shDAStausObj,
+                                                                                                     da_fetch_threshold)
+        for cmds, pushedmessages in batches:
+            da_commands = da_commands + stripDontAsk(cmds)
+            da_messages = da_messages + pushedmessages
+        messages = messages + da_messages
+
+    # Step4: zones and zonesets, the activations come last in each vsan
+    zone_commands = []
+    zone_checks = []
+    fetch_strategy = {}
+    if listOfZoneDetails:
+        parsed = {}
+        zone_commands, zone_messages, zone_checks, fetch_strategy, zone_lock_wait = getZoneCommands(module, listOfZoneDetails, shZoneStatusObj,
+                                                                                                    zone_fetch_threshold, parsed)
+        messages = messages + zone_messages
+        lock_wait.update(zone_lock_wait)
+        if zone_commands:
+            if da_fetch_strategy != 'full':
+                shDADatabaseObj = getAliasDatabase(module, aliasnames, zone_fetch_threshold)
+            checkZoneReferences(module, parsed, zone_checks,
+                                lambda name: plannedaliases[name] if name in plannedaliases else shDADatabaseObj.isNameInDaDatabase(name))
+            zone_capacity = checkZoneCapacity(module, shZoneStatusObj, zone_checks, parsed)
+            if zone_capacity is not None:
+                result['zone_capacity'] = zone_capacity
+
+    cmds = vsan_commands + da_commands + zone_commands
+    if cmds:
+        cmds = ["terminal dont-ask"] + cmds + ["no terminal dont-ask"]
+        commands = commands + cmds
+        if module.check_mode:
+            result.update(changed=False, commands=commands, messages=messages, warnings=warnings,
+                          msg="Check Mode: No cmds issued to the hosts")
+            exit_json(module, **result)
+        result['changed'] = True
+        load_config(module, cmds)
+
+    if module.params['verify'] and result['changed'] and not is_planning():
+        drift = []
+        if vsan_checks:
+            drift = drift + verifyVsanChanges(module, vsan_checks)
+        if da_checks:
+            drift = drift + verifyDeviceAliasChanges(module, da_checks, da_fetch_threshold)
+        if zone_checks:
+            drift = drift + verifyZoneChanges(module, zone_checks, zone_fetch_threshold)
+        result['drift'] = drift
+        for eachdrift in drift:
+            warnings.append("verify: " + eachdrift)
+
+    result['messages'] = messages
+    result['commands'] = commands
+    result['da_fetch_strategy'] = da_fetch_strategy
+    result['zone_fetch_strategy'] = fetch_strategy
+    result['lock_wait'] = lock_wait
+    result['warnings'] = warnings
+    exit_json(module, **result)
+
+
+if __name__ == '__main__':
+    run_profiled(main, 'nxos_san')
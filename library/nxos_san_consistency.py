@@ -0,0 +1,179 @@
+#!/usr/bin/python
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'network'}
+
+
+DOCUMENTATION = '''
+---
+module: nxos_san_consistency
+extends_documentation_fragment: nxos
+version_added: 2.9
+short_description: Checks that the device-alias and zone databases are the same on the switches of a fabric.
+description:
+    - Compares the device-aliases, zones, zonesets, active zonesets and zoning settings of the switches of a fabric,
+      e.g. when CFS distribution is disabled or the fabric is partitioned.
+    - Every host reads its switch in one batch of show commands, in parallel with the other hosts of the play, and
+      shares the hash of every object through an exchange directory. Once all the switches are read, the hashes are
+      compared and the members of only the objects whose hashes differ are compared, so the report is ready in the
+      time of the slowest switch.
+    - Each host returns the same report. Nothing is changed on the switches.
+author:
+    - Suhas Bharadwaj (@srbharadwaj) (subharad@cisco.com)
+options:
+    key:
+        description:
+            - Name of the check, hosts with the same key compare with each other.
+            - Use a key that is unique per playbook run, e.g. built from a run_once fact.
+        required: True
+        type: str
+    switch:
+        description:
+            - Name of this switch in the report, e.g. the inventory_hostname
+        required: True
+        type: str
+    switches:
+        description:
+            - Names of all the switches to compare, e.g. ansible_play_hosts
+        required: True
+        type: list
+    exchange_dir:
+        description:
+            - Directory in which the hashes and objects of the switches are exchanged, on the controller for
+              network_cli/httpapi connections
+        type: path
+        default: /tmp/mds_consistency
+    wait_timeout:
+        description:
+            - Number of seconds to wait for the other switches, the switches not done by then are returned in C(incomplete)
+            - Not named timeout, which is the connection timeout of the nxos provider arguments
+        type: int
+        default: 600
+    vsans:
+        description:
+            - List of vsans whose zones are compared, all the vsans of the switches if not set
+        type: list
+    state_from_files:
+        description:
+            - Directory of captured show command outputs from which the switch is read instead of the switch,
+              see the state_from_files option of nxos_vsan.
+        type: path
+    interaction_budget:
+        description:
+            - Maximum number of device interactions allowed for the module run, see the interaction_budget option of nxos_vsan.
+        type: dict
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
+'''
+
+EXAMPLES = '''
+---
+-
+  name: "Compare the databases of the switches of the play"
+  nxos_san_consistency:
+    key: "consistency-{{ run_id }}"
+    switch: "{{ inventory_hostname }}"
+    switches: "{{ ansible_play_hosts }}"
+    vsans:
+      - 922
+    provider: "{{ creds }}"
+'''
+
+RETURN = '''
+consistent:
+  description: whether all the compared switches have the same objects
+  returned: always
+  type: bool
+  sample: false
+compared:
+  description: number of distinct objects compared
+  returned: always
+  type: int
+  sample: 1250
+drift:
+  description:
+    - one entry per object that differs, with the switches holding its most common version (reference)
+    - per other switch, the members it lacks and the extra members it has, or absent if it does not have the object
+  returned: always
+  type: list
+  sample: [{"object": "zone zoneA vsan 922", "reference": ["sw1", "sw2"],
+            "differing": {"sw3": {"missing": ["pwwn 21:00:00:24:ff:11:22:33"], "extra": []}}},
+           {"object": "device-alias host9", "reference": ["sw1", "sw3"], "differing": {"sw2": {"absent": true}}}]
+incomplete:
+  description: switches that failed or were not read within wait_timeout, they are not compared
+  returned: always
+  type: list
+  sample: ["sw4"]
+interactions:
+  description: number of round-trips, config pushes, CLI lines and bytes exchanged with the switch
+  returned: always
+  type: dict
+  sample: {"round_trips": 1, "config_pushes": 0, "cli_lines": 5, "bytes": 48210}
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.network.nxos.nxos import nxos_argument_spec
+from ansible.module_utils.mds import exit_json, start_plan
+from ansible.module_utils.mds import mds_interaction_spec, mds_profile_spec, run_profiled
+from ansible.module_utils.mds_consistency import CONSISTENCY_SUBSETS, ConsistencyExchange, consistency_spec
+from ansible.module_utils.mds_consistency import getConsistencyObjects, getDriftReport, getObjectHashes
+from ansible.module_utils.mds_facts import FabricState
+from ansible.module_utils.mds_validate import failOnInputErrors, getVsanIdErrors
+
+__metaclass__ = type
+
+
+def main():
+    argument_spec = dict(
+        vsans=dict(type='list', elements='int'),
+        state_from_files=dict(type='path')
+    )
+
+    argument_spec.update(consistency_spec)
+    argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_interaction_spec)
+    argument_spec.update(mds_profile_spec)
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    if module.params['switch'] not in module.params['switches']:
+        module.fail_json(msg='switch ' + module.params['switch'] + ' is not one of the switches to compare')
+
+    # The other hosts wait for this one until it publishes its objects or exits
+    exchange = ConsistencyExchange(module)
+
+    failOnInputErrors(module, getVsanIdErrors(module.params['vsans']))
+
+    # Only handles state_from_files, this module has no plan option
+    start_plan(module, 'nxos_san_consistency', [])
+
+    state = FabricState(module, module.params['vsans'], CONSISTENCY_SUBSETS)
+    objects = getConsistencyObjects(state)
+    exchange.publish(objects, getObjectHashes(objects))
+
+    hashes, failed, pending = exchange.waitForSwitches()
+    compared, drift = getDriftReport(exchange, hashes)
+
+    warnings = list()
+    incomplete = failed + pending
+    if failed:
+        warnings.append("not compared, failed: " + ", ".join(failed))
+    if pending:
+        warnings.append("not compared, not done in time: " + ", ".join(pending))
+
+    msg = str(len(drift)) + " of the " + str(compared) + " objects differ between the switches"
+    exit_json(module, changed=False, consistent=not drift, compared=compared, drift=drift,
+              incomplete=incomplete, warnings=warnings, msg=msg)
+
+
+if __name__ == '__main__':
+    run_profiled(main, 'nxos_san_consistency')
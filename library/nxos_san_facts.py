@@ -0,0 +1,144 @@
+#!/usr/bin/python
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'network'}
+
+
+DOCUMENTATION = '''
+---
+module: nxos_san_facts
+extends_documentation_fragment: nxos
+version_added: 2.9
+short_description: Gets the vsan, device-alias and zone facts of a switch.
+description:
+    - Collects the vsans, device-aliases, zones, zonesets and active zonesets of a Cisco MDS NXOS switch as facts,
+      with the same parsers as the nxos_vsan, nxos_devicealias and nxos_zone_zoneset modules.
+    - Only the show commands of the requested subsets are run, all of them in a single batch, and only their
+      outputs are parsed. Nothing is changed on the switch.
+author:
+    - Suhas Bharadwaj (@srbharadwaj) (subharad@cisco.com)
+options:
+    gather_subset:
+        description:
+            - Subsets of facts to collect, among C(vsans), C(device_alias), C(zones), C(zonesets) and C(active_zonesets).
+            - C(all) collects every subset, a subset prefixed with C(!) is not collected, e.g. ['all', '!zonesets'].
+        type: list
+        default: ['all']
+    vsans:
+        description:
+            - List of vsans to return the vsan and zone facts of, all the vsans of the switch if not set
+        type: list
+    state_from_files:
+        description:
+            - Directory of captured show command outputs from which the facts are read instead of the switch,
+              see the state_from_files option of nxos_vsan.
+        type: path
+    interaction_budget:
+        description:
+            - Maximum number of device interactions allowed for the module run, see the interaction_budget option of nxos_vsan.
+        type: dict
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
+'''
+
+EXAMPLES = '''
+---
+-
+  name: "Zones of vsan 922 and device-aliases"
+  nxos_san_facts:
+    gather_subset:
+      - zones
+      - device_alias
+    vsans:
+      - 922
+    provider: "{{ creds }}"
+'''
+
+RETURN = '''
+ansible_net_gather_subset:
+  description: the subsets of facts collected
+  returned: always
+  type: list
+  sample: ["device_alias", "zones"]
+ansible_net_vsans:
+  description: name, state, operational state and interfaces of each vsan
+  returned: when vsans is collected
+  type: dict
+  sample: {"922": {"name": "vsan-SAN-A", "state": "active", "oper_state": "up", "interfaces": ["fc1/1", "port-channel1"]}}
+ansible_net_device_alias:
+  description: distribution, mode, lock state and pwwn of each device-alias
+  returned: when device_alias is collected
+  type: dict
+  sample: {"distribute": "enabled", "mode": "enhanced", "locked": false, "aliases": {"host1_hba0": "21:00:00:24:ff:11:22:33"}}
+ansible_net_zones:
+  description: zoning settings and members of each zone, per vsan
+  returned: when zones is collected
+  type: dict
+  sample: {"922": {"default_zone": "deny", "mode": "enhanced", "smart_zoning": "disabled", "locked": false,
+                   "zones": {"zoneA": ["device-alias host1_hba0"]}}}
+ansible_net_zonesets:
+  description: zones of each zoneset, per vsan
+  returned: when zonesets is collected
+  type: dict
+  sample: {"922": {"zsetname1": ["zoneA"]}}
+ansible_net_active_zonesets:
+  description: name and zone members of the active zoneset, per vsan with an active zoneset
+  returned: when active_zonesets is collected
+  type: dict
+  sample: {"922": {"name": "zsetname1", "zones": {"zoneA": ["pwwn 21:00:00:24:ff:11:22:33"]}}}
+interactions:
+  description: number of round-trips, config pushes, CLI lines and bytes exchanged with the switch
+  returned: always
+  type: dict
+  sample: {"round_trips": 1, "config_pushes": 0, "cli_lines": 3, "bytes": 5210}
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.network.nxos.nxos import nxos_argument_spec
+from ansible.module_utils.mds import exit_json, start_plan
+from ansible.module_utils.mds import mds_interaction_spec, mds_profile_spec, run_profiled
+from ansible.module_utils.mds_facts import FabricState, getGatherSubsets, getSanFacts
+from ansible.module_utils.mds_validate import failOnInputErrors, getVsanIdErrors
+
+__metaclass__ = type
+
+
+def main():
+    argument_spec = dict(
+        gather_subset=dict(type='list', elements='str', default=['all']),
+        vsans=dict(type='list', elements='int'),
+        state_from_files=dict(type='path')
+    )
+
+    argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_interaction_spec)
+    argument_spec.update(mds_profile_spec)
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    failOnInputErrors(module, getVsanIdErrors(module.params['vsans']))
+
+    subsets = getGatherSubsets(module, module.params['gather_subset'])
+
+    # Only handles state_from_files, this module has no plan option
+    start_plan(module, 'nxos_san_facts', [])
+
+    state = FabricState(module, module.params['vsans'], subsets)
+    ansible_facts = {'ansible_net_gather_subset': subsets}
+    for key, value in getSanFacts(state).items():
+        ansible_facts['ansible_net_' + key] = value
+
+    exit_json(module, changed=False, ansible_facts=ansible_facts, msg='Collected ' + ', '.join(subsets))
+
+
+if __name__ == '__main__':
+    run_profiled(main, 'nxos_san_facts')
@@ -0,0 +1,148 @@
+#!/usr/bin/python
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'network'}
+
+
+DOCUMENTATION = '''
+---
+module: nxos_san_snapshot
+extends_documentation_fragment: nxos
+version_added: 2.9
+short_description: Export the vsans, device-aliases and zones of a switch as a snapshot.
+description:
+    - Reads the vsans, device-aliases and zones of a Cisco MDS NXOS switch in one batch of show commands and
+      appends what the parsers read to a JSON Lines or SQLite snapshot file.
+    - A snapshot has one row per vsan, interface membership, device-alias, zone member, zoneset member and active
+      zone member, as [kind, vsan, name, member], and a content hash per vsan. The rows that are not bound to a vsan,
+      the device-aliases and their settings, are hashed under the C(device-alias) key.
+    - Snapshots of several switches and days can be appended to the same file, which makes it possible to diff
+      them by comparing the hashes first and only the rows of the vsans whose hashes differ.
+author:
+    - Suhas Bharadwaj (@srbharadwaj) (subharad@cisco.com)
+options:
+    vsans:
+        description:
+            - List of vsans to export, all the vsans of the switch if not set. The device-aliases are always exported.
+        type: list
+    snapshot:
+        description:
+            - Snapshot file to append to
+        required: True
+        type: dict
+        suboptions:
+            path:
+                description:
+                    - Path of the snapshot file, on the controller for network_cli/httpapi connections
+                required: True
+                type: path
+            format:
+                description:
+                    - C(jsonl) appends a header object with the switch, time, columns and hashes followed by one
+                      [id, kind, vsan, name, member] list per row.
+                    - C(sqlite) inserts into the snapshots, hashes and rows tables of the database, which are created
+                      if needed.
+                choices: ['jsonl', 'sqlite']
+                type: str
+                default: jsonl
+            switch:
+                description:
+                    - Name of the switch in the snapshot, e.g. the inventory_hostname
+                required: True
+                type: str
+    state_from_files:
+        description:
+            - Directory of captured show command outputs from which the snapshot is taken instead of the switch,
+              see the state_from_files option of nxos_vsan.
+        type: path
+    interaction_budget:
+        description:
+            - Maximum number of device interactions allowed for the module run, see the interaction_budget option of nxos_vsan.
+        type: dict
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
+'''
+
+EXAMPLES = '''
+---
+-
+  name: "Daily snapshot of the fabric"
+  nxos_san_snapshot:
+    snapshot:
+      path: "snapshots/fabric-a.jsonl"
+      switch: "{{ inventory_hostname }}"
+    provider: "{{ creds }}"
+'''
+
+RETURN = '''
+snapshot:
+  description: id of the snapshot (not set in check mode), path of the file, number of rows and hashes per vsan
+  returned: always
+  type: dict
+  sample: {"id": "sw1@2019-10-01T02:00:00.081234Z", "path": "snapshots/fabric-a.jsonl", "rows": 1250,
+           "hashes": {"922": "3c1f0e6d2b7a3f9d41e5c0a7b6e2d9f3a1c4b5e6", "device-alias": "8d1f0c6e2b7a3f9d41e5c0a7b6e2d9f3a1c4b5e6"}}
+changed_vsans:
+  description: hash keys whose rows differ from the last snapshot of the same switch in the file
+  returned: when the file holds an earlier snapshot of the switch
+  type: list
+  sample: ["922", "device-alias"]
+interactions:
+  description: number of round-trips, config pushes, CLI lines and bytes exchanged with the switch
+  returned: always
+  type: dict
+  sample: {"round_trips": 1, "config_pushes": 0, "cli_lines": 7, "bytes": 48210}
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.network.nxos.nxos import nxos_argument_spec
+from ansible.module_utils.mds import exit_json, start_plan
+from ansible.module_utils.mds import mds_interaction_spec, mds_profile_spec, run_profiled
+from ansible.module_utils.mds_facts import FabricState
+from ansible.module_utils.mds_snapshot import exportSnapshot, snapshot_spec
+from ansible.module_utils.mds_validate import failOnInputErrors, getVsanIdErrors
+
+__metaclass__ = type
+
+
+def main():
+    argument_spec = dict(
+        vsans=dict(type='list', elements='int'),
+        snapshot=dict(type='dict', required=True, options=snapshot_spec),
+        state_from_files=dict(type='path')
+    )
+
+    argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_interaction_spec)
+    argument_spec.update(mds_profile_spec)
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    failOnInputErrors(module, getVsanIdErrors(module.params['vsans']))
+
+    # Only handles state_from_files, this module has no plan option
+    start_plan(module, 'nxos_san_snapshot', [])
+
+    state = FabricState(module, module.params['vsans'])
+    snapshot, changed_vsans = exportSnapshot(module, state, module.params['snapshot'])
+
+    # The snapshot is appended to the file on every run, or would be in check mode
+    result = {'changed': True, 'snapshot': snapshot}
+    if changed_vsans is not None:
+        result['changed_vsans'] = changed_vsans
+    result['msg'] = 'Snapshot of ' + str(snapshot['rows']) + ' rows'
+    if module.check_mode:
+        result['msg'] = 'Check Mode: ' + result['msg'] + ' not written'
+    exit_json(module, **result)
+
+
+if __name__ == '__main__':
+    run_profiled(main, 'nxos_san_snapshot')
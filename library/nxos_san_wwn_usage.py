@@ -0,0 +1,133 @@
+#!/usr/bin/python
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'network'}
+
+
+DOCUMENTATION = '''
+---
+module: nxos_san_wwn_usage
+extends_documentation_fragment: nxos
+version_added: 2.9
+short_description: Finds the device-aliases, zones and zonesets that use pwwns.
+description:
+    - Tells, for each given pwwn, its device-aliases and per vsan the zones that have it as a member directly or through
+      one of its device-aliases, the zonesets of these zones and the zones of the active zoneset that have it, e.g.
+      before a host is retired.
+    - The device-aliases, zones, zonesets and active zonesets of all the vsans are read in a single batch of show
+      commands and indexed in one pass, so that any number of pwwns is looked up at the cost of one.
+    - Nothing is changed on the switch.
+author:
+    - Suhas Bharadwaj (@srbharadwaj) (subharad@cisco.com)
+options:
+    pwwns:
+        description:
+            - List of pwwns to look up
+        required: True
+        type: list
+    vsans:
+        description:
+            - List of vsans whose zones are looked up, all the vsans of the switch if not set
+        type: list
+    state_from_files:
+        description:
+            - Directory of captured show command outputs from which the switch is read instead of the switch,
+              see the state_from_files option of nxos_vsan.
+        type: path
+    interaction_budget:
+        description:
+            - Maximum number of device interactions allowed for the module run, see the interaction_budget option of nxos_vsan.
+        type: dict
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
+'''
+
+EXAMPLES = '''
+---
+-
+  name: "Where are the hbas of host1 used"
+  nxos_san_wwn_usage:
+    pwwns:
+      - 21:00:00:24:ff:11:22:33
+      - 21:00:00:24:ff:11:22:34
+    provider: "{{ creds }}"
+'''
+
+RETURN = '''
+usage:
+  description:
+    - per pwwn, with every byte shown with 2 digits, its device-aliases and per vsan the zones that have it as a member,
+      their zonesets, the zones of the active zoneset that have it and the name of the active zoneset
+  returned: always
+  type: dict
+  sample: {"21:00:00:24:ff:11:22:33": {"aliases": ["host1_hba0"],
+           "vsans": {"922": {"zones": ["zoneA"], "zonesets": ["zsetname1"], "active_zones": ["zoneA"],
+                             "active_zoneset": "zsetname1"}}}}
+unused:
+  description: pwwns that have no device-alias and are not a member of any zone
+  returned: always
+  type: list
+  sample: ["21:00:00:24:ff:11:22:34"]
+interactions:
+  description: number of round-trips, config pushes, CLI lines and bytes exchanged with the switch
+  returned: always
+  type: dict
+  sample: {"round_trips": 1, "config_pushes": 0, "cli_lines": 6, "bytes": 48210}
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.network.nxos.nxos import nxos_argument_spec
+from ansible.module_utils.mds import exit_json, start_plan
+from ansible.module_utils.mds import mds_interaction_spec, mds_profile_spec, run_profiled
+from ansible.module_utils.mds_devicealias import getNormalizedPwwn
+from ansible.module_utils.mds_facts import FabricState
+from ansible.module_utils.mds_index import INDEX_SUBSETS, WwnIndex
+from ansible.module_utils.mds_validate import failOnInputErrors, getPwwnErrors, getVsanIdErrors
+
+__metaclass__ = type
+
+
+def main():
+    argument_spec = dict(
+        pwwns=dict(type='list', elements='str', required=True),
+        vsans=dict(type='list', elements='int'),
+        state_from_files=dict(type='path')
+    )
+
+    argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_interaction_spec)
+    argument_spec.update(mds_profile_spec)
+
+    module = AnsibleModule(argument_spec=argument_spec,
+                           supports_check_mode=True)
+
+    failOnInputErrors(module, getPwwnErrors(module.params['pwwns']) + getVsanIdErrors(module.params['vsans']))
+
+    # Only handles state_from_files, this module has no plan option
+    start_plan(module, 'nxos_san_wwn_usage', [])
+
+    index = WwnIndex(FabricState(module, module.params['vsans'], INDEX_SUBSETS))
+    usage = {}
+    unused = []
+    for pwwn in module.params['pwwns']:
+        pwwn = getNormalizedPwwn(pwwn.lower())
+        if pwwn in usage:
+            continue
+        usage[pwwn] = index.getUsage(pwwn)
+        if not usage[pwwn]['aliases'] and not usage[pwwn]['vsans']:
+            unused.append(pwwn)
+
+    msg = str(len(usage) - len(unused)) + " of the " + str(len(usage)) + " pwwns are used"
+    exit_json(module, changed=False, usage=usage, unused=unused, msg=msg)
+
+
+if __name__ == '__main__':
+    run_profiled(main, 'nxos_san_wwn_usage')
@@ -45,6 +45,72 @@ options:
                 description:
                     - List of vsan's interfaces to be added
                 type: list
+    verify:
+        description:
+            - After the commands are pushed, read back only the vsans changed by the module and their
+              interface membership, in one batch, and report any difference from the intended state in
+              C(drift) and in the warnings.
+        type: bool
+        default: False
+    interaction_budget:
+        description:
+            - Maximum number of device interactions allowed for the module run, the module fails if any of them is exceeded.
+            - The actual counts are always returned in C(interactions).
+        type: dict
+        suboptions:
+            round_trips:
+                description:
+                    - Maximum number of show command batches and config pushes sent to the switch
+                type: int
+            config_pushes:
+                description:
+                    - Maximum number of config pushes sent to the switch
+                type: int
+            cli_lines:
+                description:
+                    - Maximum number of CLI lines sent to the switch
+                type: int
+            bytes:
+                description:
+                    - Maximum number of bytes sent to and received from the switch
+                type: int
+    plan:
+        description:
+            - Split the run into a plan and an apply step, e.g. to compute the changes ahead of a change window.
+            - With mode C(plan) the commands are computed as in a normal run but not pushed. They are written to a
+              plan file together with the messages and a digest of the output of 'show vsan' and 'show vsan membership', taken before the switch is read.
+            - With mode C(apply) the plan file is loaded and the planned commands are pushed if the digest of
+              that output still matches, else the module fails. The switch databases are not read again.
+        type: dict
+        suboptions:
+            mode:
+                description:
+                    - Whether to write the plan file or to apply it
+                required: True
+                choices: ['plan', 'apply']
+                type: str
+            path:
+                description:
+                    - Path of the plan file, on the controller for network_cli/httpapi connections.
+                      Use one file per switch, e.g. named after the inventory_hostname.
+                required: True
+                type: path
+    state_from_files:
+        description:
+            - Directory of captured show command outputs from which the state of the switch is read instead of the switch,
+              to plan the changes offline. Each file holds the text output of one command and is named after it, with
+              spaces and other special characters replaced by '_', e.g. show_vsan.txt and show_vsan_membership.txt.
+            - Nothing is pushed, the commands that would be sent are returned in C(commands). The whole databases are read
+              from the files, so the fetch thresholds do not apply.
+            - With plan mode C(plan) the plan file is written from the captured outputs, including the probed status.
+            - Use connection local and transport nxapi in the provider so that no connection to the switch is opened.
+        type: path
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - The files are named after the host, module name and timestamp of the run.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
 '''
 
 EXAMPLES = '''
@@ -90,99 +156,34 @@ commands:
     - vsan 922 interface fc1/40
     - vsan 922 interface port-channel 155
     - no terminal dont-ask
+drift:
+  description: differences between the intended and the read back state, when verify is set
+  returned: when verify is set and commands were pushed
+  type: list
+  sample: ["interface fc1/40 is not in vsan 922"]
+interactions:
+  description: number of round-trips, config pushes, CLI lines and bytes exchanged with the switch
+  returned: always
+  type: dict
+  sample: {"round_trips": 4, "config_pushes": 1, "cli_lines": 12, "bytes": 2648}
+plan:
+  description: path of the plan file, digest of the probed status and number of config pushes of the plan
+  returned: when plan is set
+  type: dict
+  sample: {"path": "/tmp/plans/sw1-vsan.json", "digest": "8d1f0c6e2b7a3f9d41e5c0a7b6e2d9f3a1c4b5e6", "pushes": 1}
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.network.nxos.nxos import load_config, nxos_argument_spec, run_commands
-import re
+from ansible.module_utils.network.nxos.nxos import nxos_argument_spec
+from ansible.module_utils.mds import exit_json, load_config, prefetch_commands
+from ansible.module_utils.mds import is_planning, mds_plan_spec, start_plan
+from ansible.module_utils.mds import mds_interaction_spec, mds_profile_spec, run_profiled
+from ansible.module_utils.mds_vsan import GetVsanInfoFromSwitch, getVsanCommands, verifyVsanChanges, vsan_element_spec
+from ansible.module_utils.mds_validate import failOnInputErrors, getVsanErrors
 
 __metaclass__ = type
 
 
-class Vsan(object):
-    def __init__(self, vsanid):
-        self.vsanid = vsanid
-        self.vsanname = None
-        self.vsanstate = None
-        self.vsanoperstate = None
-        self.vsaninterfaces = []
-
-
-class GetVsanInfoFromSwitch(object):
-    """docstring for GetVsanInfoFromSwitch"""
-
-    def __init__(self, module):
-        self.module = module
-        self.vsaninfo = {}
-        self.processShowVsan()
-        self.processShowVsanMembership()
-
-    def execute_show_vsan_cmd(self):
-        output = execute_show_command('show vsan', self.module)[0]
-        return output
-
-    def execute_show_vsan_mem_cmd(self):
-        output = execute_show_command('show vsan membership', self.module)[0]
-        return output
-
-    def processShowVsan(self):
-        patv = r"^vsan\s+(\d+)\s+information"
-        patnamestate = "name:(.*)state:(.*)"
-        patoperstate = "operational state:(.*)"
-
-        output = self.execute_show_vsan_cmd().split("\n")
-        for o in output:
-            z = re.match(patv, o.strip())
-            if z:
-                v = z.group(1).strip()
-                self.vsaninfo[v] = Vsan(v)
-
-            z1 = re.match(patnamestate, o.strip())
-            if z1:
-                n = z1.group(1).strip()
-                s = z1.group(2).strip()
-                self.vsaninfo[v].vsanname = n
-                self.vsaninfo[v].vsanstate = s
-
-            z2 = re.match(patoperstate, o.strip())
-            if z2:
-                oper = z2.group(1).strip()
-                self.vsaninfo[v].vsanoperstate = oper
-
-        # 4094/4079 vsan is always present
-        self.vsaninfo['4079'] = Vsan('4079')
-        self.vsaninfo['4094'] = Vsan('4094')
-
-    def processShowVsanMembership(self):
-        patv = r"^vsan\s+(\d+).*"
-        output = self.execute_show_vsan_mem_cmd().split("\n")
-        memlist = []
-        v = None
-        for o in output:
-            z = re.match(patv, o.strip())
-            if z:
-                if v is not None:
-                    self.vsaninfo[v].vsaninterfaces = memlist
-                    memlist = []
-                v = z.group(1)
-            if 'interfaces' not in o:
-                llist = o.strip().split()
-                memlist = memlist + llist
-        self.vsaninfo[v].vsaninterfaces = memlist
-
-    def getVsanInfoObjects(self):
-        return self.vsaninfo
-
-
-def execute_show_command(command, module, command_type='cli_show'):
-    output = 'text'
-    commands = [{
-        'command': command,
-        'output': output,
-    }]
-    return run_commands(module, commands)
-
-
 def flatten_list(command_lists):
     flat_command_list = []
     for command in command_lists:
@@ -194,118 +195,32 @@ def flatten_list(command_lists):
 
 
 def main():
-    vsan_element_spec = dict(
-        id=dict(required=True, type='int'),
-        name=dict(type='str'),
-        remove=dict(type='bool'),
-        suspend=dict(type='bool'),
-        interface=dict(type='list', elements='str')
-    )
-
     argument_spec = dict(
-        vsan=dict(type='list', elements='dict', options=vsan_element_spec)
+        vsan=dict(type='list', elements='dict', options=vsan_element_spec),
+        verify=dict(type='bool', default=False)
     )
 
     argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_interaction_spec)
+    argument_spec.update(mds_plan_spec)
+    argument_spec.update(mds_profile_spec)
 
     module = AnsibleModule(argument_spec=argument_spec,
                            supports_check_mode=True)
     warnings = list()
-    messages = list()
     commands_executed = list()
     result = {'changed': False}
 
-    obj = GetVsanInfoFromSwitch(module)
-    dictSwVsanObjs = obj.getVsanInfoObjects()
-
-    commands = []
-    vsan_list = module.params['vsan']
-
-    for eachvsan in vsan_list:
-        vsanid = str(eachvsan['id'])
-        vsanname = eachvsan['name']
-        vsanremove = eachvsan['remove']
-        vsansuspend = eachvsan['suspend']
-        vsaninterface_list = eachvsan['interface']
+    failOnInputErrors(module, getVsanErrors(module.params['vsan']))
 
-        if int(vsanid) < 1 or int(vsanid) >= 4095:
-            module.fail_json(msg=vsanid + " - This is an invalid vsan. Supported vsan range is 1-4094")
+    start_plan(module, 'nxos_vsan', ['show vsan', 'show vsan membership'], ignore=r'operational state')
 
-        if vsanid in dictSwVsanObjs.keys():
-            sw_vsanid = vsanid
-            sw_vsanname = dictSwVsanObjs[vsanid].vsanname
-            sw_vsanstate = dictSwVsanObjs[vsanid].vsanstate
-            sw_vsaninterfaces = dictSwVsanObjs[vsanid].vsaninterfaces
-        else:
-            sw_vsanid = None
-            sw_vsanname = None
-            sw_vsanstate = None
-            sw_vsaninterfaces = []
-
-        if vsanremove:
-            # Negetive case:
-            if vsanid == '4079' or vsanid == '4094':
-                messages.append(str(vsanid) + " is a reserved vsan, hence cannot be removed")
-                continue
-            if vsanid == sw_vsanid:
-                commands.append("no vsan " + str(vsanid))
-                messages.append("deleting the vsan " + str(vsanid))
-            else:
-                messages.append("There is no vsan " + str(vsanid) + " present in the switch. Hence there is nothing to delete")
-            continue
-        else:
-            # Negetive case:
-            if vsanid == '4079' or vsanid == '4094':
-                messages.append(str(vsanid) + " is a reserved vsan, and always present on the switch")
-            else:
-                if vsanid == sw_vsanid:
-                    messages.append("There is already a vsan " + str(vsanid) + " present in the switch. Hence there is nothing to configure")
-                else:
-                    commands.append("vsan " + str(vsanid))
-                    messages.append("creating vsan " + str(vsanid))
-
-        if vsanname is not None:
-            # Negetive case:
-            if vsanid == '4079' or vsanid == '4094':
-                messages.append(str(vsanid) + " is a reserved vsan, and cannot be renamed")
-            else:
-                if vsanname == sw_vsanname:
-                    messages.append(
-                        "There is already a vsan " +
-                        str(vsanid) +
-                        " present in the switch, which has the name " +
-                        vsanname +
-                        " Hence there is nothing to configure")
-                else:
-                    commands.append("vsan " + str(vsanid) + " name " + vsanname)
-                    messages.append("setting vsan name to " + vsanname + " for vsan " + str(vsanid))
-
-        if vsansuspend:
-            # Negetive case:
-            if vsanid == '4079' or vsanid == '4094':
-                messages.append(str(vsanid) + " is a reserved vsan, and cannot be suspended")
-            else:
-                if sw_vsanstate == 'suspended':
-                    messages.append("There is already a vsan " + str(vsanid) + " present in the switch, which is in suspended state ")
-                else:
-                    commands.append("vsan " + str(vsanid) + " suspend")
-                    messages.append("suspending the vsan " + str(vsanid))
-        else:
-            if sw_vsanstate == 'active':
-                messages.append("There is already a vsan " + str(vsanid) + " present in the switch, which is in active state ")
-            else:
-                commands.append("no vsan " + str(vsanid) + " suspend")
-                messages.append("no suspending the vsan " + str(vsanid))
+    # Both outputs in one batch, which is a single request over NX-API
+    prefetch_commands(module, ['show vsan', 'show vsan membership'], check_rc=True)
+    obj = GetVsanInfoFromSwitch(module)
+    dictSwVsanObjs = obj.getVsanInfoObjects()
 
-        if vsaninterface_list is not None:
-            for each_interface_name in vsaninterface_list:
-                # For fcip,port-channel,vfc-port-channel need to remove the extra space to compare
-                temp = re.sub(' +', '', each_interface_name)
-                if temp in sw_vsaninterfaces:
-                    messages.append(each_interface_name + " is already present in the vsan " + str(vsanid) + " interface list")
-                else:
-                    commands.append("vsan " + str(vsanid) + " interface " + each_interface_name)
-                    messages.append("adding interface " + each_interface_name + " to vsan " + str(vsanid))
+    commands, messages, verify_checks = getVsanCommands(module, module.params['vsan'], dictSwVsanObjs)
 
     if len(commands) != 0:
         commands = ["terminal dont-ask"] + ["vsan database"] + commands + ["no terminal dont-ask"]
@@ -315,16 +230,20 @@ def main():
 
     if commands_executed:
         if module.check_mode:
-            module.exit_json(changed=False, commands=commands_executed, msg="Check Mode: No cmds issued to the hosts")
+            exit_json(module, changed=False, commands=commands_executed, msg="Check Mode: No cmds issued to the hosts")
         else:
             result['changed'] = True
             load_config(module, commands_executed)
+            if module.params['verify'] and not is_planning():
+                result['drift'] = verifyVsanChanges(module, verify_checks)
+                for eachdrift in result['drift']:
+                    warnings.append("verify: " + eachdrift)
 
     result['messages'] = messages
     result['commands'] = commands_executed
     result['warnings'] = warnings
-    module.exit_json(**result)
+    exit_json(module, **result)
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main, 'nxos_vsan')
@@ -17,6 +17,8 @@ version_added: 2.9
 short_description: Configuration of zone/zoneset.
 description:
     - Configuration of zone/zoneset for Cisco MDS NXOS.
+    - Before anything is pushed, the module fails if a zone added to a zoneset or a device-alias added to a zone is not
+      present, or if an activated zoneset is not present or has no zones, listing all of them.
 author:
     - Suhas Bharadwaj (@srbharadwaj) (subharad@cisco.com)
 options:
@@ -99,6 +101,8 @@ options:
                     action:
                         description:
                             - activates/de-activates the zoneset
+                            - activation is skipped if the zoneset is already active with the same zones and members
+                              and nothing else changes in the vsan
                         choices: ['activate', 'deactivate']
                         default: 'deactivate'
                     members:
@@ -116,6 +120,196 @@ options:
                                     - Removes zone member from the zoneset
                                 type: bool
                                 default: False
+    zones_file:
+        description:
+            - File of zone members, in addition to zone_zoneset_details for large zoning imports, on the controller
+              for network_cli/httpapi connections.
+            - Each line has the vsan and zone columns and optionally a pwwn or device_alias member with its devtype,
+              a remove flag and a zoneset. It adds the member to the zone, or creates the zone if there is no member,
+              and adds the zone to the zoneset. With remove set, it removes the member, or the zone if there is no
+              member, instead.
+            - The file is read one line at a time and every line is validated before the switch is read. The lines are
+              grouped per vsan and zone without going through the argument spec of zone_zoneset_details, and come
+              before the zones and zonesets of the same vsan in zone_zoneset_details, e.g. to activate a zoneset of
+              the file.
+            - All the distinct members of the file are held in memory until the changes are computed, so the memory
+              used by the module grows with the file. Split very large imports into one file per vsan and task.
+        type: dict
+        suboptions:
+            path:
+                description:
+                    - Path of the file
+                required: True
+                type: path
+            format:
+                description:
+                    - C(csv) starts with a header line naming the columns, e.g. 'vsan,zone,pwwn,device_alias,devtype,remove,zoneset'.
+                    - C(jsonl) has one object per line with the same keys.
+                choices: ['csv', 'jsonl']
+                type: str
+                default: csv
+    zone_fetch_threshold:
+        description:
+            - Maximum number of zones (or zonesets) referenced in a vsan for which only those zones (or zonesets)
+              are fetched from the switch, in one batch of 'show zone name <zone> vsan <vsan>' commands.
+            - The whole zone database of the vsan is fetched if more of them are referenced, or if the vsan
+              does not hold more zones (or zonesets) than referenced.
+        type: int
+        default: 20
+    zone_capacity:
+        description:
+            - Before anything is pushed, estimate the number of zones and zonesets of the switch and the zone database
+              usage once the changes are committed, and fail if a limit would be exceeded. Without this check the
+              switch only rejects such changes at 'zone commit' or activation, after the whole push.
+            - The counts and the database usage and size are taken from 'show zone status', which the module reads anyway.
+              In plan mode C(plan), where only the probed vsans are read first, it is read once more for the switch wide counts.
+              The growth of the database is estimated from the planned zones, zonesets and members.
+        type: dict
+        suboptions:
+            enabled:
+                description:
+                    - Whether to run the check
+                type: bool
+                default: True
+            max_zones:
+                description:
+                    - Maximum number of zones of the switch, all vsans together
+                type: int
+                default: 16000
+            max_zonesets:
+                description:
+                    - Maximum number of zonesets of the switch, all vsans together
+                type: int
+                default: 1000
+            max_members_per_zone:
+                description:
+                    - Maximum number of members of a zone, not checked if not set
+                type: int
+            bytes_per_zone:
+                description:
+                    - Estimated database bytes of a zone or zoneset, on top of its name
+                type: int
+                default: 64
+            bytes_per_member:
+                description:
+                    - Estimated database bytes of a zone or zoneset member
+                type: int
+                default: 32
+    verify:
+        description:
+            - After the commands are pushed, read back only the zones, zonesets, zone status and active zoneset
+              changed by the module, in one batch, and report any difference from the intended state in C(drift)
+              and in the warnings.
+            - The zones (or zonesets) of a vsan are read back with a single 'show zone vsan <vsan>' if more than
+              zone_fetch_threshold of them changed.
+        type: bool
+        default: False
+    lock_wait:
+        description:
+            - How long to wait for a zone lock held by another session before failing.
+            - The lock is re-probed with 'show zone status vsan <vsan>' only, with exponential backoff.
+            - The time spent waiting is returned in C(lock_wait).
+        type: dict
+        suboptions:
+            timeout:
+                description:
+                    - Maximum number of seconds to wait for the lock, 0 fails at once
+                type: int
+                default: 0
+            delay:
+                description:
+                    - Number of seconds to wait before the first re-probe, doubled after every re-probe
+                type: float
+                default: 1.0
+            max_delay:
+                description:
+                    - Maximum number of seconds between two re-probes
+                type: float
+                default: 16.0
+    fabric_coordination:
+        description:
+            - Coordinate the hosts of a fabric that run this task in parallel, so that only one seed switch
+              applies the changes to the CFS distributed zone databases and the other switches only verify.
+            - The seed is elected through a claim file in a local lock directory, on the controller for
+              network_cli/httpapi connections. The other hosts wait for the seed to be done, then compute the
+              commands against their own switch and report them in C(drift) instead of pushing them.
+        type: dict
+        suboptions:
+            key:
+                description:
+                    - Name of the fabric, hosts with the same key and the same list of vsans coordinate with each other.
+                    - Use a key that is unique per playbook run, e.g. built from a run_once fact.
+                required: True
+                type: str
+            lock_dir:
+                description:
+                    - Directory in which the claim and done files are created
+                type: path
+                default: /tmp/mds_fabric_coordination
+            timeout:
+                description:
+                    - Number of seconds to wait for the seed switch, claim files older than that are stale
+                type: int
+                default: 600
+    interaction_budget:
+        description:
+            - Maximum number of device interactions allowed for the module run, the module fails if any of them is exceeded.
+            - The actual counts are always returned in C(interactions).
+        type: dict
+        suboptions:
+            round_trips:
+                description:
+                    - Maximum number of show command batches and config pushes sent to the switch
+                type: int
+            config_pushes:
+                description:
+                    - Maximum number of config pushes sent to the switch
+                type: int
+            cli_lines:
+                description:
+                    - Maximum number of CLI lines sent to the switch
+                type: int
+            bytes:
+                description:
+                    - Maximum number of bytes sent to and received from the switch
+                type: int
+    plan:
+        description:
+            - Split the run into a plan and an apply step, e.g. to compute the changes ahead of a change window.
+            - With mode C(plan) the commands are computed as in a normal run but not pushed. They are written to a
+              plan file together with the messages and a digest of the output of 'show zone status vsan <vsan>' of the vsans, taken before the switch is read.
+            - With mode C(apply) the plan file is loaded and the planned commands are pushed if the digest of
+              that output still matches, else the module fails. The switch databases are not read again.
+        type: dict
+        suboptions:
+            mode:
+                description:
+                    - Whether to write the plan file or to apply it
+                required: True
+                choices: ['plan', 'apply']
+                type: str
+            path:
+                description:
+                    - Path of the plan file, on the controller for network_cli/httpapi connections.
+                      Use one file per switch, e.g. named after the inventory_hostname.
+                required: True
+                type: path
+    state_from_files:
+        description:
+            - Directory of captured show command outputs from which the state of the switch is read instead of the switch,
+              to plan the changes offline. Each file holds the text output of one command and is named after it, with
+              spaces and other special characters replaced by '_', e.g. show_zone_status.txt, show_zone_status_vsan_22.txt and show_zone_vsan_22.txt.
+            - Nothing is pushed, the commands that would be sent are returned in C(commands). The whole databases are read
+              from the files, so the fetch thresholds do not apply.
+            - With plan mode C(plan) the plan file is written from the captured outputs, including the probed status.
+            - Use connection local and transport nxapi in the provider so that no connection to the switch is opened.
+        type: path
+    profile_dir:
+        description:
+            - Directory in which the cProfile stats file and the top allocation sites of the module run are written.
+            - The files are named after the host, module name and timestamp of the run.
+            - Can also be set using the MDS_ANSIBLE_PROFILE_DIR environment variable. Profiling is disabled if neither is set.
+        type: path
 '''
 
 EXAMPLES = '''
@@ -199,6 +393,21 @@ EXAMPLES = '''
                 name: zone21B
             name: zsetname21
 
+-
+  name: "Import the zones of a JSON Lines file and activate their zoneset"
+  nxos_zone_zoneset:
+    zones_file:
+      path: "zones/fabric-a.jsonl"
+      format: jsonl
+    zone_zoneset_details:
+      -
+        vsan: 22
+        zoneset:
+          -
+            action: activate
+            name: zsetname1
+    provider: "{{ creds }}"
+
 '''
 
 RETURN = '''
@@ -213,207 +422,61 @@ commands:
     - no member device-alias test123
     - zone commit vsan 923
     - no terminal dont-ask
+zone_fetch_strategy:
+  description: per vsan, whether the referenced zones were fetched individually (targeted) or with the whole zone database (full)
+  returned: always
+  type: dict
+  sample: {"22": "targeted", "23": "full"}
+drift:
+  description: differences between the intended and the read back state, when verify is set
+  returned: when verify is set and commands were pushed
+  type: list
+  sample: ["zone_member zoneA pwwn 11:11:11:11:11:11:11:11 in vsan 22 is False, expected True"]
+zone_capacity:
+  description: estimated number of zones and zonesets of the switch and zone database usage once the changes are committed
+  returned: when commands are planned and zone_capacity is enabled
+  type: dict
+  sample: {"zones": 1210, "zonesets": 2, "db_usage": 482210, "db_max": 4000000}
+lock_wait:
+  description: number of seconds spent waiting for the zone lock, per vsan that was locked
+  returned: always
+  type: dict
+  sample: {"22": 3.01}
+fabric_role:
+  description: whether this switch applied the changes (seed) or only verified them (follower), when fabric_coordination is set
+  returned: when fabric_coordination is set
+  type: str
+  sample: seed
+interactions:
+  description: number of round-trips, config pushes, CLI lines and bytes exchanged with the switch
+  returned: always
+  type: dict
+  sample: {"round_trips": 4, "config_pushes": 1, "cli_lines": 12, "bytes": 2648}
+plan:
+  description: path of the plan file, digest of the probed status and number of config pushes of the plan
+  returned: when plan is set
+  type: dict
+  sample: {"path": "/tmp/plans/sw1-zone.json", "digest": "8d1f0c6e2b7a3f9d41e5c0a7b6e2d9f3a1c4b5e6", "pushes": 1}
 '''
 
 
-import re
 from ansible.module_utils.basic import AnsibleModule
-from ansible.module_utils.network.nxos.nxos import load_config, nxos_argument_spec, run_commands
+from ansible.module_utils.network.nxos.nxos import nxos_argument_spec
+from ansible.module_utils.mds import exit_json, load_config, prefetch_commands
+from ansible.module_utils.mds import get_fetch_threshold, is_planning, mds_plan_spec, start_plan
+from ansible.module_utils.mds import mds_interaction_spec, mds_lock_wait_spec, mds_profile_spec, run_profiled
+from ansible.module_utils.mds import coordinate_fabric, input_file_spec, mds_fabric_coordination_spec
+from ansible.module_utils.mds_zone import ShowZoneStatus, checkZoneCapacity, getShowZoneStatusCmd, getVsanReadCmds, getZoneCommands
+from ansible.module_utils.mds_zone import checkZoneReferences, getAliasDatabase, getAliasReadCmds, getReferencedAliasNames
+from ansible.module_utils.mds_zone import mds_zone_capacity_spec, mergeZoneDetails, readZonesFile, verifyZoneChanges, zonedetails_spec
+from ansible.module_utils.mds_validate import failOnInputErrors, getZoneErrors
 
 
 __metaclass__ = type
 
 
-class ShowZonesetActive(object):
-    """docstring for ShowZonesetActive"""
-
-    def __init__(self, module, vsan):
-        self.vsan = vsan
-        self.module = module
-        self.activeZSName = None
-        self.parseCmdOutput()
-
-    def execute_show_zoneset_active_cmd(self):
-        command = 'show zoneset active vsan ' + str(self.vsan) + ' | grep zoneset'
-        output = execute_show_command(command, self.module)[0]
-        return output
-
-    def parseCmdOutput(self):
-        patZoneset = r"zoneset name (\S+) vsan " + str(self.vsan)
-        output = self.execute_show_zoneset_active_cmd().split("\n")
-        if len(output) == 0:
-            return
-        else:
-            for line in output:
-                line = line.strip()
-                mzs = re.match(patZoneset, line.strip())
-                if mzs:
-                    self.activeZSName = mzs.group(1).strip()
-                    return
-
-    def isZonesetActive(self, zsname):
-        if zsname == self.activeZSName:
-            return True
-        return False
-
-
-class ShowZoneset(object):
-    """docstring for ShowZoneset"""
-
-    def __init__(self, module, vsan):
-        self.vsan = vsan
-        self.module = module
-        self.zsDetails = {}
-        self.parseCmdOutput()
-
-    def execute_show_zoneset_cmd(self):
-        command = 'show zoneset vsan ' + str(self.vsan)
-        output = execute_show_command(command, self.module)[0]
-        return output
-
-    def parseCmdOutput(self):
-        patZoneset = r"zoneset name (\S+) vsan " + str(self.vsan)
-        patZone = r"zone name (\S+) vsan " + str(self.vsan)
-        output = self.execute_show_zoneset_cmd().split("\n")
-        for line in output:
-            line = line.strip()
-            mzs = re.match(patZoneset, line.strip())
-            mz = re.match(patZone, line.strip())
-            if mzs:
-                zonesetname = mzs.group(1).strip()
-                self.zsDetails[zonesetname] = []
-                continue
-            elif mz:
-                zonename = mz.group(1).strip()
-                v = self.zsDetails[zonesetname]
-                v.append(zonename)
-                self.zsDetails[zonesetname] = v
-
-    def isZonesetPresent(self, zsname):
-        return zsname in self.zsDetails.keys()
-
-    def isZonePresentInZoneset(self, zsname, zname):
-        if zsname in self.zsDetails.keys():
-            return zname in self.zsDetails[zsname]
-        return False
-
-
-class ShowZone(object):
-    """docstring for ShowZone"""
-
-    def __init__(self, module, vsan):
-        self.vsan = vsan
-        self.module = module
-        self.zDetails = {}
-        self.parseCmdOutput()
-
-    def execute_show_zone_vsan_cmd(self):
-        command = 'show zone vsan ' + str(self.vsan)
-        output = execute_show_command(command, self.module)[0]
-        return output
-
-    def parseCmdOutput(self):
-        patZone = r"zone name (\S+) vsan " + str(self.vsan)
-        output = self.execute_show_zone_vsan_cmd().split("\n")
-        for line in output:
-            line = ' '.join(line.strip().split())
-            m = re.match(patZone, line)
-            if 'init' in line:
-                line = line.replace('init', 'initiator')
-            if m:
-                zonename = m.group(1).strip()
-                self.zDetails[zonename] = []
-                continue
-            else:
-                # For now we support only pwwn and device-alias under zone
-                # Ideally should use 'supported_choices'..maybe next time.
-                if "pwwn" in line or "device-alias" in line:
-                    v = self.zDetails[zonename]
-                    v.append(line)
-                    self.zDetails[zonename] = v
-
-    def isZonePresent(self, zname):
-        return zname in self.zDetails.keys()
-
-    def isZoneMemberPresent(self, zname, cmd):
-        if zname in self.zDetails.keys():
-            zonememlist = self.zDetails[zname]
-            for eachline in zonememlist:
-                if cmd in eachline:
-                    return True
-        return False
-
-
-class ShowZoneStatus(object):
-    """docstring for ShowZoneStatus"""
-
-    def __init__(self, module, vsan):
-        self.vsan = vsan
-        self.vsanAbsent = False
-        self.module = module
-        self.default_zone = ""
-        self.mode = ""
-        self.session = ""
-        self.sz = ""
-        self.locked = False
-        self.update()
-
-    def execute_show_zone_status_cmd(self):
-        command = 'show zone status vsan ' + str(self.vsan)
-        output = execute_show_command(command, self.module)[0]
-        return output
-
-    def update(self):
-
-        output = self.execute_show_zone_status_cmd().split("\n")
-
-        patfordefzone = "VSAN: " + str(self.vsan) + r" default-zone:\s+(\S+).*"
-        patformode = r".*mode:\s+(\S+).*"
-        patforsession = r"^session:\s+(\S+).*"
-        patforsz = r".*smart-zoning:\s+(\S+).*"
-        for line in output:
-            if "is not configured" in line:
-                self.vsanAbsent = True
-                break
-            mdefz = re.match(patfordefzone, line.strip())
-            mmode = re.match(patformode, line.strip())
-            msession = re.match(patforsession, line.strip())
-            msz = re.match(patforsz, line.strip())
-
-            if mdefz:
-                self.default_zone = mdefz.group(1)
-            if mmode:
-                self.mode = mmode.group(1)
-            if msession:
-                self.session = msession.group(1)
-                if self.session != "none":
-                    self.locked = True
-            if msz:
-                self.sz = msz.group(1)
-
-    def isLocked(self):
-        return self.locked
-
-    def getDefaultZone(self):
-        return self.default_zone
-
-    def getMode(self):
-        return self.mode
-
-    def getSmartZoningStatus(self):
-        return self.sz
-
-    def isVsanAbsent(self):
-        return self.vsanAbsent
-
-
-def execute_show_command(command, module, command_type='cli_show'):
-    output = 'text'
-    commands = [{
-        'command': command,
-        'output': output,
-    }]
-    return run_commands(module, commands)
+def getNotAppliedDrift(cmds):
+    return ["still needed after the fabric seed switch applied its changes: " + cmd for cmd in cmds if 'terminal dont-ask' not in cmd]
 
 
 def flatten_list(command_lists):
@@ -426,323 +489,113 @@ def flatten_list(command_lists):
     return flat_command_list
 
 
-def getMemType(supported_choices, allmemkeys, default='pwwn'):
-    for eachchoice in supported_choices:
-        if eachchoice in allmemkeys:
-            return eachchoice
-    return default
-
-
 def main():
-
-    supported_choices = ['device-alias']
-    zone_member_spec = dict(
-        pwwn=dict(required=True, type='str', aliases=['device-alias']),
-        devtype=dict(type='str', choices=['initiator', 'target', 'both']),
-        remove=dict(type='bool', default=False)
-    )
-
-    zone_spec = dict(
-        name=dict(required=True, type='str'),
-        members=dict(type='list', elements='dict', options=zone_member_spec),
-        remove=dict(type='bool', default=False)
-    )
-
-    zoneset_member_spec = dict(
-        name=dict(required=True, type='str'),
-        remove=dict(type='bool', default=False)
-    )
-
-    zoneset_spec = dict(
-        name=dict(type='str', required=True),
-        members=dict(type='list', elements='dict', options=zoneset_member_spec),
-        remove=dict(type='bool', default=False),
-        action=dict(type='str', choices=['activate', 'deactivate'])
-    )
-
-    zonedetails_spec = dict(
-        vsan=dict(required=True, type='int'),
-        mode=dict(type='str', choices=['enhanced', 'basic']),
-        default_zone=dict(type='str', choices=['permit', 'deny']),
-        smart_zoning=dict(type='bool'),
-        zone=dict(type='list', elements='dict', options=zone_spec),
-        zoneset=dict(type='list', elements='dict', options=zoneset_spec),
-    )
-
     argument_spec = dict(
-        zone_zoneset_details=dict(type='list', elements='dict', options=zonedetails_spec)
+        zone_zoneset_details=dict(type='list', elements='dict', options=zonedetails_spec),
+        zones_file=dict(type='dict', options=input_file_spec),
+        zone_fetch_threshold=dict(type='int', default=20),
+        verify=dict(type='bool', default=False)
     )
 
+    argument_spec.update(mds_zone_capacity_spec)
+
     argument_spec.update(nxos_argument_spec)
+    argument_spec.update(mds_fabric_coordination_spec)
+    argument_spec.update(mds_interaction_spec)
+    argument_spec.update(mds_lock_wait_spec)
+    argument_spec.update(mds_plan_spec)
+    argument_spec.update(mds_profile_spec)
 
     module = AnsibleModule(argument_spec=argument_spec,
+                           mutually_exclusive=[('plan', 'fabric_coordination')],
+                           required_one_of=[('zone_zoneset_details', 'zones_file')],
                            supports_check_mode=True)
 
     warnings = list()
-    messages = list()
     commands = list()
     result = {'changed': False}
 
-    commands_executed = []
     listOfZoneDetails = module.params['zone_zoneset_details']
+    errors = getZoneErrors(listOfZoneDetails)
+    if module.params['zones_file'] is not None:
+        fileDetails, fileErrors = readZonesFile(module, module.params['zones_file'])
+        errors = errors + fileErrors
+        listOfZoneDetails = mergeZoneDetails(listOfZoneDetails, fileDetails)
+    failOnInputErrors(module, errors)
+
+    # The zone database usage and SFC size lines are switch wide, changes in other vsans do not invalidate a plan
+    zonevsans = sorted(set([z['vsan'] for z in listOfZoneDetails]))
+    start_plan(module, 'nxos_zone_zoneset', [getShowZoneStatusCmd(vsan) for vsan in zonevsans],
+               ignore=r'^(Current Total Zone DB Usage|SFC size):')
+
+    zone_fetch_threshold = get_fetch_threshold(module, 'zone_fetch_threshold')
+
+    # Followers of a coordinated fabric wait here for the seed switch to apply the changes
+    coordinator = coordinate_fabric(module, 'zone-vsan-' + '-'.join(sorted(set([str(z['vsan']) for z in listOfZoneDetails]))))
+
+    # Step0: execute show zone status once for all the vsans, or use the
+    # outputs of the vsans probed for the plan
+    shZoneStatusObj = ShowZoneStatus(module, zonevsans if module.params['plan'] else None)
+
+    # Fetch the zones and zonesets needed by all the vsans and the device-aliases
+    # added to zones in one batch, which is a single request over NX-API.
+    # Locked vsans are read after the wait.
+    readcmds = []
     for eachZoneZonesetDetail in listOfZoneDetails:
         vsan = eachZoneZonesetDetail['vsan']
-        op_mode = eachZoneZonesetDetail['mode']
-        op_default_zone = eachZoneZonesetDetail['default_zone']
-        op_smart_zoning = eachZoneZonesetDetail['smart_zoning']
-        op_zone = eachZoneZonesetDetail['zone']
-        op_zoneset = eachZoneZonesetDetail['zoneset']
-
-        # Step1: execute show zone status and get
-        shZoneStatusObj = ShowZoneStatus(module, vsan)
-        sw_default_zone = shZoneStatusObj.getDefaultZone()
-        sw_mode = shZoneStatusObj.getMode()
-        sw_smart_zoning = shZoneStatusObj.getSmartZoningStatus()
-
-        if sw_smart_zoning.lower() == "Enabled".lower():
-            sw_smart_zoning_bool = True
-        else:
-            sw_smart_zoning_bool = False
-
-        if shZoneStatusObj.isVsanAbsent():
-            module.fail_json(msg='Vsan ' + str(vsan) + ' is not present in the switch. Hence cannot procced.')
-
-        if shZoneStatusObj.isLocked():
-            module.fail_json(msg='zone has acquired lock on the switch for vsan ' + str(vsan) + '. Hence cannot procced.')
-
-        # Process zone default zone options
-        if op_default_zone is not None:
-            if op_default_zone != sw_default_zone:
-                if op_default_zone == "permit":
-                    commands_executed.append("zone default-zone permit vsan " + str(vsan))
-                    messages.append("default zone configuration changed from deny to permit for vsan " + str(vsan))
-                else:
-                    commands_executed.append("no zone default-zone permit vsan " + str(vsan))
-                    messages.append("default zone configuration changed from permit to deny for vsan " + str(vsan))
-            else:
-                messages.append("default zone is already " + op_default_zone + " ,no change in default zone configuration for vsan " + str(vsan))
-
-        # Process zone mode options
-        if op_mode is not None:
-            if op_mode != sw_mode:
-                if op_mode == "enhanced":
-                    commands_executed.append("zone mode enhanced vsan " + str(vsan))
-                    messages.append("zone mode configuration changed from basic to enhanced for vsan " + str(vsan))
-                else:
-                    commands_executed.append("no zone mode enhanced vsan " + str(vsan))
-                    messages.append("zone mode configuration changed from enhanced to basic for vsan " + str(vsan))
-            else:
-                messages.append("zone mode is already " + op_mode + " ,no change in zone mode configuration for vsan " + str(vsan))
-
-        # Process zone smart-zone options
-        if op_smart_zoning is not None:
-            if op_smart_zoning != sw_smart_zoning_bool:
-                if op_smart_zoning:
-                    commands_executed.append("zone smart-zoning enable vsan " + str(vsan))
-                    messages.append("smart-zoning enabled for vsan " + str(vsan))
-                else:
-                    commands_executed.append("no zone smart-zoning enable vsan " + str(vsan))
-                    messages.append("smart-zoning disabled for vsan " + str(vsan))
-            else:
-                messages.append("smart-zoning is already set to " + sw_smart_zoning + " , no change in smart-zoning configuration for vsan " + str(vsan))
-
-        # Process zone member options
-        # TODO: Obviously this needs to be cleaned up properly, as there are a lot of ifelse statements which is bad
-        # Will take it up later becoz of time constraints
-        if op_zone is not None:
-            shZoneObj = ShowZone(module, vsan)
-            for eachzone in op_zone:
-                zname = eachzone['name']
-                zmembers = eachzone['members']
-                removeflag = eachzone['remove']
-                if removeflag:
-                    if shZoneObj.isZonePresent(zname):
-                        messages.append("zone '" + zname + "' is removed from vsan " + str(vsan))
-                        commands_executed.append("no zone name " + zname + " vsan " + str(vsan))
-                    else:
-                        messages.append("zone '" + zname + "' is not present in vsan " + str(vsan) + " , so nothing to remove")
-                else:
-                    if zmembers is None:
-                        if shZoneObj.isZonePresent(zname):
-                            messages.append("zone '" + zname + "' is already present in vsan " + str(vsan))
-                        else:
-                            commands_executed.append("zone name " + zname + " vsan " + str(vsan))
-                            messages.append("zone '" + zname + "' is created in vsan " + str(vsan))
-                    else:
-                        cmdmemlist = []
-                        for eachmem in zmembers:
-                            memtype = getMemType(supported_choices, eachmem.keys())
-                            cmd = memtype + " " + eachmem[memtype]
-                            if op_smart_zoning or sw_smart_zoning_bool:
-                                if eachmem['devtype'] is not None:
-                                    cmd = cmd + " " + eachmem['devtype']
-                            if eachmem["remove"]:
-                                if shZoneObj.isZonePresent(zname):
-                                    if shZoneObj.isZoneMemberPresent(zname, cmd):
-                                        cmd = "no member " + cmd
-                                        cmdmemlist.append(cmd)
-                                        if op_smart_zoning and eachmem['devtype'] is not None:
-                                            messages.append(
-                                                "removing zone member '" +
-                                                eachmem[memtype] +
-                                                " of device type '" +
-                                                eachmem['devtype'] +
-                                                "' from zone '" +
-                                                zname +
-                                                "' in vsan " +
-                                                str(vsan))
-                                        else:
-                                            messages.append("removing zone member '" + eachmem[memtype] + "' from zone '" + zname + "' in vsan " + str(vsan))
-                                    else:
-                                        if op_smart_zoning and eachmem['devtype'] is not None:
-                                            messages.append(
-                                                "zone member '" +
-                                                eachmem[memtype] +
-                                                "' of device type '" +
-                                                eachmem['devtype'] +
-                                                "' is not present in zone '" +
-                                                zname +
-                                                "' in vsan " +
-                                                str(vsan) +
-                                                " hence nothing to remove")
-                                        else:
-                                            messages.append(
-                                                "zone member '" +
-                                                eachmem[memtype] +
-                                                "' is not present in zone '" +
-                                                zname +
-                                                "' in vsan " +
-                                                str(vsan) +
-                                                " hence nothing to remove")
-                                else:
-                                    messages.append("zone '" + zname + "' is not present in vsan " + str(vsan) + " , hence cannot remove the members")
-
-                            else:
-                                if shZoneObj.isZoneMemberPresent(zname, cmd):
-                                    if op_smart_zoning and eachmem['devtype'] is not None:
-                                        messages.append(
-                                            "zone member '" +
-                                            eachmem[memtype] +
-                                            "' of device type '" +
-                                            eachmem['devtype'] +
-                                            "' is already present in zone '" +
-                                            zname +
-                                            "' in vsan " +
-                                            str(vsan) +
-                                            " hence nothing to add")
-                                    else:
-                                        messages.append(
-                                            "zone member '" +
-                                            eachmem[memtype] +
-                                            "' is already present in zone '" +
-                                            zname +
-                                            "' in vsan " +
-                                            str(vsan) +
-                                            " hence nothing to add")
-                                else:
-                                    cmd = "member " + cmd
-                                    cmdmemlist.append(cmd)
-                                    if op_smart_zoning and eachmem['devtype'] is not None:
-                                        messages.append(
-                                            "adding zone member '" +
-                                            eachmem[memtype] +
-                                            "' of device type '" +
-                                            eachmem['devtype'] +
-                                            "' to zone '" +
-                                            zname +
-                                            "' in vsan " +
-                                            str(vsan))
-                                    else:
-                                        messages.append("adding zone member '" + eachmem[memtype] + "' to zone '" + zname + "' in vsan " + str(vsan))
-                        if len(cmdmemlist) != 0:
-                            commands_executed.append("zone name " + zname + " vsan " + str(vsan))
-                            commands_executed = commands_executed + cmdmemlist
-
-        # Process zoneset member options
-        if op_zoneset is not None:
-            dactcmd = []
-            actcmd = []
-            shZonesetObj = ShowZoneset(module, vsan)
-            shZonesetActiveObj = ShowZonesetActive(module, vsan)
-            for eachzoneset in op_zoneset:
-                zsetname = eachzoneset['name']
-                zsetmembers = eachzoneset['members']
-                removeflag = eachzoneset['remove']
-                actionflag = eachzoneset['action']
-                if removeflag:
-                    if shZonesetObj.isZonesetPresent(zsetname):
-                        messages.append("zoneset '" + zsetname + "' is removed from vsan " + str(vsan))
-                        commands_executed.append("no zoneset name " + zsetname + " vsan " + str(vsan))
-                    else:
-                        messages.append("zoneset '" + zsetname + "' is not present in vsan " + str(vsan) + " ,hence there is nothing to remove")
-                else:
-                    if zsetmembers is not None:
-                        cmdmemlist = []
-                        for eachzsmem in zsetmembers:
-                            zsetmem_name = eachzsmem['name']
-                            zsetmem_removeflag = eachzsmem['remove']
-                            if zsetmem_removeflag:
-                                if shZonesetObj.isZonePresentInZoneset(zsetname, zsetmem_name):
-                                    cmd = "no member " + zsetmem_name
-                                    cmdmemlist.append(cmd)
-                                    messages.append("removing zoneset member '" + zsetmem_name + "' from zoneset '" + zsetname + "' in vsan " + str(vsan))
-                                else:
-                                    messages.append("zoneset member '" + zsetmem_name + "' is not present in zoneset '" +
-                                                    zsetname + "' in vsan " + str(vsan) + " ,hence there is nothing to remove")
-                            else:
-                                if shZonesetObj.isZonePresentInZoneset(zsetname, zsetmem_name):
-                                    messages.append("zoneset member '" + zsetmem_name + "' is already present in zoneset '" +
-                                                    zsetname + "' in vsan " + str(vsan) + " ,hence there is nothing to add")
-                                else:
-                                    cmd = "member " + zsetmem_name
-                                    cmdmemlist.append(cmd)
-                                    messages.append("adding zoneset member '" + zsetmem_name + "' to zoneset '" + zsetname + "' in vsan " + str(vsan))
-                        if len(cmdmemlist) != 0:
-                            commands_executed.append("zoneset name " + zsetname + " vsan " + str(vsan))
-                            commands_executed = commands_executed + cmdmemlist
-                    else:
-                        if shZonesetObj.isZonesetPresent(zsetname):
-                            messages.append("zoneset '" + zsetname + "' is already present in vsan " + str(vsan))
-                        else:
-                            commands_executed.append("zoneset name " + zsetname + " vsan " + str(vsan))
-                            messages.append("zoneset '" + zsetname + "' is created in vsan " + str(vsan))
-
-                # Process zoneset activate options
-                if actionflag == 'deactivate':
-                    if shZonesetActiveObj.isZonesetActive(zsetname):
-                        messages.append("deactivating zoneset '" + zsetname + "' in vsan " + str(vsan))
-                        dactcmd.append("no zoneset activate name " + zsetname + " vsan " + str(vsan))
-                    else:
-                        messages.append("zoneset '" + zsetname + "' in vsan " + str(vsan) + " is not activated, hence cannot deactivate")
-                elif actionflag == 'activate':
-                    messages.append("activating zoneset '" + zsetname + "' in vsan " + str(vsan))
-                    actcmd.append("zoneset activate name " + zsetname + " vsan " + str(vsan))
-            commands_executed = commands_executed + dactcmd + actcmd
-
-        if commands_executed:
-            if op_mode == "enhanced":
-                commands_executed.append("zone commit vsan " + str(vsan))
-            elif op_mode is None:
-                if sw_mode == "enhanced":
-                    commands_executed.append("zone commit vsan " + str(vsan))
+        if not shZoneStatusObj.isVsanAbsent(vsan) and not shZoneStatusObj.isLocked(vsan):
+            readcmds = readcmds + getVsanReadCmds(eachZoneZonesetDetail, shZoneStatusObj, zone_fetch_threshold)
+    aliasnames = getReferencedAliasNames(listOfZoneDetails)
+    readcmds = readcmds + getAliasReadCmds(aliasnames, zone_fetch_threshold)
+    prefetch_commands(module, readcmds)
+
+    # Step1 onwards: compute the commands of every vsan
+    parsed = {}
+    commands_executed, messages, verify_checks, fetch_strategy, lock_wait = getZoneCommands(module, listOfZoneDetails, shZoneStatusObj,
+                                                                                            zone_fetch_threshold, parsed)
 
     if commands_executed:
         commands_executed = ["terminal dont-ask"] + commands_executed + ["no terminal dont-ask"]
 
     cmds = flatten_list(commands_executed)
+    if coordinator is not None:
+        result['fabric_role'] = 'seed' if coordinator.isSeed() else 'follower'
+    if cmds and (coordinator is None or coordinator.isSeed()):
+        # Fails here if a zone, zoneset or device-alias used by the changes is not present
+        # or a limit would be exceeded, the switch would only reject the changes while they are pushed
+        shDADatabaseObj = getAliasDatabase(module, aliasnames, zone_fetch_threshold)
+        checkZoneReferences(module, parsed, verify_checks, lambda name: shDADatabaseObj.isNameInDaDatabase(name))
+        zone_capacity = checkZoneCapacity(module, shZoneStatusObj, verify_checks, parsed)
+        if zone_capacity is not None:
+            result['zone_capacity'] = zone_capacity
     if cmds:
         if module.check_mode:
-            module.exit_json(changed=False, commands=cmds, msg="Check Mode: No cmds issued to the hosts")
+            if coordinator is not None:
+                coordinator.markDone()
+            result.update(changed=False, commands=cmds, msg="Check Mode: No cmds issued to the hosts")
+            exit_json(module, **result)
+        elif coordinator is not None and not coordinator.isSeed():
+            result['drift'] = getNotAppliedDrift(cmds)
+            warnings = warnings + result['drift']
         else:
             result['changed'] = True
             commands = commands + cmds
             load_config(module, cmds)
+            if module.params['verify'] and not is_planning():
+                result['drift'] = verifyZoneChanges(module, verify_checks, zone_fetch_threshold)
+                for eachdrift in result['drift']:
+                    warnings.append("verify: " + eachdrift)
+
+    if coordinator is not None:
+        coordinator.markDone()
 
     result['messages'] = messages
     result['commands'] = commands_executed
+    result['zone_fetch_strategy'] = fetch_strategy
+    result['lock_wait'] = lock_wait
     result['warnings'] = warnings
-    module.exit_json(**result)
+    exit_json(module, **result)
 
 
 if __name__ == '__main__':
-    main()
+    run_profiled(main, 'nxos_zone_zoneset')
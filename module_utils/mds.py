@@ -0,0 +1,655 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import atexit
+import cProfile
+import csv
+import errno
+import hashlib
+import json
+import os
+import pstats
+import re
+import sys
+import time
+
+try:
+    import tracemalloc
+    HAS_TRACEMALLOC = True
+except ImportError:
+    # tracemalloc is only available from python 3.4 onwards
+    HAS_TRACEMALLOC = False
+
+from ansible.module_utils.basic import _load_params
+from ansible.module_utils.network.nxos import nxos
+
+__metaclass__ = type
+
+
+PROFILE_DIR_ENV = 'MDS_ANSIBLE_PROFILE_DIR'
+PROFILE_TOP_N = 30
+
+mds_profile_spec = dict(
+    profile_dir=dict(type='path')
+)
+
+interaction_budget_spec = dict(
+    round_trips=dict(type='int'),
+    config_pushes=dict(type='int'),
+    cli_lines=dict(type='int'),
+    bytes=dict(type='int')
+)
+
+mds_interaction_spec = dict(
+    interaction_budget=dict(type='dict', options=interaction_budget_spec)
+)
+
+lock_wait_spec = dict(
+    timeout=dict(type='int', default=0),
+    delay=dict(type='float', default=1.0),
+    max_delay=dict(type='float', default=16.0)
+)
+
+mds_lock_wait_spec = dict(
+    lock_wait=dict(type='dict', options=lock_wait_spec)
+)
+
+fabric_coordination_spec = dict(
+    key=dict(type='str', required=True),
+    lock_dir=dict(type='path', default='/tmp/mds_fabric_coordination'),
+    timeout=dict(type='int', default=600)
+)
+
+mds_fabric_coordination_spec = dict(
+    fabric_coordination=dict(type='dict', options=fabric_coordination_spec)
+)
+
+plan_spec = dict(
+    mode=dict(type='str', required=True, choices=['plan', 'apply']),
+    path=dict(type='path', required=True)
+)
+
+# A CSV or JSON Lines file of entries, in place of a list option
+input_file_spec = dict(
+    path=dict(type='path', required=True),
+    format=dict(type='str', choices=['csv', 'jsonl'], default='csv')
+)
+
+mds_plan_spec = dict(
+    plan=dict(type='dict', options=plan_spec),
+    state_from_files=dict(type='path')
+)
+
+
+class DeviceInteractions(object):
+    """Counts the round-trips, CLI lines and bytes exchanged with the switch"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.config_pushes = 0
+        self.cli_lines = 0
+        self.bytes = 0
+
+    def record(self, commands, outputs=None):
+        self.round_trips += 1
+        for command in commands:
+            if isinstance(command, dict):
+                command = command['command']
+            self.cli_lines += 1
+            self.bytes += len(command) + 1
+        for output in outputs or []:
+            if not isinstance(output, dict):
+                self.bytes += len(str(output))
+
+    def asDict(self):
+        return dict(round_trips=self.round_trips,
+                    config_pushes=self.config_pushes,
+                    cli_lines=self.cli_lines,
+                    bytes=self.bytes)
+
+    def getExceeded(self, budget):
+        exceeded = []
+        for key, value in sorted(self.asDict().items()):
+            limit = (budget or {}).get(key)
+            if limit is not None and value > limit:
+                exceeded.append(key + ' ' + str(value) + ' > ' + str(limit))
+        return exceeded
+
+
+interactions = DeviceInteractions()
+
+# Outputs of prefetched show commands, handed out once by run_commands()
+prefetched = {}
+
+# Plan being recorded in 'plan' mode, load_config() adds the config pushes to it
+planned = {}
+
+# Directory of the captured show outputs answering the show commands, if any
+captured = {}
+
+# Single copy of the strings repeated across the parsed switch state, see intern_string()
+interned = {}
+
+
+def get_command_string(command):
+    if isinstance(command, dict):
+        return command['command']
+    return command
+
+
+def to_text_commands(commands):
+    # The parser classes work on the text output, ask for it explicitly so that
+    # NX-API (cli_show_ascii) returns the same output as the CLI
+    return [command if isinstance(command, dict) else {'command': command, 'output': 'text'} for command in commands]
+
+
+def get_command_error(command, out):
+    # NX-API reports the error of a command as a dict over the nxapi transport
+    # and as the text of the connection error, '<command>: <message>', over
+    # httpapi. Returns the message of the switch, None if the command succeeded.
+    if isinstance(out, dict):
+        return out.get('clierror') or out.get('msg') or ''
+    prefix = get_command_string(command) + ': '
+    if hasattr(out, 'startswith') and out.startswith(prefix):
+        return out[len(prefix):]
+    return None
+
+
+def get_text_output(module, command, out, check_rc=False):
+    # With check_rc the module fails with the error message of the switch,
+    # else the message is handed to the text parsers as the CLI would print it
+    command = to_text_commands([command])[0]
+    if command.get('output', 'text') != 'text':
+        return out
+    error = get_command_error(command, out)
+    if error is None:
+        return out
+    if check_rc:
+        module.fail_json(msg=command['command'] + ': ' + error.strip())
+    return error
+
+
+def get_captured_file(command):
+    return re.sub(r'[^\w.-]+', '_', get_command_string(command)).strip('_') + '.txt'
+
+
+def read_captured_outputs(module, commands):
+    outputs = []
+    for command in commands:
+        path = os.path.join(captured['dir'], get_captured_file(command))
+        try:
+            with open(path) as f:
+                outputs.append(f.read())
+        except IOError:
+            module.fail_json(msg="No captured output of '" + get_command_string(command) + "', expected in " + path)
+    return outputs
+
+
+def send_commands(module, commands, check_rc=True):
+    """Runs show commands in a single request and returns one output per command
+
+    Over NX-API (httpapi connection or nxapi transport) the commands are sent
+    in one JSON-RPC POST. With check_rc=False a batch in which one command
+    fails is answered with a single error, so it is then re-run one command at
+    a time to get the output of each. The outputs are returned as received,
+    get_text_output() turns the NX-API errors into text. With
+    'state_from_files' the outputs are read from the captured files instead.
+    """
+    if captured:
+        return read_captured_outputs(module, commands)
+    commands = to_text_commands(commands)
+    output = nxos.run_commands(module, commands, check_rc=check_rc)
+    interactions.record(commands, output)
+    if len(output) != len(commands):
+        output = []
+        for command in commands:
+            out = nxos.run_commands(module, [command], check_rc=check_rc)
+            interactions.record([command], out)
+            output.append(out[0] if out else '')
+    return output
+
+
+def prefetch_commands(module, commands, check_rc=False):
+    """Runs show commands in a single round-trip ahead of time
+
+    The parser classes still run their own commands, which are answered from
+    the prefetched outputs instead of the switch. Each output is used once, so
+    a command issued again later (e.g. after a config push) reaches the switch.
+    """
+    commands = [command for command in commands if get_command_string(command) not in prefetched]
+    if not commands:
+        return
+    output = send_commands(module, commands, check_rc=check_rc)
+    for command, out in zip(commands, output):
+        prefetched[get_command_string(command)] = out
+
+
+def prefetch_outputs(outputs):
+    """Hands out outputs obtained otherwise to the commands the parsers will run
+
+    outputs maps each command to its output, e.g. the blocks of one vsan split
+    from a show command covering all the vsans.
+    """
+    for command, out in outputs.items():
+        prefetched[get_command_string(command)] = out
+
+
+def run_commands(module, commands, check_rc=True):
+    pending = [command for command in commands if get_command_string(command) not in prefetched]
+    if pending:
+        output = send_commands(module, pending, check_rc=check_rc)
+        for command, out in zip(pending, output):
+            prefetched[get_command_string(command)] = out
+    outputs = {}
+    for command in commands:
+        key = get_command_string(command)
+        if key in prefetched:
+            outputs[key] = prefetched.pop(key)
+    return [get_text_output(module, command, outputs[get_command_string(command)], check_rc) for command in commands]
+
+
+def load_config(module, config, *args, **kwargs):
+    if is_planning():
+        planned['pushes'].append(list(config))
+        return []
+    output = nxos.load_config(module, config, *args, **kwargs)
+    interactions.config_pushes += 1
+    interactions.record(config)
+    return output
+
+
+def exit_json(module, **result):
+    """Adds the device interaction counters to the result and exits
+
+    Fails instead if the counters exceed the 'interaction_budget' option.
+    """
+    if module.params.get('plan') and is_planning():
+        write_plan(module, result)
+    if captured:
+        # The config pushes planned from the captured outputs are not sent
+        if planned.get('pushes'):
+            result['changed'] = False
+        result.setdefault('msg', 'Planned from the outputs captured in ' + captured['dir'] + ', no cmds issued to the hosts')
+    result['interactions'] = interactions.asDict()
+    exceeded = interactions.getExceeded(module.params.get('interaction_budget'))
+    if exceeded:
+        result['msg'] = 'Device interaction budget exceeded: ' + ', '.join(exceeded)
+        module.fail_json(**result)
+    module.exit_json(**result)
+
+
+def is_planning():
+    return 'pushes' in planned
+
+
+def get_probe_digest(module, probe, ignore=None):
+    # Lines matching ignore hold switch wide or volatile values, e.g. the
+    # zone database usage of all the vsans, and are left out of the digest.
+    # The outputs are kept for the module, which usually reads them next.
+    digest = hashlib.sha1()
+    outputs = send_commands(module, probe, check_rc=False)
+    for command, output in zip(probe, outputs):
+        prefetched[get_command_string(command)] = output
+    for command, output in zip(probe, outputs):
+        for line in str(get_text_output(module, command, output)).split("\n"):
+            line = ' '.join(line.split())
+            if line and not (ignore and re.search(ignore, line)):
+                digest.update((line + "\n").encode('utf-8'))
+    return digest.hexdigest()
+
+
+def get_fetch_threshold(module, name):
+    # The captured outputs hold the whole databases, individual entries are
+    # never fetched from them
+    if captured:
+        return 0
+    return module.params[name]
+
+
+def is_targeted_fetch(count, dbcount, threshold):
+    # Query the count entries referenced by the task one by one only if they
+    # are few and the database has more, else a single dump of it is cheaper
+    if not dbcount:
+        return False
+    return count <= threshold and count < dbcount
+
+
+def start_plan(module, module_name, probe, ignore=None):
+    """Handles the 'plan' and 'state_from_files' options, to be called before the module reads the switch
+
+    probe is a list of cheap status commands whose output changes whenever the
+    configuration managed by the module changes. In 'plan' mode their digest
+    is taken and load_config() records the config pushes instead of sending
+    them, exit_json() then writes the plan file. In 'apply' mode the plan file
+    is loaded and its pushes are sent if the digest of the probe still matches,
+    without reading the switch databases again. The module exits here.
+
+    With 'state_from_files' the show commands are answered from the files of
+    that directory and nothing is pushed, the planned commands are returned.
+    """
+    directory = module.params.get('state_from_files')
+    if directory:
+        if not os.path.isdir(directory):
+            module.fail_json(msg='state_from_files ' + directory + ' is not a directory')
+        captured['dir'] = directory
+        planned['pushes'] = []
+    options = module.params.get('plan')
+    if not options:
+        return
+    if options['mode'] == 'apply' and directory:
+        module.fail_json(msg='A plan can only be applied to the switch, not with state_from_files')
+    if options['mode'] == 'plan':
+        if module.check_mode:
+            module.fail_json(msg='The plan is recorded from the config pushes of a normal run, do not use check mode with plan mode')
+        planned.update(module=module_name, probe=probe, digest=get_probe_digest(module, probe, ignore), pushes=[])
+        return
+    apply_plan(module, module_name, probe, ignore)
+
+
+def write_plan(module, result):
+    path = module.params['plan']['path']
+    plan = dict(planned)
+    plan['messages'] = result.get('messages', [])
+    plan['created'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+    try:
+        if os.path.dirname(path) and not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path + '.tmp', 'w') as f:
+            json.dump(plan, f, indent=1)
+        os.rename(path + '.tmp', path)
+    except (IOError, OSError) as e:
+        module.fail_json(msg='Unable to write the plan file ' + path + ': ' + str(e))
+    result['changed'] = False
+    result['plan'] = dict(path=path, digest=planned['digest'], pushes=len(planned['pushes']))
+
+
+def apply_plan(module, module_name, probe, ignore=None):
+    path = module.params['plan']['path']
+    try:
+        with open(path) as f:
+            plan = json.load(f)
+    except (IOError, ValueError) as e:
+        module.fail_json(msg='Unable to load the plan file ' + path + ': ' + str(e))
+    if plan.get('module') != module_name:
+        module.fail_json(msg='The plan file ' + path + ' was written by ' + str(plan.get('module')) + ', not by ' + module_name)
+
+    commands = []
+    for config in plan['pushes']:
+        commands = commands + config
+    digest = get_probe_digest(module, probe, ignore)
+    result = dict(changed=False, commands=commands, messages=plan['messages'],
+                  plan=dict(path=path, digest=digest, pushes=len(plan['pushes'])))
+    if digest != plan['digest']:
+        result['msg'] = 'The switch configuration changed since the plan was written on ' + plan['created'] + ', plan again'
+        module.fail_json(**result)
+    if module.check_mode:
+        result['changed'] = bool(commands)
+        exit_json(module, msg="Check Mode: No cmds issued to the hosts", **result)
+    for config in plan['pushes']:
+        load_config(module, config)
+        result['changed'] = True
+    exit_json(module, **result)
+
+
+def wait_for_lock(module, isLocked, refresh):
+    """Waits for a CFS session lock held by someone else to be released
+
+    isLocked() tells whether the lock is held and refresh() re-runs only the
+    lightweight status command. The status is re-probed with exponential
+    backoff until the lock is released or the 'lock_wait' timeout expires.
+    Returns the number of seconds spent waiting and whether it is still locked.
+    """
+    options = module.params.get('lock_wait') or {}
+    timeout = options.get('timeout') or 0
+    if captured:
+        # The captured lock will not be released
+        timeout = 0
+    delay = options.get('delay') or 1.0
+    max_delay = options.get('max_delay') or 16.0
+    start = time.time()
+    deadline = start + timeout
+    while isLocked():
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            break
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+        refresh()
+    return round(time.time() - start, 2), isLocked()
+
+
+class FabricCoordinator(object):
+    """Elects one seed switch per fabric among the hosts running the same task
+
+    Every host of the fabric tries to create the same claim file in a local
+    lock directory (on the controller for network_cli/httpapi connections).
+    The one that succeeds is the seed and applies the changes, the others wait
+    until the seed has written its done file and then only verify. The claim
+    and done files are named after the 'fabric_coordination' key and a scope,
+    e.g. the vsans handled by the task, so use a key that is unique per
+    playbook run. Files older than the timeout are considered stale.
+    """
+
+    def __init__(self, module, scope):
+        options = module.params['fabric_coordination']
+        self.module = module
+        self.timeout = options['timeout']
+        name = re.sub(r'[^\w.-]', '_', options['key'] + '-' + scope)
+        self.claimfile = os.path.join(options['lock_dir'], name + '.seed')
+        self.donefile = os.path.join(options['lock_dir'], name + '.done')
+        self.status = None
+        try:
+            os.makedirs(options['lock_dir'])
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        self.seed = self.claim()
+        if self.seed:
+            atexit.register(self.release)
+
+    def isStale(self, path):
+        try:
+            return time.time() - os.path.getmtime(path) > self.timeout
+        except OSError:
+            return False
+
+    def claim(self):
+        if self.isStale(self.claimfile):
+            for path in (self.claimfile, self.donefile):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        try:
+            fd = os.open(self.claimfile, os.O_CREAT | os.O_EXCL | os.O_WRONLY, int('644', 8))
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+            return False
+        os.write(fd, str(os.getpid()).encode('utf-8'))
+        os.close(fd)
+        return True
+
+    def isSeed(self):
+        return self.seed
+
+    def markDone(self):
+        self.release('ok')
+
+    def release(self, status='failed'):
+        # Called with 'failed' at exit if the seed did not finish, so the
+        # other hosts stop waiting for it
+        if not self.seed or self.status is not None:
+            return
+        self.status = status
+        with open(self.donefile + '.tmp', 'w') as f:
+            f.write(status)
+        os.rename(self.donefile + '.tmp', self.donefile)
+
+    def waitForSeed(self):
+        # Returns 'ok' or 'failed' as written by the seed, None on timeout
+        deadline = time.time() + self.timeout
+        while time.time() < deadline:
+            try:
+                with open(self.donefile) as f:
+                    return f.read().strip()
+            except IOError:
+                time.sleep(1)
+        return None
+
+
+def coordinate_fabric(module, scope):
+    """Returns the FabricCoordinator of the module, or None if not requested
+
+    Followers return only after the seed is done. They fail if it failed or
+    did not finish within the timeout.
+    """
+    if not module.params.get('fabric_coordination'):
+        return None
+    coordinator = FabricCoordinator(module, scope)
+    if not coordinator.isSeed():
+        status = coordinator.waitForSeed()
+        if status != 'ok':
+            module.fail_json(msg='The seed switch of the fabric ' + ('failed' if status else 'did not finish in time') +
+                             ' for ' + scope + '. Hence cannot procced.')
+    return coordinator
+
+
+def iter_file_rows(module, option, options, required):
+    """Yields the line number, the row and the error of each line of an input file
+
+    options are the path and format of the file given in the module option
+    named option. The file is read one line at a time. A CSV file starts with
+    a header line naming its columns, among which the required ones, a JSON
+    Lines file has one object per line. The row is a dict of the columns,
+    None for the lines that cannot be read, whose error is set instead.
+    """
+    path = options['path']
+    jsonl = options.get('format') == 'jsonl'
+    try:
+        f = open(path)
+    except (IOError, OSError) as e:
+        module.fail_json(msg='Cannot read the ' + option + ' ' + path + ': ' + str(e))
+    with f:
+        if jsonl:
+            rows = enumerate(f, 1)
+        else:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None or [column for column in required if column not in reader.fieldnames]:
+                module.fail_json(msg='The ' + option + ' ' + path + ' must start with a header line naming the ' +
+                                 ', '.join(required) + ' columns')
+            rows = ((reader.line_num, row) for row in reader)
+        for lineno, row in rows:
+            if jsonl:
+                if not row.strip():
+                    continue
+                try:
+                    row = json.loads(row)
+                except ValueError:
+                    row = None
+                if not isinstance(row, dict):
+                    yield lineno, None, "line " + str(lineno) + " is not a JSON object"
+                    continue
+            missing = [column for column in required if row.get(column) in (None, '')]
+            if missing:
+                yield lineno, None, "line " + str(lineno) + " has no " + ", ".join(missing)
+                continue
+            yield lineno, row, None
+
+
+def is_true(value):
+    # A boolean column of an input file
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('true', 'yes', '1')
+
+
+def intern_string(value):
+    """Returns the single copy of a string repeated across the parsed switch state
+
+    The same zone names, zone members and vsan ids are shown by several show
+    commands and in many zones, e.g. a target pwwn zoned with every host.
+    Unlike the intern() builtin of Python 2 it also takes unicode strings.
+    """
+    return interned.setdefault(value, value)
+
+
+def tokenize_output(pattern, output):
+    """Scans a show command output once and yields a (kind, match) token per line of interest
+
+    pattern is a precompiled re.M regex anchored at the start of a line with
+    '^', an alternation of one named group per kind of line, e.g. the zone,
+    zoneset and member lines of 'show zoneset'. kind is the name of the group
+    that matched. The other lines are skipped without being split or copied,
+    though one character at a time: a pattern for an output made mostly of
+    such lines can end with an empty catch-all group to skip them whole.
+    """
+    for m in pattern.finditer(output):
+        yield m.lastgroup, m
+
+
+def get_profile_dir(params):
+    if params.get('profile_dir'):
+        return params['profile_dir']
+    return os.environ.get(PROFILE_DIR_ENV)
+
+
+def get_profile_prefix(params, module_name):
+    provider = params.get('provider') or {}
+    host = params.get('host') or provider.get('host') or 'local'
+    host = re.sub(r'[^\w.-]', '_', str(host))
+    timestamp = time.strftime('%Y%m%dT%H%M%S')
+    return '-'.join([host, module_name, timestamp, str(os.getpid())])
+
+
+def write_profile_report(profiler, snapshot, path):
+    with open(path, 'w') as f:
+        f.write('Top ' + str(PROFILE_TOP_N) + ' functions by cumulative time\n\n')
+        stats = pstats.Stats(profiler, stream=f)
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+        if snapshot is None:
+            f.write('\ntracemalloc is not available, allocation sites were not recorded\n')
+            return
+        f.write('\nTop ' + str(PROFILE_TOP_N) + ' allocation sites\n\n')
+        for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N]:
+            f.write(str(stat) + '\n')
+
+
+def run_profiled(main, module_name):
+    """Runs main(), profiling it with cProfile and tracemalloc if requested
+
+    Profiling is enabled by the 'profile_dir' module option or by the
+    MDS_ANSIBLE_PROFILE_DIR environment variable. The stats file (.prof) and a
+    text report with the top functions and allocation sites (.txt) are written
+    to that directory on the host executing the module, which is the controller
+    for network_cli/httpapi connections.
+    """
+    params = _load_params()
+    profile_dir = get_profile_dir(params)
+    if not profile_dir:
+        return main()
+
+    if HAS_TRACEMALLOC:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(main)
+    finally:
+        snapshot = None
+        if HAS_TRACEMALLOC:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        try:
+            try:
+                os.makedirs(profile_dir)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+            prefix = os.path.join(profile_dir, get_profile_prefix(params, module_name))
+            profiler.dump_stats(prefix + '.prof')
+            write_profile_report(profiler, snapshot, prefix + '.txt')
+        except (IOError, OSError) as e:
+            # The module result has already been written to stdout at this point
+            sys.stderr.write('Unable to write profile data to ' + profile_dir + ': ' + str(e) + '\n')
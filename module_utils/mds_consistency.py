@@ -0,0 +1,183 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import atexit
+import errno
+import hashlib
+import json
+import os
+import re
+import time
+
+__metaclass__ = type
+
+
+consistency_spec = dict(
+    key=dict(type='str', required=True),
+    switch=dict(type='str', required=True),
+    switches=dict(type='list', elements='str', required=True),
+    exchange_dir=dict(type='path', default='/tmp/mds_consistency'),
+    wait_timeout=dict(type='int', default=600)
+)
+
+# The subsets of FabricState compared across the switches, the vsans and
+# their interfaces are local to each switch
+CONSISTENCY_SUBSETS = ['device_alias', 'zones', 'zonesets', 'active_zonesets']
+
+
+def getConsistencyObjects(state):
+    """Returns the sorted members of every object of a FabricState that should be the same on all the switches
+
+    The settings are keyed with a hyphen so that they do not collide with a
+    device-alias or zone named 'settings'.
+    """
+    objects = {}
+    objects['device-alias-settings'] = ['distribute ' + state.daStatus.getDistribute(), 'mode ' + state.daStatus.getMode()]
+    for name, pwwn in state.daDatabase.da_dict.items():
+        objects['device-alias ' + name] = [pwwn]
+    for vsan in state.getZonedVsans():
+        suffix = ' vsan ' + vsan
+        objects['zone-settings' + suffix] = ['default_zone ' + state.zoneStatus.getDefaultZone(vsan),
+                                             'mode ' + state.zoneStatus.getMode(vsan),
+                                             'smart_zoning ' + state.zoneStatus.getSmartZoningStatus(vsan)]
+        for zname, members in state.zones[vsan].zDetails.items():
+            objects['zone ' + zname + suffix] = sorted(members)
+        for zsname, znames in state.zonesets[vsan].zsDetails.items():
+            objects['zoneset ' + zsname + suffix] = sorted(znames)
+        active = state.activeZonesets[vsan]
+        if active.activeZSName is not None:
+            members = ['zoneset ' + active.activeZSName]
+            for zname, zmembers in active.activeZones.items():
+                members = members + ['zone ' + zname + ' ' + member for member in zmembers]
+            objects['active zoneset' + suffix] = sorted(members)
+    return objects
+
+
+def getObjectHashes(objects):
+    hashes = {}
+    for key, members in objects.items():
+        hashes[key] = hashlib.sha1("\n".join(members).encode('utf-8')).hexdigest()
+    return hashes
+
+
+class ConsistencyExchange(object):
+    """Shares the objects of each switch of a fabric through a local directory
+
+    Every host writes the hashes of its objects and the objects themselves to
+    <exchange_dir>/<key>/ (on the controller for network_cli/httpapi
+    connections), then waits for the other switches. The hashes file is
+    written last, so its presence tells that the switch is done. A host that
+    exits before writing it leaves a failed file instead, so that the others
+    do not wait for it.
+    """
+
+    def __init__(self, module):
+        options = module.params
+        self.module = module
+        self.switch = options['switch']
+        self.switches = options['switches']
+        self.timeout = options['wait_timeout']
+        self.directory = os.path.join(options['exchange_dir'], re.sub(r'[^\w.-]', '_', options['key']))
+        self.objects = {}
+        self.done = False
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        atexit.register(self.release)
+
+    def getPath(self, switch, kind):
+        return os.path.join(self.directory, re.sub(r'[^\w.-]', '_', switch) + '.' + kind)
+
+    def writeFile(self, switch, kind, content):
+        path = self.getPath(switch, kind)
+        with open(path + '.tmp', 'w') as f:
+            f.write(content)
+        os.rename(path + '.tmp', path)
+
+    def publish(self, objects, hashes):
+        self.writeFile(self.switch, 'objects.json', json.dumps(objects))
+        self.writeFile(self.switch, 'hashes.json', json.dumps(hashes))
+        self.done = True
+
+    def release(self):
+        if not self.done:
+            self.writeFile(self.switch, 'failed', 'failed')
+
+    def waitForSwitches(self):
+        """Returns the hashes of the switches that are done, and the ones that failed or did not finish in time"""
+        hashes = {}
+        failed = []
+        pending = list(self.switches)
+        deadline = time.time() + self.timeout
+        while pending:
+            for switch in list(pending):
+                try:
+                    with open(self.getPath(switch, 'hashes.json')) as f:
+                        hashes[switch] = json.load(f)
+                    pending.remove(switch)
+                except IOError:
+                    if os.path.exists(self.getPath(switch, 'failed')):
+                        failed.append(switch)
+                        pending.remove(switch)
+            if not pending or time.time() >= deadline:
+                break
+            time.sleep(1)
+        return hashes, failed, pending
+
+    def getObjects(self, switch):
+        # Only read for the switches that have an object differing from the others
+        if switch not in self.objects:
+            with open(self.getPath(switch, 'objects.json')) as f:
+                self.objects[switch] = json.load(f)
+        return self.objects[switch]
+
+
+def getReferenceSwitches(digests, switches):
+    # The switches holding the most common version of the object, ties are
+    # broken by the order of the switches
+    counts = {}
+    for switch in switches:
+        counts.setdefault(digests[switch], []).append(switch)
+    return max(counts.values(), key=lambda holders: (len(holders), -switches.index(holders[0])))
+
+
+def getDriftReport(exchange, hashes):
+    """Compares the objects of the switches, returns the number of objects compared and the drifts
+
+    The hashes of the objects are compared first. The members of an object
+    are only read for the objects whose hashes differ. They are then compared
+    with the most common version of the object, which is empty if most
+    switches do not have it. Each drift lists, per differing switch, the
+    members it lacks and the extra members it has, or whether the object is
+    absent from it.
+    """
+    switches = [switch for switch in exchange.switches if switch in hashes]
+    keys = set()
+    for switch in switches:
+        keys.update(hashes[switch].keys())
+    drift = []
+    for key in sorted(keys):
+        digests = dict([(switch, hashes[switch].get(key)) for switch in switches])
+        if len(set(digests.values())) == 1:
+            continue
+        reference = getReferenceSwitches(digests, switches)
+        if digests[reference[0]] is None:
+            refmembers = []
+        else:
+            refmembers = exchange.getObjects(reference[0])[key]
+        differing = {}
+        for switch in switches:
+            if switch in reference:
+                continue
+            if digests[switch] is None:
+                differing[switch] = dict(absent=True)
+                continue
+            members = exchange.getObjects(switch)[key]
+            differing[switch] = dict(missing=sorted(set(refmembers) - set(members)),
+                                     extra=sorted(set(members) - set(refmembers)))
+        drift.append(dict(object=key, reference=reference, differing=differing))
+    return len(keys), drift
@@ -0,0 +1,485 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import re
+from ansible.module_utils.mds import is_targeted_fetch, is_true, iter_file_rows, prefetch_commands, run_commands
+from ansible.module_utils.mds_validate import failOnInputErrors, getDeviceAliasEntryErrors, getDeviceAliasErrors
+
+__metaclass__ = type
+
+
+da_element_spec = dict(
+    name=dict(required=True, type='str'),
+    pwwn=dict(type='str'),
+    remove=dict(type='bool', default=False)
+)
+
+da_rename_spec = dict(
+    old_name=dict(required=True, type='str'),
+    new_name=dict(required=True, type='str'),
+)
+
+devicealias_spec = dict(
+    distribute=dict(type='bool'),
+    mode=dict(type='str', choices=['enhanced', 'basic']),
+    da=dict(type='list', elements='dict', options=da_element_spec),
+    rename=dict(type='list', elements='dict', options=da_rename_spec)
+)
+
+# The entries of 'show device-alias database' and 'show device-alias name/pwwn'
+DEVICE_ALIAS_ENTRY_PATTERN = re.compile(r"^[ \t]*device-alias name (\S+) pwwn (\S+)", re.M)
+
+
+class showDeviceAliasStatus(object):
+    """docstring for showDeviceAliasStatus"""
+
+    def __init__(self, module):
+        self.module = module
+        self.distribute = ""
+        self.mode = ""
+        self.locked = False
+        self.entries = None
+        self.update()
+
+    def execute_show_cmd(self, cmd):
+        output = execute_show_command(cmd, self.module)[0]
+        return output
+
+    def update(self):
+        self.locked = False
+        command = 'show device-alias status'
+        output = self.execute_show_cmd(command).split("\n")
+        for o in output:
+            if "Fabric Distribution" in o:
+                self.distribute = o.split(":")[1].strip().lower()
+            if "Mode" in o:
+                self.mode = o.split("Mode:")[1].strip().lower()
+            if "Locked" in o:
+                self.locked = True
+            m = re.match(r"Database:-\s*Device Aliases\s+(\d+)", o.strip())
+            if m:
+                self.entries = int(m.group(1))
+
+    def isLocked(self):
+        return self.locked
+
+    def getDistribute(self):
+        return self.distribute.lower()
+
+    def getMode(self):
+        return self.mode.lower()
+
+    def getNumberOfEntries(self):
+        return self.entries
+
+
+class showDeviceAliasDatabase(object):
+    """docstring for showDeviceAliasDatabase"""
+
+    def __init__(self, module, names=None, pwwns=None):
+        self.module = module
+        self.names = names
+        self.pwwns = pwwns
+        self.da_dict = {}
+        self.pwwn_dict = {}
+        self.update()
+
+    def execute_show_cmd(self, cmd):
+        output = execute_show_command(cmd, self.module)[0]
+        return output
+
+    def execute_show_targeted_cmds(self):
+        # Targeted fetch: only the names and pwwns referenced by the playbook, in one batch
+        commands = getShowDeviceAliasCmds(self.names, self.pwwns)
+        if not commands:
+            return ""
+        return "\n".join(execute_show_commands(commands, self.module, check_rc=False))
+
+    def update(self):
+        if self.names is not None or self.pwwns is not None:
+            self.names = self.names or []
+            self.pwwns = self.pwwns or []
+            output = self.execute_show_targeted_cmds()
+        else:
+            command = 'show device-alias database'
+            output = self.execute_show_cmd(command)
+        # Only the aliases are kept, the output is not split into lines
+        for m in DEVICE_ALIAS_ENTRY_PATTERN.finditer(output):
+            self.da_dict[m.group(1)] = m.group(2)
+            self.pwwn_dict[m.group(2)] = m.group(1)
+
+    def isNameInDaDatabase(self, name):
+        return name in self.da_dict
+
+    def isPwwnInDaDatabase(self, pwwn):
+        newpwwn = getNormalizedPwwn(pwwn)
+        return newpwwn in self.pwwn_dict
+
+    def isNamePwwnPresentInDatabase(self, name, pwwn):
+        newpwwn = getNormalizedPwwn(pwwn)
+        return self.da_dict.get(name) == newpwwn
+
+    def getPwwnByName(self, name):
+        return self.da_dict.get(name)
+
+    def getNameByPwwn(self, pwwn):
+        newpwwn = getNormalizedPwwn(pwwn)
+        return self.pwwn_dict.get(newpwwn)
+
+
+def getNormalizedPwwn(pwwn):
+    # The switch shows every byte of the pwwn with 2 digits
+    return ':'.join(["0" + str(ep) if len(ep) == 1 else ep for ep in pwwn.split(":")])
+
+
+def getDeviceAliasFetch(da, rename, dbcount, threshold):
+    # Returns the fetch strategy ('none', 'targeted' or 'full') for the da and
+    # rename options, with the names and pwwns to fetch if targeted
+    if da is None and rename is None:
+        return 'none', None, None
+    names = set()
+    pwwns = set()
+    for eachdict in da or []:
+        names.add(eachdict['name'])
+        if not eachdict['remove'] and eachdict['pwwn'] is not None:
+            pwwns.add(getNormalizedPwwn(eachdict['pwwn'].lower()))
+    for eachdict in rename or []:
+        names.add(eachdict['old_name'])
+        names.add(eachdict['new_name'])
+    if is_targeted_fetch(len(names) + len(pwwns), dbcount, threshold):
+        return 'targeted', sorted(names), sorted(pwwns)
+    return 'full', None, None
+
+
+def getPlannedDeviceAliases(da, rename):
+    # Whether each name of the da and rename options is in the database once
+    # the changes are committed, conflicting entries fail the module instead
+    planned = {}
+    for eachdict in da or []:
+        planned[eachdict['name']] = not eachdict['remove']
+    for eachdict in rename or []:
+        planned[eachdict['old_name']] = False
+        planned[eachdict['new_name']] = True
+    return planned
+
+
+def getShowDeviceAliasCmds(names=None, pwwns=None):
+    if names is None and pwwns is None:
+        return ['show device-alias database']
+    commands = ['show device-alias name ' + name for name in names or []]
+    return commands + ['show device-alias pwwn ' + pwwn for pwwn in pwwns or []]
+
+
+def getDeviceAliasProbeCmds():
+    # The entry count of 'show device-alias status' misses a rename or a pwwn
+    # change, the digest of a plan also covers the entries of the database
+    return ['show device-alias status'] + getShowDeviceAliasCmds()
+
+
+def verifyDeviceAliasChanges(module, checks, threshold):
+    """Reads back the device-alias settings and entries changed by the module and returns the drifts
+
+    checks is a list of (kind, name, expected) tuples recorded while planning
+    the commands, with expected None for removed names. Everything is read
+    back in one batch, the entries with a single 'show device-alias database'
+    once more than threshold of them changed.
+    """
+    names = sorted(set([name for kind, name, expected in checks if kind == 'name']))
+    if len(names) > threshold:
+        readback = getShowDeviceAliasCmds()
+    elif names:
+        readback = getShowDeviceAliasCmds(names)
+    else:
+        readback = []
+    if [kind for kind, name, expected in checks if kind != 'name']:
+        readback.append('show device-alias status')
+        prefetch_commands(module, readback)
+        shDAStausObj = showDeviceAliasStatus(module)
+    else:
+        prefetch_commands(module, readback)
+    if len(names) > threshold:
+        shDADatabaseObj = showDeviceAliasDatabase(module)
+    elif names:
+        shDADatabaseObj = showDeviceAliasDatabase(module, names, [])
+
+    drift = []
+    for kind, name, expected in checks:
+        if kind == 'distribute':
+            actual = shDAStausObj.getDistribute()
+        elif kind == 'mode':
+            actual = shDAStausObj.getMode()
+        else:
+            actual = shDADatabaseObj.getPwwnByName(name)
+        if actual != expected:
+            item = kind if name is None else "device-alias " + name
+            drift.append(item + " is " + str(actual) + ", expected " + str(expected))
+    return drift
+
+
+def execute_show_command(command, module, command_type='cli_show'):
+    output = 'text'
+    commands = [{
+        'command': command,
+        'output': output,
+    }]
+    out = run_commands(module, commands)
+    return out
+
+
+def execute_show_commands(commands, module, check_rc=True):
+    commands = [{
+        'command': command,
+        'output': 'text',
+    } for command in commands]
+    return run_commands(module, commands, check_rc=check_rc)
+
+
+def flatten_list(command_lists):
+    flat_command_list = []
+    for command in command_lists:
+        if isinstance(command, list):
+            flat_command_list.extend(command)
+        else:
+            flat_command_list.append(command)
+    return flat_command_list
+
+
+def validateDeviceAliasParams(module, da, rename, da_file=None):
+    # Validate syntax of name and pwwn
+    # Also validate syntax of rename arguments and of every line of da_file, all the errors are reported at once
+    errors = getDeviceAliasErrors(da, rename)
+    if da_file is not None:
+        errors = errors + getDaFileErrors(module, da_file)
+    failOnInputErrors(module, errors)
+
+
+def iterDaFile(module, options):
+    """Yields the line number, the device-alias entry and the error of each line of a da_file
+
+    The lines have the name, pwwn and optional remove columns of the da option.
+    """
+    for lineno, row, error in iter_file_rows(module, 'da_file', options, ['name']):
+        if row is None:
+            yield lineno, None, error
+            continue
+        yield lineno, dict(name=('%s' % row['name']).strip(), pwwn=('%s' % row['pwwn']).strip() if row.get('pwwn') else None,
+                           remove=is_true(row.get('remove') or False)), None
+
+
+def getDaFileErrors(module, options):
+    # The errors of all the lines, the entries themselves are not kept
+    errors = []
+    for lineno, entry, error in iterDaFile(module, options):
+        if error is not None:
+            errors.append(error)
+            continue
+        errors.extend(["line " + str(lineno) + ": " + entryerror for entryerror in getDeviceAliasEntryErrors(entry)])
+    return errors
+
+
+def readDaFile(module, options):
+    # The entries of a da_file validated by getDaFileErrors(), read again one by one
+    for lineno, entry, error in iterDaFile(module, options):
+        if entry is not None:
+            yield entry
+
+
+def getDeviceAliasCommands(module, params, shDAStausObj, da_fetch_threshold):
+    """Returns the config batches, messages, verify checks, fetch strategy and device-alias database for params
+
+    params holds the distribute, mode, da and rename options, and da_file for
+    nxos_devicealias, whose entries are streamed in place of da. Each batch is a
+    (commands, messages) tuple to be pushed with its own load_config call, the
+    messages to be added once it has been pushed. The showDeviceAliasDatabase
+    object read for the entries is returned, None if nothing was read, so
+    that a 'full' fetch can be looked up again without another read.
+    """
+    distribute = params['distribute']
+    mode = params['mode']
+    da = params['da']
+    rename = params['rename']
+    da_file = params.get('da_file')
+    d = shDAStausObj.getDistribute()
+    m = shDAStausObj.getMode()
+    batches = []
+    messages = []
+    verify_checks = []
+
+    # Step 1: Process distribute
+    commands = []
+    if distribute is not None:
+        if distribute:
+            # playbook has distribute as True(enabled)
+            if d == "disabled":
+                # but switch distribute is disabled(false), so set it to true(enabled)
+                commands.append("device-alias distribute")
+                verify_checks.append(('distribute', None, 'enabled'))
+                messages.append('device-alias distribute changed from disabled to enabled')
+            else:
+                messages.append('device-alias distribute remains unchanged. current distribution mode is enabled')
+        else:
+            # playbook has distribute as False(disabled)
+            if d == "enabled":
+                # but switch distribute is enabled(true), so set it to false(disabled)
+                commands.append("no device-alias distribute")
+                verify_checks.append(('distribute', None, 'disabled'))
+                messages.append('device-alias distribute changed from enabled to disabled')
+            else:
+                messages.append('device-alias distribute remains unchanged. current distribution mode is disabled')
+
+    cmds = flatten_list(commands)
+    if cmds:
+        batches.append((cmds, []))
+
+    # Step 2: Process mode
+    commands = []
+    if mode is not None:
+        if mode == 'basic':
+            # playbook has mode as basic
+            if m == 'enhanced':
+                # but switch mode is enhanced, so set it to basic
+                commands.append("no device-alias mode enhanced")
+                verify_checks.append(('mode', None, 'basic'))
+                messages.append('device-alias mode changed from enhanced to basic')
+            else:
+                messages.append('device-alias mode remains unchanged. current mode is basic')
+
+        else:
+            # playbook has mode as enhanced
+            if m == 'basic':
+                # but switch mode is basic, so set it to enhanced
+                commands.append("device-alias mode enhanced")
+                verify_checks.append(('mode', None, 'enhanced'))
+                messages.append('device-alias mode changed from basic to enhanced')
+            else:
+                messages.append('device-alias mode remains unchanged. current mode is enhanced')
+
+    if commands:
+        if distribute:
+            commands.append("device-alias commit")
+            commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
+        else:
+            if distribute is None and d == 'enabled':
+                commands.append("device-alias commit")
+                commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
+
+    cmds = flatten_list(commands)
+    if cmds:
+        batches.append((cmds, []))
+
+    # Step 3: Process da
+    commands = []
+    if da_file is not None:
+        # The file is diffed against the whole database, its entries are read one by one
+        da_fetch_strategy, da_names, da_pwwns = 'full', None, None
+        da = readDaFile(module, da_file)
+    else:
+        da_fetch_strategy, da_names, da_pwwns = getDeviceAliasFetch(da, rename, shDAStausObj.getNumberOfEntries(), da_fetch_threshold)
+    shDADatabaseObj = None
+    if da_fetch_strategy != 'none':
+        shDADatabaseObj = showDeviceAliasDatabase(module, da_names, da_pwwns)
+    if da is not None:
+        da_remove_list = []
+        da_add_list = []
+        unchanged = 0
+        for eachdict in da:
+            name = eachdict['name']
+            pwwn = eachdict['pwwn']
+            remove = eachdict['remove']
+            if pwwn is not None:
+                pwwn = pwwn.lower()
+            if remove:
+                if shDADatabaseObj.isNameInDaDatabase(name):
+                    commands.append("no device-alias name " + name)
+                    verify_checks.append(('name', name, None))
+                    da_remove_list.append(name)
+                elif da_file is not None:
+                    unchanged = unchanged + 1
+                else:
+                    messages.append(name + ' - This device alias name is not in switch device-alias database, hence cannot be removed.')
+            else:
+                if shDADatabaseObj.isNamePwwnPresentInDatabase(name, pwwn) and da_file is not None:
+                    unchanged = unchanged + 1
+                elif shDADatabaseObj.isNamePwwnPresentInDatabase(name, pwwn):
+                    messages.append(name + ' : ' + pwwn + ' - This device alias name,pwwn is already in switch device-alias database, \
+                        hence nothing to configure')
+                else:
+                    if shDADatabaseObj.isNameInDaDatabase(name):
+                        module.fail_json(
+                            msg=name +
+                            ' - This device alias name is already present in switch device-alias database but assigned to another pwwn (' +
+                            shDADatabaseObj.getPwwnByName(name) +
+                            ') hence cannot be added')
+
+                    elif shDADatabaseObj.isPwwnInDaDatabase(pwwn):
+                        module.fail_json(
+                            msg=pwwn +
+                            ' - This device alias pwwn is already present in switch device-alias database but assigned to another name (' +
+                            shDADatabaseObj.getNameByPwwn(pwwn) +
+                            ') hence cannot be added')
+
+                    else:
+                        commands.append("device-alias name " + name + " pwwn " + pwwn)
+                        verify_checks.append(('name', name, getNormalizedPwwn(pwwn)))
+                        da_add_list.append(name)
+
+        if unchanged:
+            messages.append(str(unchanged) + ' device-alias entries of the da_file are already in the state of the file, hence nothing to configure')
+
+        if len(da_add_list) != 0 or len(da_remove_list) != 0:
+            commands = ["device-alias database"] + commands
+            if distribute:
+                commands.append("device-alias commit")
+                commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
+            else:
+                if distribute is None and d == 'enabled':
+                    commands.append("device-alias commit")
+                    commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
+
+        cmds = flatten_list(commands)
+        if cmds:
+            pushedmessages = []
+            if len(da_remove_list) != 0:
+                pushedmessages.append('the required device-alias were removed. ' + ','.join(da_remove_list))
+            if len(da_add_list) != 0:
+                pushedmessages.append('the required device-alias were added. ' + ','.join(da_add_list))
+            batches.append((cmds, pushedmessages))
+
+    # Step 5: Process rename
+    commands = []
+    if rename is not None:
+        for eachdict in rename:
+            oldname = eachdict['old_name']
+            newname = eachdict['new_name']
+            if shDADatabaseObj.isNameInDaDatabase(newname):
+                module.fail_json(
+                    changed=False,
+                    commands=cmds,
+                    msg=newname +
+                    " - this name is already present in the device-alias database, hence we cannot rename " +
+                    oldname +
+                    " with this one")
+            if shDADatabaseObj.isNameInDaDatabase(oldname):
+                commands.append('device-alias rename ' + oldname + ' ' + newname)
+                verify_checks.append(('name', oldname, None))
+                verify_checks.append(('name', newname, shDADatabaseObj.getPwwnByName(oldname)))
+            else:
+                module.fail_json(changed=False, commands=cmds, msg=oldname +
+                                 " - this name is not present in the device-alias database, hence we cannot rename.")
+
+        if len(commands) != 0:
+            commands = ["device-alias database"] + commands
+            if distribute:
+                commands.append("device-alias commit")
+                commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
+            else:
+                if distribute is None and d == 'enabled':
+                    commands.append("device-alias commit")
+                    commands = ["terminal dont-ask"] + commands + ["no terminal dont-ask"]
+        cmds = flatten_list(commands)
+        if cmds:
+            batches.append((cmds, []))
+
+    return batches, messages, verify_checks, da_fetch_strategy, shDADatabaseObj
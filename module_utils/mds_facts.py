@@ -0,0 +1,140 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+from ansible.module_utils.mds import prefetch_commands, prefetch_outputs, run_commands
+from ansible.module_utils.mds_devicealias import showDeviceAliasDatabase, showDeviceAliasStatus
+from ansible.module_utils.mds_vsan import GetVsanInfoFromSwitch
+from ansible.module_utils.mds_zone import ShowZone, ShowZoneset, ShowZonesetActive, ShowZoneStatus
+from ansible.module_utils.mds_zone import getShowZoneStatusCmd, splitByVsan
+
+__metaclass__ = type
+
+
+VALID_SUBSETS = ['vsans', 'device_alias', 'zones', 'zonesets', 'active_zonesets']
+
+# The show commands covering all the vsans that each subset needs
+SUBSET_COMMANDS = dict(
+    vsans=['show vsan', 'show vsan membership'],
+    device_alias=['show device-alias status', 'show device-alias database'],
+    zones=[getShowZoneStatusCmd(), 'show zone'],
+    zonesets=[getShowZoneStatusCmd(), 'show zoneset'],
+    active_zonesets=[getShowZoneStatusCmd(), 'show zoneset active']
+)
+
+
+def getGatherSubsets(module, gather_subset):
+    """Returns the subsets selected by the gather_subset option
+
+    'all' selects every subset, '!<subset>' removes one from the selection.
+    """
+    include = set()
+    exclude = set()
+    for subset in gather_subset:
+        name = subset[1:] if subset.startswith('!') else subset
+        if name == 'all':
+            names = VALID_SUBSETS
+        elif name in VALID_SUBSETS:
+            names = [name]
+        else:
+            module.fail_json(msg='Subset must be one of [' + ', '.join(['all'] + VALID_SUBSETS) + '], got ' + subset)
+        if subset.startswith('!'):
+            exclude.update(names)
+        else:
+            include.update(names)
+    if not include:
+        include.update(VALID_SUBSETS)
+    return [subset for subset in VALID_SUBSETS if subset in include and subset not in exclude]
+
+
+class FabricState(object):
+    """Reads the vsans, device-aliases and zones of a switch in a single batch
+
+    Only the show commands of the given subsets are run and only their
+    outputs are parsed, the objects of the other subsets are left unset. The
+    zone, zoneset and active zoneset outputs of all the vsans are split per
+    vsan and parsed with the per vsan parser classes.
+    """
+
+    def __init__(self, module, vsans=None, subsets=None):
+        self.module = module
+        self.vsans = None if vsans is None else [str(vsan) for vsan in vsans]
+        self.subsets = VALID_SUBSETS if subsets is None else subsets
+        self.vsaninfo = None
+        self.daStatus = None
+        self.daDatabase = None
+        self.zoneStatus = None
+        self.zones = None
+        self.zonesets = None
+        self.activeZonesets = None
+        self.update()
+
+    def isVsanWanted(self, vsan):
+        return self.vsans is None or str(vsan) in self.vsans
+
+    def getZonedVsans(self):
+        return sorted([vsan for vsan in self.zoneStatus.vsanStatus if self.isVsanWanted(vsan)], key=int)
+
+    def update(self):
+        commands = []
+        for subset in self.subsets:
+            commands = commands + [command for command in SUBSET_COMMANDS[subset] if command not in commands]
+        prefetch_commands(self.module, commands, check_rc=True)
+
+        if 'vsans' in self.subsets:
+            self.vsaninfo = GetVsanInfoFromSwitch(self.module).getVsanInfoObjects()
+        if 'device_alias' in self.subsets:
+            self.daStatus = showDeviceAliasStatus(self.module)
+            self.daDatabase = showDeviceAliasDatabase(self.module)
+        if getShowZoneStatusCmd() in commands:
+            self.zoneStatus = ShowZoneStatus(self.module)
+        if 'zones' in self.subsets:
+            self.zones = self.parsePerVsan(ShowZone, 'show zone', 'zone', 'show zone vsan ')
+        if 'zonesets' in self.subsets:
+            self.zonesets = self.parsePerVsan(ShowZoneset, 'show zoneset', 'zoneset', 'show zoneset vsan ')
+        if 'active_zonesets' in self.subsets:
+            self.activeZonesets = self.parsePerVsan(ShowZonesetActive, 'show zoneset active', 'zoneset',
+                                                    'show zoneset active vsan ')
+
+    def parsePerVsan(self, parser, command, header, vsancommand):
+        # The blocks of each vsan are handed to the parser as the output of the
+        # per vsan command, vsans without any block get an empty output
+        output = run_commands(self.module, [{'command': command, 'output': 'text'}])[0]
+        blocks = splitByVsan(output, header)
+        vsans = self.getZonedVsans()
+        prefetch_outputs(dict([(vsancommand + vsan, blocks.get(vsan, '')) for vsan in vsans]))
+        return dict([(vsan, parser(self.module, vsan)) for vsan in vsans])
+
+
+def getSanFacts(state):
+    """Returns the facts of the subsets read by a FabricState"""
+    facts = {}
+    if state.vsaninfo is not None:
+        vsans = {}
+        for vsanid, vsan in state.vsaninfo.items():
+            # 4079 and 4094 are always added by the parser, only keep them if shown
+            if vsan.vsanname is None or not state.isVsanWanted(vsanid):
+                continue
+            vsans[vsanid] = dict(name=vsan.vsanname, state=vsan.vsanstate, oper_state=vsan.vsanoperstate,
+                                 interfaces=vsan.vsaninterfaces)
+        facts['vsans'] = vsans
+    if state.daDatabase is not None:
+        facts['device_alias'] = dict(distribute=state.daStatus.getDistribute(), mode=state.daStatus.getMode(),
+                                     locked=state.daStatus.isLocked(), aliases=state.daDatabase.da_dict)
+    if state.zones is not None:
+        zones = {}
+        for vsan, shZoneObj in state.zones.items():
+            zones[vsan] = dict(default_zone=state.zoneStatus.getDefaultZone(vsan), mode=state.zoneStatus.getMode(vsan),
+                               smart_zoning=state.zoneStatus.getSmartZoningStatus(vsan),
+                               locked=state.zoneStatus.isLocked(vsan), zones=shZoneObj.zDetails)
+        facts['zones'] = zones
+    if state.zonesets is not None:
+        facts['zonesets'] = dict([(vsan, shZonesetObj.zsDetails) for vsan, shZonesetObj in state.zonesets.items()])
+    if state.activeZonesets is not None:
+        activezonesets = {}
+        for vsan, shZonesetActiveObj in state.activeZonesets.items():
+            if shZonesetActiveObj.activeZSName is not None:
+                activezonesets[vsan] = dict(name=shZonesetActiveObj.activeZSName, zones=shZonesetActiveObj.activeZones)
+        facts['active_zonesets'] = activezonesets
+    return facts
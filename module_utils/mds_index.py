@@ -0,0 +1,125 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+from ansible.module_utils.mds_devicealias import getNormalizedPwwn
+from ansible.module_utils.mds_facts import FabricState
+
+__metaclass__ = type
+
+
+# The subsets of FabricState that the index is built from
+INDEX_SUBSETS = ['device_alias', 'zones', 'zonesets', 'active_zonesets']
+
+
+def getMemberRef(member):
+    # The (type, value) of a pwwn or device-alias zone member, None for the other types
+    fields = member.split()
+    if len(fields) < 2:
+        return None
+    if fields[0] == 'pwwn':
+        return ('pwwn', getNormalizedPwwn(fields[1].lower()))
+    if fields[0] == 'device-alias':
+        return ('device-alias', fields[1])
+    return None
+
+
+class WwnIndex(object):
+    """Reverse index of the device-aliases, zones and zonesets of a FabricState
+
+    It is built in one pass over the parsed objects. Each pwwn maps to its
+    device-aliases. Each pwwn and device-alias name maps to the zones that
+    have it as a member, per vsan, in the full and in the active zoning
+    database. Each zone maps to the zonesets it belongs to. The usage of any
+    number of pwwns is then answered with dict lookups. The subsets that
+    were not read are left out.
+    """
+
+    def __init__(self, state):
+        self.aliases = {}
+        self.zones = {}
+        self.activeZones = {}
+        self.zonesets = {}
+        self.activeZonesets = {}
+        if state.daDatabase is not None:
+            for name, pwwn in state.daDatabase.da_dict.items():
+                self.aliases.setdefault(getNormalizedPwwn(pwwn.lower()), []).append(name)
+        for vsan, shZoneObj in (state.zones or {}).items():
+            self.addMembers(self.zones, vsan, shZoneObj.zDetails)
+        for vsan, shZonesetObj in (state.zonesets or {}).items():
+            for zsname, znames in shZonesetObj.zsDetails.items():
+                for zname in znames:
+                    self.zonesets.setdefault((vsan, zname), []).append(zsname)
+        for vsan, shZonesetActiveObj in (state.activeZonesets or {}).items():
+            if shZonesetActiveObj.activeZSName is not None:
+                self.activeZonesets[vsan] = shZonesetActiveObj.activeZSName
+                self.addMembers(self.activeZones, vsan, shZonesetActiveObj.activeZones)
+
+    def addMembers(self, index, vsan, zones):
+        for zname, members in zones.items():
+            for member in members:
+                ref = getMemberRef(member)
+                if ref is not None:
+                    index.setdefault(ref, set()).add((vsan, zname))
+
+    def getVsanUsage(self, refs):
+        # The zones, their zonesets and the active zones per vsan of the member refs
+        vsans = {}
+        for ref in refs:
+            for vsan, zname in self.zones.get(ref, ()):
+                usage = vsans.setdefault(vsan, dict(zones=set(), zonesets=set(), active_zones=set()))
+                usage['zones'].add(zname)
+                usage['zonesets'].update(self.zonesets.get((vsan, zname), []))
+            for vsan, zname in self.activeZones.get(ref, ()):
+                usage = vsans.setdefault(vsan, dict(zones=set(), zonesets=set(), active_zones=set()))
+                usage['active_zones'].add(zname)
+        result = {}
+        for vsan, usage in vsans.items():
+            result[vsan] = dict([(key, sorted(values)) for key, values in usage.items()])
+            result[vsan]['active_zoneset'] = self.activeZonesets.get(vsan) if usage['active_zones'] else None
+        return result
+
+    def getUsage(self, pwwn):
+        """Returns the device-aliases of pwwn and, per vsan, the zones that have it as a member directly or by alias"""
+        pwwn = getNormalizedPwwn(pwwn.lower())
+        names = sorted(self.aliases.get(pwwn, []))
+        refs = [('pwwn', pwwn)] + [('device-alias', name) for name in names]
+        return dict(aliases=names, vsans=self.getVsanUsage(refs))
+
+    def getAliasUsage(self, name):
+        """Returns, per vsan, the zones that have the device-alias name as a member"""
+        return self.getVsanUsage([('device-alias', name)])
+
+
+def getUsageSummary(usage):
+    # e.g. 'zoneA in vsan 22 (active zoneset zsetname1), zoneC in vsan 23'
+    items = []
+    for vsan in sorted(usage.keys(), key=int):
+        for zname in sorted(set(usage[vsan]['zones']) | set(usage[vsan]['active_zones'])):
+            item = zname + " in vsan " + vsan
+            if zname in usage[vsan]['active_zones']:
+                item = item + " (active zoneset " + usage[vsan]['active_zoneset'] + ")"
+            items.append(item)
+    return ", ".join(items)
+
+
+def getAliasReferenceWarnings(module, checks, rename):
+    """Returns a warning per device-alias removed or renamed by the planned changes that zones still have as a member
+
+    checks are the verify checks of getDeviceAliasCommands(). The zones and
+    active zonesets of all the vsans are only read, in one batch, if a
+    device-alias is removed or renamed.
+    """
+    names = [name for kind, name, expected in checks if kind == 'name' and expected is None]
+    if not names:
+        return []
+    renamed = set([eachdict['old_name'] for eachdict in rename or []])
+    index = WwnIndex(FabricState(module, None, ['zones', 'active_zonesets']))
+    warnings = []
+    for name in names:
+        usage = index.getAliasUsage(name)
+        if usage:
+            action = 'renamed' if name in renamed else 'removed'
+            warnings.append("device-alias " + name + " is " + action + " but is still a member of zones " + getUsageSummary(usage))
+    return warnings
@@ -0,0 +1,193 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import hashlib
+import json
+import os
+import time
+
+try:
+    import sqlite3
+    HAS_SQLITE = True
+except ImportError:
+    # Python builds without the sqlite3 extension can only write JSON Lines
+    HAS_SQLITE = False
+
+
+__metaclass__ = type
+
+
+SNAPSHOT_COLUMNS = ['kind', 'vsan', 'name', 'member']
+
+# Hash key of the rows that are not bound to a vsan
+FABRIC_HASH_KEY = 'device-alias'
+
+snapshot_spec = dict(
+    path=dict(type='path', required=True),
+    format=dict(type='str', default='jsonl', choices=['jsonl', 'sqlite']),
+    switch=dict(type='str', required=True)
+)
+
+
+def getSnapshotRows(state):
+    """Returns the rows of a FabricState, one per interface membership, alias and zone member
+
+    Each row is a [kind, vsan, name, member] list:
+      vsan          vsan, name of the vsan, state of the vsan
+      interface     vsan, None, interface
+      alias_setting None, distribute or mode, its value
+      alias         None, device-alias name, pwwn
+      zone_setting  vsan, default_zone, mode or smart_zoning, its value
+      zone          vsan, zone name, member (None for an empty zone)
+      zoneset       vsan, zoneset name, zone name (None for an empty zoneset)
+      active_zone   vsan, zone name of the active zoneset, member
+      active        vsan, name of the active zoneset, None
+    """
+    rows = []
+    for vsanid in sorted(state.vsaninfo.keys(), key=int):
+        vsan = state.vsaninfo[vsanid]
+        if not state.isVsanWanted(vsanid):
+            continue
+        # 4079 and 4094 are always added by the parser, only keep them if shown
+        if vsan.vsanname is not None:
+            rows.append(['vsan', int(vsanid), vsan.vsanname, vsan.vsanstate])
+        for interface in sorted(vsan.vsaninterfaces):
+            rows.append(['interface', int(vsanid), None, interface])
+
+    rows.append(['alias_setting', None, 'distribute', state.daStatus.getDistribute()])
+    rows.append(['alias_setting', None, 'mode', state.daStatus.getMode()])
+    for name in sorted(state.daDatabase.da_dict.keys()):
+        rows.append(['alias', None, name, state.daDatabase.da_dict[name]])
+
+    for vsanid in sorted(state.zoneStatus.vsanStatus.keys(), key=int):
+        if not state.isVsanWanted(vsanid):
+            continue
+        vsan = int(vsanid)
+        rows.append(['zone_setting', vsan, 'default_zone', state.zoneStatus.getDefaultZone(vsanid)])
+        rows.append(['zone_setting', vsan, 'mode', state.zoneStatus.getMode(vsanid)])
+        rows.append(['zone_setting', vsan, 'smart_zoning', state.zoneStatus.getSmartZoningStatus(vsanid)])
+        if vsanid in state.zones:
+            zDetails = state.zones[vsanid].zDetails
+            for zname in sorted(zDetails.keys()):
+                rows.extend([['zone', vsan, zname, member] for member in sorted(zDetails[zname]) or [None]])
+        if vsanid in state.zonesets:
+            zsDetails = state.zonesets[vsanid].zsDetails
+            for zsname in sorted(zsDetails.keys()):
+                rows.extend([['zoneset', vsan, zsname, zname] for zname in sorted(zsDetails[zsname]) or [None]])
+        active = state.activeZonesets[vsanid]
+        if active.activeZSName is not None:
+            rows.append(['active', vsan, active.activeZSName, None])
+            for zname in sorted(active.activeZones.keys()):
+                rows.extend([['active_zone', vsan, zname, member] for member in sorted(active.activeZones[zname])])
+    return rows
+
+
+def getSnapshotHashes(rows):
+    # One sha1 per vsan over its rows in order, the rows of no vsan are hashed
+    # under FABRIC_HASH_KEY
+    digests = {}
+    for row in rows:
+        key = FABRIC_HASH_KEY if row[1] is None else str(row[1])
+        if key not in digests:
+            digests[key] = hashlib.sha1()
+        digests[key].update((json.dumps(row) + "\n").encode('utf-8'))
+    return dict([(key, digest.hexdigest()) for key, digest in digests.items()])
+
+
+def getChangedVsans(previous, hashes):
+    # The hash keys whose rows were added, removed or changed since the previous snapshot
+    keys = set(previous.keys()) | set(hashes.keys())
+    return sorted([key for key in keys if previous.get(key) != hashes.get(key)])
+
+
+def readLastHashes(module, options):
+    """Returns the hashes of the last snapshot of the switch in the file, or None"""
+    path = options['path']
+    if not os.path.exists(path):
+        return None
+    last = None
+    if options['format'] == 'jsonl':
+        with open(path) as f:
+            for line in f:
+                # Only the header lines of the snapshots are objects
+                if not line.startswith('{'):
+                    continue
+                header = json.loads(line)
+                if header['switch'] == options['switch']:
+                    last = header['hashes']
+        return last
+    conn = sqlite3.connect(path)
+    try:
+        row = conn.execute('SELECT id FROM snapshots WHERE switch = ? ORDER BY taken DESC, rowid DESC LIMIT 1',
+                           (options['switch'],)).fetchone()
+        if row is not None:
+            last = dict(conn.execute('SELECT vsan, digest FROM hashes WHERE snapshot = ?', (row[0],)).fetchall())
+    finally:
+        conn.close()
+    return last
+
+
+def writeSnapshot(module, options, rows, hashes):
+    """Appends a snapshot to the JSON Lines or SQLite file and returns its id
+
+    A JSON Lines snapshot is a header object with the switch, time, columns
+    and hashes, followed by one [id, kind, vsan, name, member] list per row.
+    A SQLite file holds the snapshots, hashes and rows tables.
+    """
+    directory = os.path.dirname(options['path'])
+    if directory and not os.path.isdir(directory):
+        module.fail_json(msg='The directory of the snapshot ' + options['path'] + ' does not exist')
+
+    now = time.time()
+    taken = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)) + '.%06dZ' % int((now % 1) * 1000000)
+    snapshotid = options['switch'] + '@' + taken
+    if options['format'] == 'jsonl':
+        header = dict(snapshot=snapshotid, switch=options['switch'], taken=taken, columns=SNAPSHOT_COLUMNS, hashes=hashes)
+        lines = [json.dumps(header, sort_keys=True)] + [json.dumps([snapshotid] + row) for row in rows]
+        # A single append so that concurrent hosts do not interleave their lines
+        with open(options['path'], 'a') as f:
+            f.write("\n".join(lines) + "\n")
+        return snapshotid
+
+    conn = sqlite3.connect(options['path'], timeout=60)
+    try:
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS snapshots (id TEXT PRIMARY KEY, switch TEXT, taken TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS hashes (snapshot TEXT, vsan TEXT, digest TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS rows (snapshot TEXT, kind TEXT, vsan INTEGER, name TEXT, member TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS hashes_snapshot ON hashes (snapshot)')
+            conn.execute('CREATE INDEX IF NOT EXISTS rows_snapshot_vsan ON rows (snapshot, vsan)')
+            conn.execute('INSERT INTO snapshots VALUES (?, ?, ?)', (snapshotid, options['switch'], taken))
+            conn.executemany('INSERT INTO hashes VALUES (?, ?, ?)',
+                             [(snapshotid, key, digest) for key, digest in sorted(hashes.items())])
+            conn.executemany('INSERT INTO rows VALUES (?, ?, ?, ?, ?)', [[snapshotid] + row for row in rows])
+    finally:
+        conn.close()
+    return snapshotid
+
+
+def exportSnapshot(module, state, options):
+    """Writes the snapshot of a FabricState, returns it and the changed hash keys
+
+    The hashes are compared with the last snapshot of the same switch in the
+    file, the changed keys are None if there is no such snapshot. In check
+    mode the file is left untouched.
+    """
+    if options['format'] == 'sqlite' and not HAS_SQLITE:
+        module.fail_json(msg='The sqlite3 python module is needed for snapshot format sqlite')
+    rows = getSnapshotRows(state)
+    hashes = getSnapshotHashes(rows)
+    previous = readLastHashes(module, options)
+    snapshotid = None
+    if not module.check_mode:
+        snapshotid = writeSnapshot(module, options, rows, hashes)
+    snapshot = dict(id=snapshotid, path=options['path'], rows=len(rows), hashes=hashes)
+    if previous is None:
+        return snapshot, None
+    if state.vsans is not None:
+        # Only the exported vsans can be compared with the previous snapshot
+        previous = dict([(key, digest) for key, digest in previous.items()
+                         if key == FABRIC_HASH_KEY or key in state.vsans])
+    return snapshot, getChangedVsans(previous, hashes)
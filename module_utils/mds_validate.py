@@ -0,0 +1,123 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import re
+
+__metaclass__ = type
+
+
+# 8 bytes of 1 or 2 hex digits, e.g. 21:00:00:24:ff:11:22:33 or 21:0:0:24:ff:11:22:33
+PWWN_PATTERN = re.compile(r"[0-9a-fA-F]{1,2}(?::[0-9a-fA-F]{1,2}){7}\Z")
+
+# Device-alias, zone and zoneset names: up to 64 characters, starting with a
+# letter, made of letters, digits and '-', '_', '$' or '^'
+NAME_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9_$^-]{0,63}\Z")
+
+# An interface type followed by its numbers, e.g. fc1/1, port-channel 10, vfc1/1/1 or fcip5
+INTERFACE_PATTERN = re.compile(r"[A-Za-z][A-Za-z-]*\s*\d+(?:/\d+)*(?:\.\d+)?\Z")
+
+NAME_RULE = 'up to 64 letters, digits, "-", "_", "$" or "^", starting with a letter'
+
+# The number of errors listed in the message, all of them are returned in 'errors'
+MAX_LISTED_ERRORS = 20
+
+
+def isPwwnValid(pwwn):
+    return PWWN_PATTERN.match(pwwn) is not None
+
+
+def isNameValid(name):
+    return NAME_PATTERN.match(name) is not None
+
+
+def isVsanValid(vsan):
+    return 1 <= int(vsan) <= 4094
+
+
+def isInterfaceValid(interface):
+    return INTERFACE_PATTERN.match(interface.strip()) is not None
+
+
+def getVsanErrors(vsan_list):
+    errors = []
+    for eachvsan in vsan_list or []:
+        vsanid = eachvsan['id']
+        if not isVsanValid(vsanid):
+            errors.append("vsan " + str(vsanid) + " is invalid, the supported range is 1-4094")
+        if eachvsan['interface'] is not None:
+            for interface in eachvsan['interface']:
+                if not isInterfaceValid(interface):
+                    errors.append("interface '" + interface + "' of vsan " + str(vsanid) + " is invalid")
+    return errors
+
+
+def getDeviceAliasEntryErrors(eachdict):
+    name = eachdict['name']
+    pwwn = eachdict['pwwn']
+    if eachdict['remove']:
+        return []
+    errors = []
+    if pwwn is None:
+        errors.append("device-alias " + name + " to be added has no pwwn")
+    elif not PWWN_PATTERN.match(pwwn):
+        errors.append("pwwn '" + pwwn + "' of device-alias " + name + " is invalid")
+    if not NAME_PATTERN.match(name):
+        errors.append("device-alias name '" + name + "' is invalid, it must be " + NAME_RULE)
+    return errors
+
+
+def getDeviceAliasErrors(da, rename):
+    errors = []
+    for eachdict in da or []:
+        errors.extend(getDeviceAliasEntryErrors(eachdict))
+    for eachdict in rename or []:
+        for key in ('old_name', 'new_name'):
+            if not NAME_PATTERN.match(eachdict[key]):
+                errors.append("device-alias name '" + eachdict[key] + "' to rename is invalid, it must be " + NAME_RULE)
+    return errors
+
+
+def getZoneErrors(listOfZoneDetails):
+    errors = []
+    for zonedetail in listOfZoneDetails or []:
+        vsan = str(zonedetail['vsan'])
+        if not isVsanValid(vsan):
+            errors.append("vsan " + vsan + " is invalid, the supported range is 1-4094")
+        for eachzone in zonedetail['zone'] or []:
+            zname = eachzone['name']
+            if not NAME_PATTERN.match(zname):
+                errors.append("zone name '" + zname + "' in vsan " + vsan + " is invalid, it must be " + NAME_RULE)
+            for eachmem in eachzone['members'] or []:
+                if 'device-alias' in eachmem:
+                    if not NAME_PATTERN.match(eachmem['device-alias']):
+                        errors.append("device-alias '" + eachmem['device-alias'] + "' of zone " + zname + " in vsan " + vsan + " is invalid")
+                elif not PWWN_PATTERN.match(eachmem['pwwn']):
+                    errors.append("pwwn '" + eachmem['pwwn'] + "' of zone " + zname + " in vsan " + vsan + " is invalid")
+        for eachzoneset in zonedetail['zoneset'] or []:
+            zsname = eachzoneset['name']
+            if not NAME_PATTERN.match(zsname):
+                errors.append("zoneset name '" + zsname + "' in vsan " + vsan + " is invalid, it must be " + NAME_RULE)
+            for eachzsmem in eachzoneset['members'] or []:
+                if not NAME_PATTERN.match(eachzsmem['name']):
+                    errors.append("zone name '" + eachzsmem['name'] + "' of zoneset " + zsname + " in vsan " + vsan + " is invalid")
+    return errors
+
+
+def getVsanIdErrors(vsans):
+    return ["vsan " + str(vsan) + " is invalid, the supported range is 1-4094" for vsan in vsans or [] if not isVsanValid(vsan)]
+
+
+def getPwwnErrors(pwwns):
+    return ["pwwn '" + pwwn + "' is invalid" for pwwn in pwwns or [] if not PWWN_PATTERN.match(pwwn)]
+
+
+def failOnInputErrors(module, errors):
+    """Fails the module with all the errors of the playbook input, before anything is read from the switch"""
+    if not errors:
+        return
+    listed = errors[:MAX_LISTED_ERRORS]
+    if len(errors) > len(listed):
+        listed.append("and " + str(len(errors) - len(listed)) + " more")
+    module.fail_json(msg='Invalid input, nothing was read from or pushed to the switch: ' + '; '.join(listed), errors=errors)
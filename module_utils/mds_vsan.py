@@ -0,0 +1,264 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import re
+from ansible.module_utils.mds import intern_string, prefetch_commands, run_commands, tokenize_output
+
+__metaclass__ = type
+
+
+vsan_element_spec = dict(
+    id=dict(required=True, type='int'),
+    name=dict(type='str'),
+    remove=dict(type='bool'),
+    suspend=dict(type='bool'),
+    interface=dict(type='list', elements='str')
+)
+
+# The vsan, name and state, and operational state lines of 'show vsan', see tokenize_output()
+VSAN_OUTPUT_TOKENS = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<vsan>vsan[ \t]+(?P<vsanid>\d+)[ \t]+information)|"
+    r"(?P<name>name:(?P<vsanname>[^\n]*)state:(?P<vsanstate>[^\n]*))|"
+    r"(?P<oper>operational state:(?P<operstate>[^\n]*)))", re.M)
+
+# The vsan and interface lines of 'show vsan membership'
+VSAN_MEMBERSHIP_TOKENS = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<vsan>vsan[ \t]+(?P<vsanid>\d+)[^\n]*)|"
+    r"(?P<interfaces>\S[^\n]*))", re.M)
+
+
+class Vsan(object):
+    # Slots instead of a per-instance __dict__, a switch has up to 4094 vsans
+    __slots__ = ('vsanid', 'vsanname', 'vsanstate', 'vsanoperstate', 'vsaninterfaces')
+
+    def __init__(self, vsanid):
+        self.vsanid = intern_string(vsanid)
+        self.vsanname = None
+        self.vsanstate = None
+        self.vsanoperstate = None
+        self.vsaninterfaces = []
+
+
+class GetVsanInfoFromSwitch(object):
+    """docstring for GetVsanInfoFromSwitch"""
+
+    def __init__(self, module, vsans=None):
+        self.module = module
+        self.vsans = vsans
+        self.vsaninfo = {}
+        self.processShowVsan()
+        self.processShowVsanMembership()
+
+    def execute_show_vsan_cmd(self):
+        if self.vsans is not None:
+            commands = [getShowVsanCmd(vsanid) for vsanid in self.vsans]
+            return "\n".join(execute_show_commands(commands, self.module, check_rc=False))
+        output = execute_show_command('show vsan', self.module)[0]
+        return output
+
+    def execute_show_vsan_mem_cmd(self):
+        if self.vsans is not None:
+            commands = [getShowVsanMembershipCmd(vsanid) for vsanid in self.vsans]
+            return "\n".join(execute_show_commands(commands, self.module, check_rc=False))
+        output = execute_show_command('show vsan membership', self.module)[0]
+        return output
+
+    def processShowVsan(self):
+        v = None
+        for kind, m in tokenize_output(VSAN_OUTPUT_TOKENS, self.execute_show_vsan_cmd()):
+            if kind == 'vsan':
+                v = intern_string(m.group('vsanid'))
+                self.vsaninfo[v] = Vsan(v)
+            elif v is None:
+                continue
+            elif kind == 'name':
+                self.vsaninfo[v].vsanname = m.group('vsanname').strip()
+                self.vsaninfo[v].vsanstate = intern_string(m.group('vsanstate').strip())
+            elif kind == 'oper':
+                self.vsaninfo[v].vsanoperstate = intern_string(m.group('operstate').strip())
+
+        # 4094/4079 vsan is always present
+        self.vsaninfo['4079'] = Vsan('4079')
+        self.vsaninfo['4094'] = Vsan('4094')
+
+    def processShowVsanMembership(self):
+        memlist = None
+        for kind, m in tokenize_output(VSAN_MEMBERSHIP_TOKENS, self.execute_show_vsan_mem_cmd()):
+            if kind == 'vsan':
+                memlist = []
+                if m.group('vsanid') in self.vsaninfo:
+                    self.vsaninfo[m.group('vsanid')].vsaninterfaces = memlist
+            elif memlist is not None and 'interfaces' not in m.group('interfaces'):
+                memlist.extend(m.group('interfaces').split())
+
+    def getVsanInfoObjects(self):
+        return self.vsaninfo
+
+
+def getShowVsanCmd(vsanid):
+    return 'show vsan ' + str(vsanid)
+
+
+def getShowVsanMembershipCmd(vsanid):
+    return 'show vsan ' + str(vsanid) + ' membership'
+
+
+def verifyVsanChanges(module, checks):
+    """Reads back the vsans changed by the module and returns the drifts
+
+    checks is a list of (kind, vsanid, expected) tuples recorded while
+    planning the commands, with the interface name as expected for the
+    'interface' kind. All the vsans are read back in one batch.
+    """
+    vsans = sorted(set([vsanid for kind, vsanid, expected in checks]), key=int)
+    readback = [getShowVsanCmd(vsanid) for vsanid in vsans]
+    readback = readback + [getShowVsanMembershipCmd(vsanid) for vsanid in vsans]
+    prefetch_commands(module, readback)
+    dictSwVsanObjs = GetVsanInfoFromSwitch(module, vsans).getVsanInfoObjects()
+
+    drift = []
+    for kind, vsanid, expected in checks:
+        swvsan = dictSwVsanObjs.get(vsanid)
+        if kind == 'interface':
+            if swvsan is None or re.sub(' +', '', expected) not in swvsan.vsaninterfaces:
+                drift.append("interface " + expected + " is not in vsan " + vsanid)
+            continue
+        if kind == 'vsan':
+            if (swvsan is not None) != expected:
+                drift.append("vsan " + vsanid + (" is present" if expected is False else " is absent") +
+                             ", expected it to be " + ("present" if expected else "removed"))
+            continue
+        if swvsan is None:
+            actual = None
+        elif kind == 'name':
+            actual = swvsan.vsanname
+        else:
+            actual = swvsan.vsanstate
+        if actual != expected:
+            drift.append("vsan " + vsanid + " " + kind + " is " + str(actual) + ", expected " + str(expected))
+    return drift
+
+
+def execute_show_commands(commands, module, check_rc=True):
+    commands = [{
+        'command': command,
+        'output': 'text',
+    } for command in commands]
+    return run_commands(module, commands, check_rc=check_rc)
+
+
+def execute_show_command(command, module, command_type='cli_show'):
+    output = 'text'
+    commands = [{
+        'command': command,
+        'output': output,
+    }]
+    return run_commands(module, commands)
+
+
+def getVsanCommands(module, vsan_list, dictSwVsanObjs):
+    """Returns the commands, messages and verify checks needed to configure vsan_list
+
+    dictSwVsanObjs holds the Vsan objects read from the switch. The commands
+    are to be sent under 'vsan database'.
+    """
+    messages = []
+    verify_checks = []
+    commands = []
+    for eachvsan in vsan_list:
+        vsanid = str(eachvsan['id'])
+        vsanname = eachvsan['name']
+        vsanremove = eachvsan['remove']
+        vsansuspend = eachvsan['suspend']
+        vsaninterface_list = eachvsan['interface']
+
+        if int(vsanid) < 1 or int(vsanid) >= 4095:
+            module.fail_json(msg=vsanid + " - This is an invalid vsan. Supported vsan range is 1-4094")
+
+        if vsanid in dictSwVsanObjs.keys():
+            sw_vsanid = vsanid
+            sw_vsanname = dictSwVsanObjs[vsanid].vsanname
+            sw_vsanstate = dictSwVsanObjs[vsanid].vsanstate
+            sw_vsaninterfaces = dictSwVsanObjs[vsanid].vsaninterfaces
+        else:
+            sw_vsanid = None
+            sw_vsanname = None
+            sw_vsanstate = None
+            sw_vsaninterfaces = []
+
+        if vsanremove:
+            # Negetive case:
+            if vsanid == '4079' or vsanid == '4094':
+                messages.append(str(vsanid) + " is a reserved vsan, hence cannot be removed")
+                continue
+            if vsanid == sw_vsanid:
+                commands.append("no vsan " + str(vsanid))
+                verify_checks.append(('vsan', vsanid, False))
+                messages.append("deleting the vsan " + str(vsanid))
+            else:
+                messages.append("There is no vsan " + str(vsanid) + " present in the switch. Hence there is nothing to delete")
+            continue
+        else:
+            # Negetive case:
+            if vsanid == '4079' or vsanid == '4094':
+                messages.append(str(vsanid) + " is a reserved vsan, and always present on the switch")
+            else:
+                if vsanid == sw_vsanid:
+                    messages.append("There is already a vsan " + str(vsanid) + " present in the switch. Hence there is nothing to configure")
+                else:
+                    commands.append("vsan " + str(vsanid))
+                    verify_checks.append(('vsan', vsanid, True))
+                    messages.append("creating vsan " + str(vsanid))
+
+        if vsanname is not None:
+            # Negetive case:
+            if vsanid == '4079' or vsanid == '4094':
+                messages.append(str(vsanid) + " is a reserved vsan, and cannot be renamed")
+            else:
+                if vsanname == sw_vsanname:
+                    messages.append(
+                        "There is already a vsan " +
+                        str(vsanid) +
+                        " present in the switch, which has the name " +
+                        vsanname +
+                        " Hence there is nothing to configure")
+                else:
+                    commands.append("vsan " + str(vsanid) + " name " + vsanname)
+                    verify_checks.append(('name', vsanid, vsanname))
+                    messages.append("setting vsan name to " + vsanname + " for vsan " + str(vsanid))
+
+        if vsansuspend:
+            # Negetive case:
+            if vsanid == '4079' or vsanid == '4094':
+                messages.append(str(vsanid) + " is a reserved vsan, and cannot be suspended")
+            else:
+                if sw_vsanstate == 'suspended':
+                    messages.append("There is already a vsan " + str(vsanid) + " present in the switch, which is in suspended state ")
+                else:
+                    commands.append("vsan " + str(vsanid) + " suspend")
+                    verify_checks.append(('state', vsanid, 'suspended'))
+                    messages.append("suspending the vsan " + str(vsanid))
+        else:
+            if sw_vsanstate == 'active':
+                messages.append("There is already a vsan " + str(vsanid) + " present in the switch, which is in active state ")
+            else:
+                commands.append("no vsan " + str(vsanid) + " suspend")
+                verify_checks.append(('state', vsanid, 'active'))
+                messages.append("no suspending the vsan " + str(vsanid))
+
+        if vsaninterface_list is not None:
+            for each_interface_name in vsaninterface_list:
+                # For fcip,port-channel,vfc-port-channel need to remove the extra space to compare
+                temp = re.sub(' +', '', each_interface_name)
+                if temp in sw_vsaninterfaces:
+                    messages.append(each_interface_name + " is already present in the vsan " + str(vsanid) + " interface list")
+                else:
+                    commands.append("vsan " + str(vsanid) + " interface " + each_interface_name)
+                    verify_checks.append(('interface', vsanid, each_interface_name))
+                    messages.append("adding interface " + each_interface_name + " to vsan " + str(vsanid))
+
+    return commands, messages, verify_checks
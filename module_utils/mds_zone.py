@@ -0,0 +1,1158 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import hashlib
+import re
+from collections import OrderedDict
+from ansible.module_utils.mds import intern_string, is_targeted_fetch, is_true, iter_file_rows, prefetch_commands, run_commands
+from ansible.module_utils.mds import tokenize_output, wait_for_lock
+from ansible.module_utils.mds_devicealias import getShowDeviceAliasCmds, showDeviceAliasDatabase
+from ansible.module_utils.mds_validate import isNameValid, isPwwnValid, isVsanValid
+
+__metaclass__ = type
+
+
+zone_member_spec = dict(
+    pwwn=dict(required=True, type='str', aliases=['device-alias']),
+    devtype=dict(type='str', choices=['initiator', 'target', 'both']),
+    remove=dict(type='bool', default=False)
+)
+
+zone_spec = dict(
+    name=dict(required=True, type='str'),
+    members=dict(type='list', elements='dict', options=zone_member_spec),
+    remove=dict(type='bool', default=False)
+)
+
+zoneset_member_spec = dict(
+    name=dict(required=True, type='str'),
+    remove=dict(type='bool', default=False)
+)
+
+zoneset_spec = dict(
+    name=dict(type='str', required=True),
+    members=dict(type='list', elements='dict', options=zoneset_member_spec),
+    remove=dict(type='bool', default=False),
+    action=dict(type='str', choices=['activate', 'deactivate'])
+)
+
+zonedetails_spec = dict(
+    vsan=dict(required=True, type='int'),
+    mode=dict(type='str', choices=['enhanced', 'basic']),
+    default_zone=dict(type='str', choices=['permit', 'deny']),
+    smart_zoning=dict(type='bool'),
+    zone=dict(type='list', elements='dict', options=zone_spec),
+    zoneset=dict(type='list', elements='dict', options=zoneset_spec),
+)
+
+zone_capacity_spec = dict(
+    enabled=dict(type='bool', default=True),
+    max_zones=dict(type='int', default=16000),
+    max_zonesets=dict(type='int', default=1000),
+    max_members_per_zone=dict(type='int'),
+    bytes_per_zone=dict(type='int', default=64),
+    bytes_per_member=dict(type='int', default=32)
+)
+
+mds_zone_capacity_spec = dict(
+    zone_capacity=dict(type='dict', options=zone_capacity_spec)
+)
+
+# The zoneset, zone and member lines of 'show zone', 'show zoneset' and
+# 'show zoneset active', see tokenize_output()
+ZONE_OUTPUT_TOKENS = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<zoneset>zoneset[ \t]+name[ \t]+(?P<zsname>\S+)[ \t]+vsan[ \t]+(?P<zsvsan>\d+))|"
+    r"(?P<zone>zone[ \t]+name[ \t]+(?P<zname>\S+)[ \t]+vsan[ \t]+(?P<zvsan>\d+))|"
+    r"(?P<member>\S(?:[^\n]*\S)?))", re.M)
+
+# The lines of 'show zone status' that the vsan blocks are parsed from, the
+# other lines are consumed whole by the empty 'other' group
+ZONE_STATUS_TOKENS = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<usage>Current Total Zone DB Usage:[ \t]+(?P<dbusage>\d+)[ \t]*/[ \t]*(?P<dbmax>\d+))|"
+    r"(?P<vsan>VSAN:[ \t]+(?P<vsanid>\d+)[ \t]+default-zone:[ \t]+(?P<defzone>\S+))|"
+    r"(?P<fulldb>Full Zoning Database)|"
+    r"(?P<activedb>Active Zoning Database)|"
+    r"(?P<count>Zonesets:[ \t]+(?P<zonesets>\d+)[ \t]+Zones:[ \t]+(?P<zones>\d+))|"
+    r"(?P<mode>mode:[ \t]+(?P<modevalue>\S+))|"
+    r"(?P<session>session:[ \t]+(?P<sessionvalue>\S+))|"
+    r"(?P<sz>smart-zoning:[ \t]+(?P<szvalue>\S+))|"
+    r"(?P<other>))[^\n]*", re.M)
+
+# A logged in member of the active zoneset, '* fcid <fcid> [<member>] [<alias>] [<devtype>]'
+ACTIVE_MEMBER_PATTERN = re.compile(r"\* fcid (\S+)(?: \[([^\]]+)\])?")
+
+# The alias annotations of a member, 'pwwn <pwwn> [<alias>] [<devtype>]'
+MEMBER_ANNOTATION_PATTERN = re.compile(r" \[[^\]]*\]")
+
+# The smart zoning device type that ends a member line
+MEMBER_DEVTYPE_PATTERN = re.compile(r" (init|target|both)$")
+
+# The reply of 'show zone name' or 'show zoneset name' for a missing object
+NOT_PRESENT_PATTERN = re.compile(r"^\s*(?:Zone|Zoneset) not present\s*$")
+
+
+class ShowZonesetActive(object):
+    """docstring for ShowZonesetActive"""
+
+    def __init__(self, module, vsan, brief=False):
+        self.vsan = vsan
+        self.module = module
+        self.brief = brief
+        self.activeZSName = None
+        self.activeZones = {}
+        self.parseCmdOutput()
+
+    def execute_show_zoneset_active_cmd(self):
+        command = getShowZonesetActiveCmd(self.vsan, self.brief)
+        output = execute_show_command(command, self.module)[0]
+        return output
+
+    def parseCmdOutput(self):
+        vsan = str(self.vsan)
+        zonename = None
+        for kind, m in tokenize_output(ZONE_OUTPUT_TOKENS, self.execute_show_zoneset_active_cmd()):
+            if kind == 'zoneset':
+                if m.group('zsvsan') == vsan:
+                    self.activeZSName = m.group('zsname')
+            elif kind == 'zone':
+                zonename = None
+                if m.group('zvsan') == vsan:
+                    zonename = intern_string(m.group('zname'))
+                    self.activeZones[zonename] = []
+            elif zonename is not None:
+                self.activeZones[zonename].append(intern_string(getZoneMemberKey(getNormalizedLine(m.group('member')))))
+        freezeMembers(self.activeZones)
+
+    def isZonesetActive(self, zsname):
+        if zsname == self.activeZSName:
+            return True
+        return False
+
+    def getActiveDigest(self):
+        return getZonesetDigest(self.activeZones)
+
+
+class ShowZoneset(object):
+    """docstring for ShowZoneset"""
+
+    def __init__(self, module, vsan, zsnames=None):
+        self.vsan = vsan
+        self.module = module
+        self.zsnames = zsnames
+        self.zsDetails = {}
+        self.zsMembers = {}
+        self.parseCmdOutput()
+
+    def execute_show_zoneset_cmd(self):
+        if self.zsnames is not None:
+            # Targeted fetch: only the zonesets referenced by the playbook, in one batch
+            commands = [getShowZonesetCmd(self.vsan, zsname) for zsname in self.zsnames]
+            return getPresentOutputs(execute_show_commands(commands, self.module, check_rc=False))
+        command = 'show zoneset vsan ' + str(self.vsan)
+        return execute_show_command(command, self.module)
+
+    def parseCmdOutput(self):
+        vsan = str(self.vsan)
+        for output in self.execute_show_zoneset_cmd():
+            # Each output of a targeted fetch starts a new zoneset
+            zonesetname = None
+            zonename = None
+            for kind, m in tokenize_output(ZONE_OUTPUT_TOKENS, output):
+                if kind == 'zoneset':
+                    zonesetname = None
+                    zonename = None
+                    if m.group('zsvsan') == vsan:
+                        zonesetname = m.group('zsname')
+                        self.zsDetails[zonesetname] = []
+                        self.zsMembers[zonesetname] = {}
+                elif kind == 'zone':
+                    zonename = None
+                    if zonesetname is not None and m.group('zvsan') == vsan:
+                        zonename = intern_string(m.group('zname'))
+                        self.zsDetails[zonesetname].append(zonename)
+                        self.zsMembers[zonesetname][zonename] = []
+                elif zonename is not None:
+                    self.zsMembers[zonesetname][zonename].append(intern_string(getZoneMemberKey(getNormalizedLine(m.group('member')))))
+        freezeMembers(self.zsDetails)
+        for zones in self.zsMembers.values():
+            freezeMembers(zones)
+
+    def isZonesetPresent(self, zsname):
+        return zsname in self.zsDetails.keys()
+
+    def isZonePresentInZoneset(self, zsname, zname):
+        if zsname in self.zsDetails.keys():
+            return zname in self.zsDetails[zsname]
+        return False
+
+    def getZonesetDigest(self, zsname):
+        if zsname in self.zsMembers.keys():
+            return getZonesetDigest(self.zsMembers[zsname])
+        return None
+
+
+class ShowZone(object):
+    """docstring for ShowZone"""
+
+    def __init__(self, module, vsan, znames=None):
+        self.vsan = vsan
+        self.module = module
+        self.znames = znames
+        self.zDetails = {}
+        self.parseCmdOutput()
+
+    def execute_show_zone_vsan_cmd(self):
+        if self.znames is not None:
+            # Targeted fetch: only the zones referenced by the playbook, in one batch
+            commands = [getShowZoneCmd(self.vsan, zname) for zname in self.znames]
+            return getPresentOutputs(execute_show_commands(commands, self.module, check_rc=False))
+        command = 'show zone vsan ' + str(self.vsan)
+        return execute_show_command(command, self.module)
+
+    def parseCmdOutput(self):
+        vsan = str(self.vsan)
+        for output in self.execute_show_zone_vsan_cmd():
+            # Each output of a targeted fetch starts a new zone
+            zonename = None
+            for kind, m in tokenize_output(ZONE_OUTPUT_TOKENS, output):
+                if kind == 'zone':
+                    zonename = None
+                    if m.group('zvsan') == vsan:
+                        zonename = intern_string(m.group('zname'))
+                        self.zDetails[zonename] = []
+                elif kind == 'member' and zonename is not None:
+                    line = getNormalizedLine(m.group('member'))
+                    if 'init' in line:
+                        line = line.replace('init', 'initiator')
+                    # For now we support only pwwn and device-alias under zone
+                    # Ideally should use 'supported_choices'..maybe next time.
+                    if "pwwn" in line or "device-alias" in line:
+                        self.zDetails[zonename].append(intern_string(line))
+        freezeMembers(self.zDetails)
+
+    def isZonePresent(self, zname):
+        return zname in self.zDetails.keys()
+
+    def isZoneMemberPresent(self, zname, cmd):
+        if zname in self.zDetails.keys():
+            zonememlist = self.zDetails[zname]
+            for eachline in zonememlist:
+                if cmd in eachline:
+                    return True
+        return False
+
+
+class ShowZoneStatus(object):
+    """docstring for ShowZoneStatus"""
+
+    def __init__(self, module, vsans=None):
+        self.module = module
+        self.vsanStatus = {}
+        self.dbUsage = None
+        self.dbMax = None
+        # Whether the status of all the vsans was read, not only of some of them
+        self.allVsans = False
+        self.update(vsans)
+
+    def execute_show_zone_status_cmd(self, vsans=None):
+        if vsans is not None:
+            commands = [getShowZoneStatusCmd(vsan) for vsan in vsans]
+            return "\n".join(execute_show_commands(commands, self.module))
+        output = execute_show_command(getShowZoneStatusCmd(), self.module)[0]
+        return output
+
+    def update(self, vsans=None):
+        # 'show zone status' prints one block per vsan, each starting with
+        # 'VSAN: <id> default-zone: ...', so all vsans are parsed from a single
+        # fetch. With vsans set only the blocks of those vsans are refreshed.
+        output = self.execute_show_zone_status_cmd(vsans)
+        if vsans is None:
+            self.allVsans = True
+        for vsan in vsans or []:
+            self.vsanStatus.pop(str(vsan), None)
+        status = None
+        fulldb = False
+        for kind, m in tokenize_output(ZONE_STATUS_TOKENS, output):
+            if kind == 'other':
+                if "is not configured" in m.group(0):
+                    status = None
+            elif kind == 'usage':
+                # The zone database usage is switch wide, repeated in every vsan block
+                self.dbUsage = int(m.group('dbusage'))
+                self.dbMax = int(m.group('dbmax'))
+            elif kind == 'vsan':
+                status = dict(default_zone=m.group('defzone'), mode="", session="", sz="", locked=False,
+                              zonesets=None, zones=None)
+                self.vsanStatus[intern_string(m.group('vsanid'))] = status
+                fulldb = False
+            elif status is None:
+                continue
+            elif kind in ('fulldb', 'activedb'):
+                fulldb = kind == 'fulldb'
+            elif kind == 'count':
+                if fulldb:
+                    status['zonesets'] = int(m.group('zonesets'))
+                    status['zones'] = int(m.group('zones'))
+            elif kind == 'mode':
+                status['mode'] = m.group('modevalue')
+            elif kind == 'session':
+                status['session'] = m.group('sessionvalue')
+                if status['session'] != "none":
+                    status['locked'] = True
+            elif kind == 'sz':
+                status['sz'] = m.group('szvalue')
+
+    def getStatus(self, vsan, key):
+        if str(vsan) in self.vsanStatus:
+            return self.vsanStatus[str(vsan)][key]
+        return ""
+
+    def isLocked(self, vsan):
+        return self.getStatus(vsan, 'locked') is True
+
+    def getDefaultZone(self, vsan):
+        return self.getStatus(vsan, 'default_zone')
+
+    def getMode(self, vsan):
+        return self.getStatus(vsan, 'mode')
+
+    def getSmartZoningStatus(self, vsan):
+        return self.getStatus(vsan, 'sz')
+
+    def isVsanAbsent(self, vsan):
+        return str(vsan) not in self.vsanStatus
+
+    def getZoneCount(self, vsan):
+        return self.getStatus(vsan, 'zones')
+
+    def getZonesetCount(self, vsan):
+        return self.getStatus(vsan, 'zonesets')
+
+
+def getShowZoneStatusCmd(vsan=None):
+    if vsan is None:
+        return 'show zone status'
+    return 'show zone status vsan ' + str(vsan)
+
+
+def getShowZoneCmd(vsan, zname):
+    return 'show zone name ' + zname + ' vsan ' + str(vsan)
+
+
+def getShowZonesetCmd(vsan, zsname):
+    return 'show zoneset name ' + zsname + ' vsan ' + str(vsan)
+
+
+def getShowZonesetActiveCmd(vsan, brief=False):
+    if brief:
+        return 'show zoneset active vsan ' + str(vsan) + ' | grep zoneset'
+    return 'show zoneset active vsan ' + str(vsan)
+
+
+def verifyZoneChanges(module, checks, threshold):
+    """Reads back the zone objects changed by the module and returns the drifts
+
+    checks is a list of (vsan, kind, name, member, expected) tuples recorded
+    while planning the commands. All the objects are read back in one batch,
+    the zones or zonesets of a vsan with a single 'show zone vsan' or 'show
+    zoneset vsan' once more than threshold of them changed.
+    """
+    vsans = sorted(set([check[0] for check in checks]))
+    statusvsans = sorted(set([check[0] for check in checks if check[1] in ('default_zone', 'mode', 'smart_zoning')]))
+    activevsans = set([check[0] for check in checks if check[1] == 'active'])
+    zones = dict((vsan, set()) for vsan in vsans)
+    zonesets = dict((vsan, set()) for vsan in vsans)
+    for vsan, kind, name, member, expected in checks:
+        if kind in ('zone', 'zone_member'):
+            zones[vsan].add(name)
+        elif kind in ('zoneset', 'zoneset_member'):
+            zonesets[vsan].add(name)
+    # None reads the whole vsan
+    for names in (zones, zonesets):
+        for vsan in vsans:
+            names[vsan] = sorted(names[vsan]) if len(names[vsan]) <= threshold else None
+
+    readback = [getShowZoneStatusCmd(vsan) for vsan in statusvsans]
+    for vsan in vsans:
+        if vsan in activevsans:
+            readback.append(getShowZonesetActiveCmd(vsan, brief=True))
+        if zones[vsan] is None:
+            readback.append('show zone vsan ' + str(vsan))
+        else:
+            readback = readback + [getShowZoneCmd(vsan, zname) for zname in zones[vsan]]
+        if zonesets[vsan] is None:
+            readback.append('show zoneset vsan ' + str(vsan))
+        else:
+            readback = readback + [getShowZonesetCmd(vsan, zsname) for zsname in zonesets[vsan]]
+    prefetch_commands(module, readback)
+
+    drift = []
+    if statusvsans:
+        shZoneStatusObj = ShowZoneStatus(module, statusvsans)
+    for vsan in vsans:
+        if zones[vsan] != []:
+            shZoneObj = ShowZone(module, vsan, zones[vsan])
+        if zonesets[vsan] != []:
+            shZonesetObj = ShowZoneset(module, vsan, zonesets[vsan])
+        if vsan in activevsans:
+            shZonesetActiveObj = ShowZonesetActive(module, vsan, brief=True)
+        for checkvsan, kind, name, member, expected in checks:
+            if checkvsan != vsan:
+                continue
+            if kind == 'default_zone':
+                actual = shZoneStatusObj.getDefaultZone(vsan)
+            elif kind == 'mode':
+                actual = shZoneStatusObj.getMode(vsan)
+            elif kind == 'smart_zoning':
+                actual = shZoneStatusObj.getSmartZoningStatus(vsan).lower() == "enabled"
+            elif kind == 'zone':
+                actual = shZoneObj.isZonePresent(name)
+            elif kind == 'zone_member':
+                actual = shZoneObj.isZoneMemberPresent(name, member)
+            elif kind == 'zoneset':
+                actual = shZonesetObj.isZonesetPresent(name)
+            elif kind == 'zoneset_member':
+                actual = shZonesetObj.isZonePresentInZoneset(name, member)
+            else:
+                actual = shZonesetActiveObj.isZonesetActive(name)
+            if actual != expected:
+                item = ' '.join([str(x) for x in (kind, name, member) if x is not None])
+                drift.append(item + " in vsan " + str(vsan) + " is " + str(actual) + ", expected " + str(expected))
+    return drift
+
+
+def execute_show_command(command, module, command_type='cli_show'):
+    output = 'text'
+    commands = [{
+        'command': command,
+        'output': output,
+    }]
+    return run_commands(module, commands)
+
+
+def getMemberCount(parsed, vsan, kind, name):
+    # Number of members of a zone or zoneset read by getZoneCommands(), None if it is not present
+    obj = parsed.get((vsan, kind))
+    if obj is None:
+        return None
+    details = obj.zDetails if kind == 'zone' else obj.zsDetails
+    if name not in details:
+        return None
+    return len(details[name])
+
+
+def getZoneCapacity(shZoneStatusObj, checks, parsed, options):
+    """Estimates the zone counts and database usage once the planned changes are committed
+
+    checks are the verify checks of getZoneCommands() and parsed the parser
+    objects it stored. The counts of the vsans come from shZoneStatusObj,
+    which must hold the status of all the vsans, see checkZoneCapacity(). The database usage grows by
+    bytes_per_zone plus the name for each zone or zoneset, and by
+    bytes_per_member for each member; the changes of a vsan whose zoneset is
+    activated count twice, for the full and the active database.
+    Returns the estimate and the limits it exceeds.
+    """
+    bytes_per_zone = options.get('bytes_per_zone') or 64
+    bytes_per_member = options.get('bytes_per_member') or 32
+    zones = {}
+    zonesets = {}
+    for vsan in shZoneStatusObj.vsanStatus:
+        zones[vsan] = shZoneStatusObj.getZoneCount(vsan) or 0
+        zonesets[vsan] = shZoneStatusObj.getZonesetCount(vsan) or 0
+    members = {}
+    removed = set()
+    dbdelta = {}
+    activated = set()
+    for vsan, kind, name, member, expected in checks:
+        vsan = str(vsan)
+        key = (vsan, kind.split('_')[0], name)
+        if kind in ('zone', 'zoneset', 'zone_member', 'zoneset_member') and key not in members and key not in removed:
+            size = getMemberCount(parsed, vsan, key[1], name)
+            if size is not None:
+                members[key] = size
+        if kind in ('zone_member', 'zoneset_member'):
+            if key not in members:
+                # Members added to a zone or zoneset that is not present create it
+                counts = zones if key[1] == 'zone' else zonesets
+                counts[vsan] = counts.get(vsan, 0) + 1
+                members[key] = 0
+                dbdelta[vsan] = dbdelta.get(vsan, 0) + bytes_per_zone + len(name)
+            members[key] = members[key] + (1 if expected else -1)
+            dbdelta[vsan] = dbdelta.get(vsan, 0) + (bytes_per_member if expected else -bytes_per_member)
+        elif kind in ('zone', 'zoneset'):
+            counts = zones if kind == 'zone' else zonesets
+            if expected:
+                counts[vsan] = counts.get(vsan, 0) + 1
+                members[key] = 0
+                dbdelta[vsan] = dbdelta.get(vsan, 0) + bytes_per_zone + len(name)
+            else:
+                counts[vsan] = counts.get(vsan, 0) - 1
+                removed.add(key)
+                size = members.pop(key, 0)
+                dbdelta[vsan] = dbdelta.get(vsan, 0) - bytes_per_zone - len(name) - size * bytes_per_member
+        elif kind == 'active' and expected:
+            activated.add(vsan)
+
+    estimate = dict(zones=sum(zones.values()), zonesets=sum(zonesets.values()))
+    exceeded = []
+    if options.get('max_zones') and estimate['zones'] > options['max_zones']:
+        exceeded.append("the switch would have " + str(estimate['zones']) + " zones, more than the limit of " + str(options['max_zones']))
+    if options.get('max_zonesets') and estimate['zonesets'] > options['max_zonesets']:
+        exceeded.append("the switch would have " + str(estimate['zonesets']) + " zonesets, more than the limit of " +
+                        str(options['max_zonesets']))
+    if options.get('max_members_per_zone'):
+        for (vsan, kind, name), size in sorted(members.items()):
+            if kind == 'zone' and size > options['max_members_per_zone']:
+                exceeded.append("zone " + name + " in vsan " + vsan + " would have " + str(size) + " members, more than the limit of " +
+                                str(options['max_members_per_zone']))
+    if shZoneStatusObj.dbUsage is not None:
+        delta = sum([size * (2 if vsan in activated else 1) for vsan, size in dbdelta.items()])
+        estimate['db_usage'] = shZoneStatusObj.dbUsage + delta
+        estimate['db_max'] = shZoneStatusObj.dbMax
+        if estimate['db_usage'] > shZoneStatusObj.dbMax:
+            exceeded.append("the zone database would use about " + str(estimate['db_usage']) + " of its " +
+                            str(shZoneStatusObj.dbMax) + " bytes")
+    return estimate, exceeded
+
+
+def checkZoneCapacity(module, shZoneStatusObj, checks, parsed):
+    """Fails the module before anything is pushed if the planned changes exceed a zone limit
+
+    Returns the estimate of getZoneCapacity(), or None if the check is disabled.
+    """
+    options = module.params.get('zone_capacity') or {}
+    if options.get('enabled') is False:
+        return None
+    options = dict(options)
+    options.setdefault('max_zones', 16000)
+    options.setdefault('max_zonesets', 1000)
+    if not shZoneStatusObj.allVsans:
+        # Only the vsans probed for a plan were read, the limits are switch wide
+        shZoneStatusObj.update()
+    estimate, exceeded = getZoneCapacity(shZoneStatusObj, checks, parsed, options)
+    if exceeded:
+        module.fail_json(msg='The zone changes exceed the limits of the switch, hence nothing was pushed: ' + '; '.join(exceeded),
+                         zone_capacity=estimate)
+    return estimate
+
+
+def isPlannedPresent(present, parsed, vsan, kind, name):
+    # Whether a zone or zoneset is present once the planned changes are committed
+    if (vsan, kind, name) in present:
+        return present[(vsan, kind, name)]
+    return getMemberCount(parsed, vsan, kind, name) is not None
+
+
+def getZonesetMembers(parsed, vsan, zsname):
+    obj = parsed.get((vsan, 'zoneset'))
+    if obj is None:
+        return []
+    return obj.zsDetails.get(zsname, [])
+
+
+def validateZoneReferences(parsed, checks, isAliasPresent):
+    """Returns the references of the planned changes to objects that would not be present once they are committed
+
+    checks are the verify checks of getZoneCommands() and parsed the parser
+    objects it stored, updated with the zones and zonesets that the checks
+    create or remove. isAliasPresent tells whether a device-alias name is in
+    the device-alias database once the changes are committed. The zones added
+    to zonesets, the device-aliases added to zones and the activated zonesets
+    are checked, all the errors are returned at once.
+    """
+    present = {}
+    zsmembers = {}
+    for vsan, kind, name, member, expected in checks:
+        vsan = str(vsan)
+        if kind in ('zone', 'zoneset'):
+            present[(vsan, kind, name)] = expected
+            if kind == 'zoneset':
+                zsmembers[(vsan, name)] = set()
+        elif kind in ('zone_member', 'zoneset_member') and expected:
+            # Members added to a zone or zoneset that is not present create it
+            present[(vsan, kind.split('_')[0], name)] = True
+        if kind == 'zoneset_member':
+            members = zsmembers.setdefault((vsan, name), set(getZonesetMembers(parsed, vsan, name)))
+            if expected:
+                members.add(member)
+            else:
+                members.discard(member)
+
+    errors = []
+    for vsan, kind, name, member, expected in checks:
+        vsan = str(vsan)
+        if not expected:
+            continue
+        if kind == 'zoneset_member':
+            if not isPlannedPresent(present, parsed, vsan, 'zone', member):
+                errors.append("zone " + member + " added to zoneset " + name + " in vsan " + vsan + " is not present")
+        elif kind == 'zone_member' and member.startswith('device-alias '):
+            aname = member.split()[1]
+            if not isAliasPresent(aname):
+                errors.append("device-alias " + aname + " added to zone " + name + " in vsan " + vsan +
+                              " is not in the device-alias database")
+        elif kind == 'active':
+            if not isPlannedPresent(present, parsed, vsan, 'zoneset', name):
+                errors.append("zoneset " + name + " activated in vsan " + vsan + " is not present")
+            elif not zsmembers.get((vsan, name), getZonesetMembers(parsed, vsan, name)):
+                errors.append("zoneset " + name + " activated in vsan " + vsan + " has no zones")
+    return errors
+
+
+def checkZoneReferences(module, parsed, checks, isAliasPresent):
+    """Fails the module before anything is pushed if the planned changes reference objects that are not present"""
+    errors = validateZoneReferences(parsed, checks, isAliasPresent)
+    if errors:
+        module.fail_json(msg='The zone changes reference objects that are not present, hence nothing was pushed: ' + '; '.join(errors))
+
+
+def execute_show_commands(commands, module, check_rc=True):
+    commands = [{
+        'command': command,
+        'output': 'text',
+    } for command in commands]
+    return run_commands(module, commands, check_rc=check_rc)
+
+
+def getVsanReadCmds(zonedetail, shZoneStatusObj, threshold):
+    # The show commands that the zone and zoneset steps of main() run for the vsan
+    vsan = zonedetail['vsan']
+    commands = []
+    znames = getReferencedZoneNames(zonedetail)
+    if znames:
+        if is_targeted_fetch(len(znames), shZoneStatusObj.getZoneCount(vsan), threshold):
+            commands = commands + [getShowZoneCmd(vsan, zname) for zname in znames]
+        else:
+            commands.append('show zone vsan ' + str(vsan))
+    if zonedetail['zoneset'] is not None:
+        zsnames = sorted(set([eachzoneset['name'] for eachzoneset in zonedetail['zoneset']]))
+        if is_targeted_fetch(len(zsnames), shZoneStatusObj.getZonesetCount(vsan), threshold):
+            commands = commands + [getShowZonesetCmd(vsan, zsname) for zsname in zsnames]
+        else:
+            commands.append('show zoneset vsan ' + str(vsan))
+        if any([eachzoneset['action'] is not None for eachzoneset in zonedetail['zoneset']]):
+            commands.append(getShowZonesetActiveCmd(vsan))
+    return commands
+
+
+def getZonesFileRowErrors(row):
+    # The errors of a line of a zones_file, which has the vsan, zone and optional
+    # pwwn or device_alias, devtype, remove and zoneset columns
+    errors = []
+    if not re.match(r"\d+\Z", row['vsan']) or not isVsanValid(row['vsan']):
+        errors.append("vsan " + row['vsan'] + " is invalid, the supported range is 1-4094")
+    if not isNameValid(row['zone']):
+        errors.append("zone name '" + row['zone'] + "' is invalid")
+    if row['pwwn'] and row['device_alias']:
+        errors.append("zone " + row['zone'] + " has both a pwwn and a device_alias member")
+    elif row['pwwn'] and not isPwwnValid(row['pwwn']):
+        errors.append("pwwn '" + row['pwwn'] + "' of zone " + row['zone'] + " is invalid")
+    elif row['device_alias'] and not isNameValid(row['device_alias']):
+        errors.append("device-alias '" + row['device_alias'] + "' of zone " + row['zone'] + " is invalid")
+    if row['devtype'] and row['devtype'] not in ('initiator', 'target', 'both'):
+        errors.append("devtype '" + row['devtype'] + "' of zone " + row['zone'] + " must be one of initiator, target, both")
+    if row['zoneset'] and not isNameValid(row['zoneset']):
+        errors.append("zoneset name '" + row['zoneset'] + "' is invalid")
+    return errors
+
+
+def readZonesFile(module, options):
+    """Returns the zone_zoneset_details of a zones_file and the errors of its lines
+
+    The file is read one line at a time, each line adds a member to a zone,
+    or creates the zone if it has no member, and adds the zone to a zoneset
+    if the zoneset column is set. With the remove column set, the member, or
+    the zone if the line has no member, is removed instead. The lines are
+    grouped per vsan and zone into dicts of the same shape as the
+    zone_zoneset_details option, without going through its argument spec.
+    The distinct members of all the lines are held until the file is read,
+    so the memory used grows with the file.
+    """
+    columns = ['pwwn', 'device_alias', 'devtype', 'remove', 'zoneset']
+    vsans = OrderedDict()
+    errors = []
+    for lineno, row, error in iter_file_rows(module, 'zones_file', options, ['vsan', 'zone']):
+        if row is None:
+            errors.append(error)
+            continue
+        row = dict([(column, ('%s' % row[column]).strip()) for column in ['vsan', 'zone']] +
+                   [(column, ('%s' % row[column]).strip() if row.get(column) not in (None, '') else None) for column in columns])
+        rowerrors = getZonesFileRowErrors(row)
+        if rowerrors:
+            errors.extend(["line " + str(lineno) + ": " + rowerror for rowerror in rowerrors])
+            continue
+        vsan = int(row['vsan'])
+        remove = is_true(row['remove'] or False)
+        if vsan not in vsans:
+            vsans[vsan] = dict(vsan=vsan, mode=None, default_zone=None, smart_zoning=None, zone=OrderedDict(), zoneset=OrderedDict())
+        zone = vsans[vsan]['zone'].setdefault(row['zone'], dict(name=row['zone'], members=None, remove=False))
+        member = row['pwwn'] or row['device_alias']
+        if member is None:
+            zone['remove'] = remove
+        else:
+            # The same member is only added once, the members are keyed until the file is read
+            if zone['members'] is None:
+                zone['members'] = OrderedDict()
+            key = (member, row['devtype'], remove)
+            if key not in zone['members']:
+                eachmem = dict(pwwn=member, devtype=row['devtype'], remove=remove)
+                if row['device_alias']:
+                    eachmem['device-alias'] = member
+                zone['members'][key] = eachmem
+        if row['zoneset'] and not (remove and member is None):
+            zoneset = vsans[vsan]['zoneset'].setdefault(row['zoneset'], dict(name=row['zoneset'], members=OrderedDict(), remove=False, action=None))
+            zoneset['members'].setdefault(row['zone'], dict(name=row['zone'], remove=False))
+    details = []
+    for zonedetail in vsans.values():
+        for zone in zonedetail['zone'].values():
+            if zone['members'] is not None:
+                zone['members'] = list(zone['members'].values())
+        for zoneset in zonedetail['zoneset'].values():
+            zoneset['members'] = list(zoneset['members'].values())
+        zonedetail['zone'] = list(zonedetail['zone'].values())
+        zonedetail['zoneset'] = list(zonedetail['zoneset'].values()) or None
+        details.append(zonedetail)
+    return details, errors
+
+
+def mergeZoneDetails(listOfZoneDetails, fileDetails):
+    # The zones and zonesets of a zones_file come before the ones of the same
+    # vsan in zone_zoneset_details, so that its zoneset actions see them
+    merged = list(listOfZoneDetails or [])
+    byvsan = dict([(zonedetail['vsan'], zonedetail) for zonedetail in merged])
+    for filedetail in fileDetails:
+        zonedetail = byvsan.get(filedetail['vsan'])
+        if zonedetail is None:
+            merged.append(filedetail)
+            continue
+        zonedetail['zone'] = filedetail['zone'] + (zonedetail['zone'] or [])
+        if filedetail['zoneset'] is not None:
+            zonedetail['zoneset'] = filedetail['zoneset'] + (zonedetail['zoneset'] or [])
+    return merged
+
+
+def getReferencedZoneNames(zonedetail):
+    # The zones configured in the vsan and the zones added to its zonesets
+    znames = set([eachzone['name'] for eachzone in zonedetail['zone'] or []])
+    for eachzoneset in zonedetail['zoneset'] or []:
+        if not eachzoneset['remove']:
+            znames.update([eachzsmem['name'] for eachzsmem in eachzoneset['members'] or [] if not eachzsmem['remove']])
+    return sorted(znames)
+
+
+def getReferencedAliasNames(listOfZoneDetails):
+    # The device-aliases added as members of the zones of all the vsans
+    anames = set()
+    for zonedetail in listOfZoneDetails:
+        for eachzone in zonedetail['zone'] or []:
+            if eachzone['remove']:
+                continue
+            for eachmem in eachzone['members'] or []:
+                if not eachmem['remove'] and getMemType(['device-alias'], eachmem.keys()) == 'device-alias':
+                    anames.add(eachmem['device-alias'])
+    return sorted(anames)
+
+
+def getAliasReadCmds(anames, threshold=None):
+    # The referenced names are read one by one, unless they are more than
+    # threshold and a single dump of the database is cheaper
+    if not anames:
+        return []
+    if threshold is not None and len(anames) > threshold:
+        return getShowDeviceAliasCmds()
+    return getShowDeviceAliasCmds(anames)
+
+
+def getAliasDatabase(module, anames, threshold=None):
+    # Reads the device-aliases of getAliasReadCmds(), None if there are none
+    if not anames:
+        return None
+    if threshold is not None and len(anames) > threshold:
+        return showDeviceAliasDatabase(module)
+    return showDeviceAliasDatabase(module, anames, [])
+
+
+def getPresentOutputs(outputs):
+    # The outputs of a targeted fetch without the replies for missing zones or zonesets
+    return [output for output in outputs if not NOT_PRESENT_PATTERN.match(output)]
+
+
+def splitByVsan(output, header):
+    """Splits the output of 'show zone', 'show zoneset' or 'show zoneset active' per vsan
+
+    header is 'zone' or 'zoneset', the keyword of the top level blocks, each
+    starting with '<header> name <name> vsan <vsan>'. Returns the text of
+    the blocks of each vsan, as 'show zone vsan <vsan>' etc. would print it.
+    The blocks are sliced out of the output, which is not split into lines.
+    """
+    pattern = re.compile(r"^[ \t]*" + header + r" name \S+ vsan (\d+)", re.M)
+    segments = {}
+    vsan = None
+    start = None
+    for m in pattern.finditer(output):
+        if m.group(1) == vsan:
+            continue
+        if vsan is not None:
+            segments[vsan].append(output[start:m.start() - 1])
+        vsan = m.group(1)
+        start = m.start()
+        segments.setdefault(vsan, [])
+    if vsan is not None:
+        segments[vsan].append(output[start:])
+    return dict([(vsan, "\n".join(texts)) for vsan, texts in segments.items()])
+
+
+def getZoneMemberKey(line):
+    # Active zoneset members that are logged in are shown as
+    # '* fcid 0x010000 [pwwn 11:11:11:11:11:11:11:11] [alias] init', strip the
+    # fcid and the alias annotation so that they compare equal to the
+    # 'pwwn 11:11:11:11:11:11:11:11 init' member of the configured zoneset.
+    # The smart zoning device type is kept on both sides.
+    if '[' not in line and not line.startswith('*'):
+        return line
+    m = ACTIVE_MEMBER_PATTERN.match(line)
+    if not m:
+        return MEMBER_ANNOTATION_PATTERN.sub("", line)
+    key = "fcid " + m.group(1) if m.group(2) is None else m.group(2)
+    devtype = MEMBER_DEVTYPE_PATTERN.search(line)
+    if devtype:
+        key = key + devtype.group(0)
+    return key
+
+
+def getNormalizedLine(line):
+    # Single spaces between the fields, as in the commands the members are compared with
+    if '  ' in line or '\t' in line:
+        return ' '.join(line.split())
+    return line
+
+
+def freezeMembers(details):
+    # Once parsed, the members of each zone or zoneset are kept in a tuple,
+    # which unlike a list is not over-allocated
+    for name, members in details.items():
+        details[name] = tuple(members)
+
+
+def getZonesetDigest(zones):
+    digest = hashlib.sha1()
+    for zname in sorted(zones.keys()):
+        digest.update(("zone " + zname + "\n").encode('utf-8'))
+        for member in sorted(zones[zname]):
+            digest.update((member + "\n").encode('utf-8'))
+    return digest.hexdigest()
+
+
+def getMemType(supported_choices, allmemkeys, default='pwwn'):
+    for eachchoice in supported_choices:
+        if eachchoice in allmemkeys:
+            return eachchoice
+    return default
+
+
+def getZoneCommands(module, listOfZoneDetails, shZoneStatusObj, zone_fetch_threshold, parsed=None):
+    """Returns the commands, messages, verify checks, fetch strategy and lock waits for listOfZoneDetails
+
+    shZoneStatusObj holds the zone status of the vsans. The zones and zonesets
+    of each vsan are read with the parser classes, from the prefetched outputs
+    if they were fetched ahead. If parsed is a dict, the ShowZone and
+    ShowZoneset objects are stored in it, keyed by (vsan, 'zone') and
+    (vsan, 'zoneset'), for the capacity and reference checks.
+    """
+    supported_choices = ['device-alias']
+    commands_executed = []
+    messages = []
+    verify_checks = []
+    fetch_strategy = {}
+    lock_wait = {}
+    for eachZoneZonesetDetail in listOfZoneDetails:
+        vsan = eachZoneZonesetDetail['vsan']
+        op_mode = eachZoneZonesetDetail['mode']
+        op_default_zone = eachZoneZonesetDetail['default_zone']
+        op_smart_zoning = eachZoneZonesetDetail['smart_zoning']
+        op_zone = eachZoneZonesetDetail['zone']
+        op_zoneset = eachZoneZonesetDetail['zoneset']
+        vsan_commands_start = len(commands_executed)
+
+        # Step1: get the zone status of the vsan
+        if shZoneStatusObj.isVsanAbsent(vsan):
+            module.fail_json(msg='Vsan ' + str(vsan) + ' is not present in the switch. Hence cannot procced.')
+
+        if shZoneStatusObj.isLocked(vsan):
+            waited, locked = wait_for_lock(module,
+                                           lambda: shZoneStatusObj.isLocked(vsan),
+                                           lambda: shZoneStatusObj.update([vsan]))
+            lock_wait[str(vsan)] = waited
+            if locked:
+                module.fail_json(msg='zone has acquired lock on the switch for vsan ' + str(vsan) + '. Hence cannot procced.',
+                                 lock_wait=lock_wait)
+
+        sw_default_zone = shZoneStatusObj.getDefaultZone(vsan)
+        sw_mode = shZoneStatusObj.getMode(vsan)
+        sw_smart_zoning = shZoneStatusObj.getSmartZoningStatus(vsan)
+
+        if sw_smart_zoning.lower() == "Enabled".lower():
+            sw_smart_zoning_bool = True
+        else:
+            sw_smart_zoning_bool = False
+
+        # Process zone default zone options
+        if op_default_zone is not None:
+            if op_default_zone != sw_default_zone:
+                verify_checks.append((vsan, 'default_zone', None, None, op_default_zone))
+                if op_default_zone == "permit":
+                    commands_executed.append("zone default-zone permit vsan " + str(vsan))
+                    messages.append("default zone configuration changed from deny to permit for vsan " + str(vsan))
+                else:
+                    commands_executed.append("no zone default-zone permit vsan " + str(vsan))
+                    messages.append("default zone configuration changed from permit to deny for vsan " + str(vsan))
+            else:
+                messages.append("default zone is already " + op_default_zone + " ,no change in default zone configuration for vsan " + str(vsan))
+
+        # Process zone mode options
+        if op_mode is not None:
+            if op_mode != sw_mode:
+                verify_checks.append((vsan, 'mode', None, None, op_mode))
+                if op_mode == "enhanced":
+                    commands_executed.append("zone mode enhanced vsan " + str(vsan))
+                    messages.append("zone mode configuration changed from basic to enhanced for vsan " + str(vsan))
+                else:
+                    commands_executed.append("no zone mode enhanced vsan " + str(vsan))
+                    messages.append("zone mode configuration changed from enhanced to basic for vsan " + str(vsan))
+            else:
+                messages.append("zone mode is already " + op_mode + " ,no change in zone mode configuration for vsan " + str(vsan))
+
+        # Process zone smart-zone options
+        if op_smart_zoning is not None:
+            if op_smart_zoning != sw_smart_zoning_bool:
+                verify_checks.append((vsan, 'smart_zoning', None, None, op_smart_zoning))
+                if op_smart_zoning:
+                    commands_executed.append("zone smart-zoning enable vsan " + str(vsan))
+                    messages.append("smart-zoning enabled for vsan " + str(vsan))
+                else:
+                    commands_executed.append("no zone smart-zoning enable vsan " + str(vsan))
+                    messages.append("smart-zoning disabled for vsan " + str(vsan))
+            else:
+                messages.append("smart-zoning is already set to " + sw_smart_zoning + " , no change in smart-zoning configuration for vsan " + str(vsan))
+
+        # Process zone member options
+        # TODO: Obviously this needs to be cleaned up properly, as there are a lot of ifelse statements which is bad
+        # Will take it up later becoz of time constraints
+        # The zones added to zonesets are read as well, to check that they exist
+        znames = getReferencedZoneNames(eachZoneZonesetDetail)
+        if znames:
+            if is_targeted_fetch(len(znames), shZoneStatusObj.getZoneCount(vsan), zone_fetch_threshold):
+                fetch_strategy[str(vsan)] = 'targeted'
+                shZoneObj = ShowZone(module, vsan, znames)
+            else:
+                fetch_strategy[str(vsan)] = 'full'
+                shZoneObj = ShowZone(module, vsan)
+            if parsed is not None:
+                parsed[(str(vsan), 'zone')] = shZoneObj
+        if op_zone is not None:
+            for eachzone in op_zone:
+                zname = eachzone['name']
+                zmembers = eachzone['members']
+                removeflag = eachzone['remove']
+                if removeflag:
+                    if shZoneObj.isZonePresent(zname):
+                        messages.append("zone '" + zname + "' is removed from vsan " + str(vsan))
+                        commands_executed.append("no zone name " + zname + " vsan " + str(vsan))
+                        verify_checks.append((vsan, 'zone', zname, None, False))
+                    else:
+                        messages.append("zone '" + zname + "' is not present in vsan " + str(vsan) + " , so nothing to remove")
+                else:
+                    if zmembers is None:
+                        if shZoneObj.isZonePresent(zname):
+                            messages.append("zone '" + zname + "' is already present in vsan " + str(vsan))
+                        else:
+                            commands_executed.append("zone name " + zname + " vsan " + str(vsan))
+                            messages.append("zone '" + zname + "' is created in vsan " + str(vsan))
+                            verify_checks.append((vsan, 'zone', zname, None, True))
+                    else:
+                        cmdmemlist = []
+                        for eachmem in zmembers:
+                            memtype = getMemType(supported_choices, eachmem.keys())
+                            cmd = memtype + " " + eachmem[memtype]
+                            if op_smart_zoning or sw_smart_zoning_bool:
+                                if eachmem['devtype'] is not None:
+                                    cmd = cmd + " " + eachmem['devtype']
+                            if eachmem["remove"]:
+                                if shZoneObj.isZonePresent(zname):
+                                    if shZoneObj.isZoneMemberPresent(zname, cmd):
+                                        verify_checks.append((vsan, 'zone_member', zname, cmd, False))
+                                        cmd = "no member " + cmd
+                                        cmdmemlist.append(cmd)
+                                        if op_smart_zoning and eachmem['devtype'] is not None:
+                                            messages.append(
+                                                "removing zone member '" +
+                                                eachmem[memtype] +
+                                                " of device type '" +
+                                                eachmem['devtype'] +
+                                                "' from zone '" +
+                                                zname +
+                                                "' in vsan " +
+                                                str(vsan))
+                                        else:
+                                            messages.append("removing zone member '" + eachmem[memtype] + "' from zone '" + zname + "' in vsan " + str(vsan))
+                                    else:
+                                        if op_smart_zoning and eachmem['devtype'] is not None:
+                                            messages.append(
+                                                "zone member '" +
+                                                eachmem[memtype] +
+                                                "' of device type '" +
+                                                eachmem['devtype'] +
+                                                "' is not present in zone '" +
+                                                zname +
+                                                "' in vsan " +
+                                                str(vsan) +
+                                                " hence nothing to remove")
+                                        else:
+                                            messages.append(
+                                                "zone member '" +
+                                                eachmem[memtype] +
+                                                "' is not present in zone '" +
+                                                zname +
+                                                "' in vsan " +
+                                                str(vsan) +
+                                                " hence nothing to remove")
+                                else:
+                                    messages.append("zone '" + zname + "' is not present in vsan " + str(vsan) + " , hence cannot remove the members")
+
+                            else:
+                                if shZoneObj.isZoneMemberPresent(zname, cmd):
+                                    if op_smart_zoning and eachmem['devtype'] is not None:
+                                        messages.append(
+                                            "zone member '" +
+                                            eachmem[memtype] +
+                                            "' of device type '" +
+                                            eachmem['devtype'] +
+                                            "' is already present in zone '" +
+                                            zname +
+                                            "' in vsan " +
+                                            str(vsan) +
+                                            " hence nothing to add")
+                                    else:
+                                        messages.append(
+                                            "zone member '" +
+                                            eachmem[memtype] +
+                                            "' is already present in zone '" +
+                                            zname +
+                                            "' in vsan " +
+                                            str(vsan) +
+                                            " hence nothing to add")
+                                else:
+                                    verify_checks.append((vsan, 'zone_member', zname, cmd, True))
+                                    cmd = "member " + cmd
+                                    cmdmemlist.append(cmd)
+                                    if op_smart_zoning and eachmem['devtype'] is not None:
+                                        messages.append(
+                                            "adding zone member '" +
+                                            eachmem[memtype] +
+                                            "' of device type '" +
+                                            eachmem['devtype'] +
+                                            "' to zone '" +
+                                            zname +
+                                            "' in vsan " +
+                                            str(vsan))
+                                    else:
+                                        messages.append("adding zone member '" + eachmem[memtype] + "' to zone '" + zname + "' in vsan " + str(vsan))
+                        if len(cmdmemlist) != 0:
+                            commands_executed.append("zone name " + zname + " vsan " + str(vsan))
+                            commands_executed.extend(cmdmemlist)
+
+        # Process zoneset member options
+        if op_zoneset is not None:
+            dactcmd = []
+            actcmd = []
+            zsnames = sorted(set([eachzoneset['name'] for eachzoneset in op_zoneset]))
+            if is_targeted_fetch(len(zsnames), shZoneStatusObj.getZonesetCount(vsan), zone_fetch_threshold):
+                shZonesetObj = ShowZoneset(module, vsan, zsnames)
+            else:
+                shZonesetObj = ShowZoneset(module, vsan)
+            if parsed is not None:
+                parsed[(str(vsan), 'zoneset')] = shZonesetObj
+            shZonesetActiveObj = None
+            if any([eachzoneset['action'] is not None for eachzoneset in op_zoneset]):
+                shZonesetActiveObj = ShowZonesetActive(module, vsan)
+            for eachzoneset in op_zoneset:
+                zsetname = eachzoneset['name']
+                zsetmembers = eachzoneset['members']
+                removeflag = eachzoneset['remove']
+                actionflag = eachzoneset['action']
+                if removeflag:
+                    if shZonesetObj.isZonesetPresent(zsetname):
+                        messages.append("zoneset '" + zsetname + "' is removed from vsan " + str(vsan))
+                        commands_executed.append("no zoneset name " + zsetname + " vsan " + str(vsan))
+                        verify_checks.append((vsan, 'zoneset', zsetname, None, False))
+                    else:
+                        messages.append("zoneset '" + zsetname + "' is not present in vsan " + str(vsan) + " ,hence there is nothing to remove")
+                else:
+                    if zsetmembers is not None:
+                        cmdmemlist = []
+                        for eachzsmem in zsetmembers:
+                            zsetmem_name = eachzsmem['name']
+                            zsetmem_removeflag = eachzsmem['remove']
+                            if zsetmem_removeflag:
+                                if shZonesetObj.isZonePresentInZoneset(zsetname, zsetmem_name):
+                                    cmd = "no member " + zsetmem_name
+                                    cmdmemlist.append(cmd)
+                                    verify_checks.append((vsan, 'zoneset_member', zsetname, zsetmem_name, False))
+                                    messages.append("removing zoneset member '" + zsetmem_name + "' from zoneset '" + zsetname + "' in vsan " + str(vsan))
+                                else:
+                                    messages.append("zoneset member '" + zsetmem_name + "' is not present in zoneset '" +
+                                                    zsetname + "' in vsan " + str(vsan) + " ,hence there is nothing to remove")
+                            else:
+                                if shZonesetObj.isZonePresentInZoneset(zsetname, zsetmem_name):
+                                    messages.append("zoneset member '" + zsetmem_name + "' is already present in zoneset '" +
+                                                    zsetname + "' in vsan " + str(vsan) + " ,hence there is nothing to add")
+                                else:
+                                    cmd = "member " + zsetmem_name
+                                    cmdmemlist.append(cmd)
+                                    verify_checks.append((vsan, 'zoneset_member', zsetname, zsetmem_name, True))
+                                    messages.append("adding zoneset member '" + zsetmem_name + "' to zoneset '" + zsetname + "' in vsan " + str(vsan))
+                        if len(cmdmemlist) != 0:
+                            commands_executed.append("zoneset name " + zsetname + " vsan " + str(vsan))
+                            commands_executed.extend(cmdmemlist)
+                    else:
+                        if shZonesetObj.isZonesetPresent(zsetname):
+                            messages.append("zoneset '" + zsetname + "' is already present in vsan " + str(vsan))
+                        else:
+                            commands_executed.append("zoneset name " + zsetname + " vsan " + str(vsan))
+                            messages.append("zoneset '" + zsetname + "' is created in vsan " + str(vsan))
+                            verify_checks.append((vsan, 'zoneset', zsetname, None, True))
+
+                # Process zoneset activate options
+                if actionflag == 'deactivate':
+                    if shZonesetActiveObj.isZonesetActive(zsetname):
+                        messages.append("deactivating zoneset '" + zsetname + "' in vsan " + str(vsan))
+                        dactcmd.append("no zoneset activate name " + zsetname + " vsan " + str(vsan))
+                        verify_checks.append((vsan, 'active', zsetname, None, False))
+                    else:
+                        messages.append("zoneset '" + zsetname + "' in vsan " + str(vsan) + " is not activated, hence cannot deactivate")
+                elif actionflag == 'activate':
+                    # Re-activation is disruptive (RSCNs, zone lock), skip it if nothing is
+                    # changing in this vsan and the active copy matches the configured one
+                    if len(commands_executed) == vsan_commands_start and \
+                            shZonesetActiveObj.isZonesetActive(zsetname) and \
+                            shZonesetActiveObj.getActiveDigest() == shZonesetObj.getZonesetDigest(zsetname):
+                        messages.append("zoneset '" + zsetname + "' in vsan " + str(vsan) +
+                                        " is already active with the same zones and members, hence nothing to activate")
+                    else:
+                        messages.append("activating zoneset '" + zsetname + "' in vsan " + str(vsan))
+                        actcmd.append("zoneset activate name " + zsetname + " vsan " + str(vsan))
+                        verify_checks.append((vsan, 'active', zsetname, None, True))
+            commands_executed = commands_executed + dactcmd + actcmd
+
+        if commands_executed:
+            if op_mode == "enhanced":
+                commands_executed.append("zone commit vsan " + str(vsan))
+            elif op_mode is None:
+                if sw_mode == "enhanced":
+                    commands_executed.append("zone commit vsan " + str(vsan))
+
+    return commands_executed, messages, verify_checks, fetch_strategy, lock_wait
@@ -0,0 +1,51 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import json
+import os
+import runpy
+import sys
+
+import pytest
+
+__metaclass__ = type
+
+TOP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(TOP, 'tests'))
+
+import ansible.module_utils
+from ansible.module_utils import basic
+from ansible.module_utils.network.nxos import nxos
+
+from support.mds_simulator import MdsSimulator
+
+# The shared code of the modules is imported as ansible.module_utils.mds*
+ansible.module_utils.__path__.append(os.path.join(TOP, 'module_utils'))
+
+
+@pytest.fixture
+def switch():
+    return MdsSimulator()
+
+
+@pytest.fixture
+def run_module(switch, monkeypatch, capsys):
+    """Runs a module of the library folder against the switch fixture and returns its result"""
+
+    def run(name, args, check_mode=False):
+        # The module_utils keep the state of a run at module level, they are imported again for each run
+        for modname in list(sys.modules):
+            if modname.startswith('ansible.module_utils.mds'):
+                del sys.modules[modname]
+        args = dict(args, _ansible_check_mode=check_mode)
+        monkeypatch.setattr(basic, '_ANSIBLE_ARGS', json.dumps({'ANSIBLE_MODULE_ARGS': args}).encode('utf-8'))
+        monkeypatch.setattr(nxos, 'run_commands', switch.run_commands)
+        monkeypatch.setattr(nxos, 'load_config', switch.load_config)
+        capsys.readouterr()
+        with pytest.raises(SystemExit):
+            runpy.run_path(os.path.join(TOP, 'library', name + '.py'), run_name='__main__')
+        return json.loads(capsys.readouterr().out)
+
+    return run
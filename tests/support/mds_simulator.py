@@ -0,0 +1,538 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""In-process simulator of the MDS CLI subset used by the modules
+
+MdsSimulator keeps a vsan database, a device-alias database, the zone
+database of every vsan and the images and running version of the switch.
+Its run_commands() and load_config() replace the ones of
+ansible.module_utils.network.nxos.nxos: the show commands are answered in
+the text format of the switch and the config commands are applied to the
+databases or run the install, so that a module can be run end to end.
+"""
+
+from __future__ import (absolute_import, division, print_function)
+
+import copy
+import re
+import time
+from collections import OrderedDict
+
+__metaclass__ = type
+
+
+# The smart zoning device type of a member, as the switch shows it
+DEVTYPES = {'initiator': 'init', 'target': 'target', 'both': 'both'}
+
+RESERVED_VSANS = ('4079', '4094')
+
+
+def normalizePwwn(pwwn):
+    # The switch shows every byte of a pwwn with 2 lowercase digits
+    return ':'.join([ep.rjust(2, '0') for ep in pwwn.lower().split(':')])
+
+
+class ZoneDatabase(object):
+    """The zones, zonesets and active zoneset of a vsan"""
+
+    def __init__(self):
+        self.zones = OrderedDict()
+        self.zonesets = OrderedDict()
+        self.active = None
+        self.activeZones = OrderedDict()
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+
+class VsanZoning(object):
+    """The zone status and zone database of a vsan"""
+
+    def __init__(self):
+        self.mode = 'basic'
+        self.defaultZone = 'deny'
+        self.smartZoning = False
+        self.db = ZoneDatabase()
+        self.pending = None
+        self.lockedBy = None
+
+    def edit(self):
+        # In enhanced mode the changes go to a session, applied by 'zone commit'
+        if self.mode != 'enhanced':
+            return self.db
+        if self.pending is None:
+            self.pending = self.db.copy()
+        return self.pending
+
+    def commit(self):
+        if self.pending is not None:
+            self.db = self.pending
+            self.pending = None
+
+
+class MdsSimulator(object):
+    """A switch answering the show commands and applying the config commands of the modules
+
+    latency is the number of seconds that every command takes, or a dict
+    mapping a command prefix to it. logged_in maps the pwwns logged in to
+    the fabric to their fcid, shown in the active zonesets. version is the
+    running version, images maps the image files of bootflash to their
+    version. calls records the ('show', commands) and ('config', commands)
+    requests received.
+
+    transport is how the show commands reach the switch and how the errors
+    come back: 'cli', or 'httpapi' and 'nxapi' for NX-API, where the show
+    commands of a request are sent in one JSON-RPC POST. errors maps the
+    show commands that the switch rejects to its error message.
+    """
+
+    def __init__(self, latency=None, logged_in=None, version='8.4(1)', images=None, transport='cli'):
+        self.latency = latency
+        self.transport = transport
+        self.errors = {}
+        self.loggedIn = dict((normalizePwwn(pwwn), fcid) for pwwn, fcid in (logged_in or {}).items())
+        self.calls = []
+        self.vsans = OrderedDict()
+        self.zoning = {}
+        self.daDistribute = True
+        self.daMode = 'enhanced'
+        self.aliases = OrderedDict()
+        self.daPending = None
+        self.daLockedBy = None
+        self.addVsan('1')
+        self.version = version
+        self.images = dict(images or {})
+        self.issuCapable = False
+        # Number of 'install all' requests answered as busy before the next one runs
+        self.installBusy = 0
+        self.installs = []
+
+    # Setup of the initial state
+
+    def addVsan(self, vsanid, name=None, state='active', interfaces=None):
+        vsanid = str(vsanid)
+        self.vsans[vsanid] = dict(name=name or 'VSAN' + vsanid.zfill(4), state=state, interfaces=list(interfaces or []))
+        self.zoning.setdefault(vsanid, VsanZoning())
+        return self.zoning[vsanid]
+
+    def addDeviceAlias(self, name, pwwn):
+        self.aliases[name] = normalizePwwn(pwwn)
+
+    def addZone(self, vsan, zname, members=()):
+        self.zoning[str(vsan)].db.zones[zname] = [self.getMemberLine(member) for member in members]
+
+    def addZoneset(self, vsan, zsname, zones=(), active=False):
+        zoning = self.zoning[str(vsan)]
+        zoning.db.zonesets[zsname] = list(zones)
+        if active:
+            self.activate(zoning.db, zsname)
+
+    # Transport, in place of the nxos module functions
+
+    def run_commands(self, module, commands, check_rc=True):
+        commands = [command if isinstance(command, dict) else {'command': command} for command in commands]
+        self.calls.append(('show', [command['command'] for command in commands]))
+        self.sleep([command['command'] for command in commands])
+        failed = [command['command'] for command in commands if command['command'] in self.errors]
+        if failed:
+            error = failed[0] + ': ' + self.errors[failed[0]]
+            if check_rc:
+                module.fail_json(msg=error)
+            if self.transport == 'httpapi':
+                # The connection error of the request replaces all the outputs
+                return [error]
+        return [self.getError(command['command']) if command['command'] in self.errors
+                else self.showJson(command['command']) if command.get('output') == 'json' else self.show(command['command'])
+                for command in commands]
+
+    def load_config(self, module, config, return_error=False, opts=None, replace=None):
+        # With return_error the output of each command is returned, as for the install commands
+        config = list(config)
+        self.calls.append(('config', config))
+        self.sleep(config)
+        context = None
+        outputs = []
+        for line in config:
+            line = ' '.join(line.split())
+            if line.startswith('show install all impact ') or line.startswith('install all '):
+                outputs.append(self.install(line))
+                continue
+            context = self.configure(line, context)
+            outputs.append('')
+        return outputs if return_error else []
+
+    def getError(self, command):
+        # The nxapi transport returns the error of a command in place of its output
+        if self.transport == 'nxapi':
+            return {'code': '400', 'msg': 'Input CLI command error', 'input': command, 'clierror': self.errors[command] + '\n'}
+        return self.errors[command] + '\n'
+
+    def sleep(self, commands):
+        if not self.latency:
+            return
+        if isinstance(self.latency, dict):
+            delay = sum([seconds for command in commands for prefix, seconds in self.latency.items() if command.startswith(prefix)])
+        else:
+            delay = self.latency * len(commands)
+        time.sleep(delay)
+
+    # Show commands
+
+    def show(self, command):
+        grep = None
+        if ' | grep ' in command:
+            command, grep = command.split(' | grep ', 1)
+        output = self.getShowOutput(command.strip())
+        if grep is not None:
+            output = "\n".join([line for line in output.split("\n") if grep.strip() in line])
+        return output
+
+    def showJson(self, command):
+        if command == 'show version':
+            return {'kickstart_ver_str': self.version, 'sys_ver_str': self.version}
+        if command == 'show inventory':
+            return {'TABLE_inv': {'ROW_inv': [{'name': 'Chassis', 'productid': 'DS-C9710'}]}}
+        raise ValueError("The simulator does not support the json output of '" + command + "'")
+
+    def getShowOutput(self, command):
+        if command == 'show vsan':
+            return self.showVsan(list(self.vsans)) + "vsan 4079:evfp_isolated_vsan\n\nvsan 4094:isolated_vsan\n"
+        if command == 'show vsan membership':
+            return (self.showVsanMembership(list(self.vsans)) +
+                    "vsan 4079(evfp_isolated_vsan) interfaces:\n\nvsan 4094(isolated_vsan) interfaces:\n")
+        m = re.match(r"show vsan (\d+)( membership)?$", command)
+        if m:
+            if m.group(1) not in self.vsans:
+                return "VSAN " + m.group(1) + " does not exist"
+            if m.group(2):
+                return self.showVsanMembership([m.group(1)])
+            return self.showVsan([m.group(1)])
+
+        if command == 'show device-alias status':
+            return self.showDeviceAliasStatus()
+        if command == 'show device-alias database':
+            lines = ["device-alias name " + name + " pwwn " + pwwn for name, pwwn in self.aliases.items()]
+            return "\n".join(lines) + "\n\nTotal number of entries = " + str(len(self.aliases)) + "\n"
+        m = re.match(r"show device-alias (name|pwwn) (\S+)$", command)
+        if m:
+            for name, pwwn in self.aliases.items():
+                if (m.group(1) == 'name' and name == m.group(2)) or (m.group(1) == 'pwwn' and pwwn == m.group(2)):
+                    return "device-alias name " + name + " pwwn " + pwwn
+            return "Device Alias not present"
+
+        m = re.match(r"show zone status(?: vsan (\d+))?$", command)
+        if m:
+            if m.group(1) is None:
+                return "\n".join([self.showZoneStatus(vsan) for vsan in self.vsans])
+            if m.group(1) not in self.vsans:
+                return "VSAN " + m.group(1) + " is not configured"
+            return self.showZoneStatus(m.group(1))
+        m = re.match(r"show zone(?: name (\S+))?(?: vsan (\d+))?$", command)
+        if m:
+            return self.showZones(m.group(2), m.group(1))
+        m = re.match(r"show zoneset( active)?(?: name (\S+))?(?: vsan (\d+))?$", command)
+        if m:
+            if m.group(1):
+                return self.showZonesetActive(m.group(3))
+            return self.showZonesets(m.group(3), m.group(2))
+        m = re.match(r"show version image bootflash:(\S+)$", command)
+        if m:
+            if m.group(1) not in self.images:
+                return "Unable to read image bootflash:" + m.group(1)
+            return "image name: " + m.group(1) + "\nsystem: version " + self.images[m.group(1)] + "\n"
+        if command == 'show version':
+            return "Software\n  system:    version " + self.version + "\n  kickstart: version " + self.version + "\n"
+        return "% Invalid command at '^' marker."
+
+    def showVsan(self, vsanids):
+        blocks = []
+        for vsanid in vsanids:
+            vsan = self.vsans[vsanid]
+            blocks.append("vsan " + vsanid + " information\n"
+                          "         name:" + vsan['name'] + "  state:" + vsan['state'] + "\n"
+                          "         interoperability mode:default\n"
+                          "         loadbalancing:src-id/dst-id/oxid\n"
+                          "         operational state:" + ("up" if vsan['interfaces'] else "down") + "\n")
+        return "\n".join(blocks)
+
+    def showVsanMembership(self, vsanids):
+        blocks = []
+        for vsanid in vsanids:
+            blocks.append("vsan " + vsanid + " interfaces:\n    " + "  ".join(self.vsans[vsanid]['interfaces']) + "\n")
+        return "\n".join(blocks)
+
+    def showDeviceAliasStatus(self):
+        output = ("Fabric Distribution: " + ("Enabled" if self.daDistribute else "Disabled") + "\n" +
+                  "Database:- Device Aliases " + str(len(self.aliases)) + "   Mode: " + self.daMode.capitalize() + "\n" +
+                  "           Checksum: 0x" + format(abs(hash(tuple(self.aliases.items()))) % (1 << 32), 'x') + "\n")
+        holder = self.daLockedBy or ('admin' if self.daPending is not None else None)
+        if holder is not None:
+            output = output + 'Locked By:- User "' + holder + '" SWWN 20:00:00:0d:ec:1a:2b:3c\n'
+        return output
+
+    def showZoneStatus(self, vsan):
+        zoning = self.zoning[vsan]
+        session = 'none'
+        if zoning.lockedBy is not None or zoning.pending is not None:
+            session = 'cli'
+        db = zoning.db
+        active = "    Name: " + db.active + "  Zonesets: 1  Zones: " + str(len(db.activeZones)) if db.active else "    Database Not Available"
+        usage = self.getZoneDbUsage()
+        return ("VSAN: " + vsan + " default-zone: " + zoning.defaultZone + " distribute: full Interop: default\n"
+                "    mode: " + zoning.mode + " merge-control: allow\n"
+                "    session: " + session + "\n"
+                "    hard-zoning: enabled broadcast: unsupported\n"
+                "    smart-zoning: " + ("enabled" if zoning.smartZoning else "disabled") + "\n"
+                "    rscn-format: fabric-address\n"
+                "    activation overwrite control: disabled\n"
+                "Default zone:\n"
+                "    qos: none broadcast: unsupported ronly: unsupported\n"
+                "Full Zoning Database :\n"
+                "    DB size: " + str(self.getZoneDbSize(db.zones, db.zonesets)) + " bytes\n"
+                "    Zonesets: " + str(len(db.zonesets)) + "  Zones: " + str(len(db.zones)) + " Aliases: 0 Attribute-groups: 1\n"
+                "Active Zoning Database :\n"
+                "    DB size: " + str(self.getZoneDbSize(db.activeZones, {})) + " bytes\n" +
+                active + "\n"
+                "Current Total Zone DB Usage: " + str(usage) + " / 4000000 bytes (0 % used)\n"
+                "Pending (Session) DB size:\n"
+                "    Full DB Copy size: 0 bytes\n"
+                "    Active DB Copy size: 0 bytes\n"
+                "SFC size: " + str(usage) + " / 4000000 bytes (0 % used)\n"
+                "Status: Commit completed at 14:33:02 UTC Jan 17 2020\n")
+
+    def getZoneDbSize(self, zones, zonesets):
+        size = sum([64 + len(zname) + 32 * len(members) for zname, members in zones.items()])
+        return size + sum([64 + len(zsname) + 32 * len(zones) for zsname, zones in zonesets.items()])
+
+    def getZoneDbUsage(self):
+        usage = 0
+        for zoning in self.zoning.values():
+            usage = usage + self.getZoneDbSize(zoning.db.zones, zoning.db.zonesets) + self.getZoneDbSize(zoning.db.activeZones, {})
+        return usage
+
+    def getVsans(self, vsan):
+        if vsan is None:
+            return list(self.vsans)
+        return [vsan] if vsan in self.vsans else []
+
+    def showZones(self, vsan, zname):
+        lines = []
+        for eachvsan in self.getVsans(vsan):
+            for name, members in self.zoning[eachvsan].db.zones.items():
+                if zname is None or name == zname:
+                    lines.append("zone name " + name + " vsan " + eachvsan)
+                    lines = lines + ["  " + member for member in members]
+        if zname is not None and not lines:
+            return "Zone not present"
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def showZonesets(self, vsan, zsname):
+        blocks = []
+        for eachvsan in self.getVsans(vsan):
+            db = self.zoning[eachvsan].db
+            for name, znames in db.zonesets.items():
+                if zsname is None or name == zsname:
+                    lines = ["zoneset name " + name + " vsan " + eachvsan]
+                    for zname in znames:
+                        lines.append("  zone name " + zname + " vsan " + eachvsan)
+                        lines = lines + ["    " + member for member in db.zones.get(zname, [])]
+                        lines.append("")
+                    blocks.append("\n".join(lines))
+        if zsname is not None and not blocks:
+            return "Zoneset not present"
+        return "\n".join(blocks)
+
+    def showZonesetActive(self, vsan):
+        blocks = []
+        for eachvsan in self.getVsans(vsan):
+            db = self.zoning[eachvsan].db
+            if db.active is None:
+                continue
+            lines = ["zoneset name " + db.active + " vsan " + eachvsan]
+            for zname, members in db.activeZones.items():
+                lines.append("  zone name " + zname + " vsan " + eachvsan)
+                lines = lines + [self.getActiveMemberLine(member) for member in members]
+                lines.append("")
+            blocks.append("\n".join(lines))
+        return "\n".join(blocks)
+
+    def getActiveMemberLine(self, member):
+        # Logged in members are shown with their fcid, as '* fcid <fcid> [<member>] <devtype>'
+        fields = member.split()
+        pwwn = fields[1] if fields[0] == 'pwwn' else self.aliases.get(fields[1])
+        if pwwn not in self.loggedIn:
+            return "    " + member
+        line = "  * fcid " + self.loggedIn[pwwn] + " [" + fields[0] + " " + fields[1] + "]"
+        if fields[0] == 'pwwn':
+            alias = [name for name, aliaspwwn in self.aliases.items() if aliaspwwn == pwwn]
+            if alias:
+                line = line + " [" + alias[0] + "]"
+        if len(fields) > 2:
+            line = line + " " + fields[2]
+        return line
+
+    # Install
+
+    def install(self, line):
+        """Answers 'show install all impact ...' and runs 'install all ...'
+
+        The images are the 'nxos', 'system' and 'kickstart' files of the
+        command. The install upgrades the running version to the one of the
+        system image, it is disruptive unless issuCapable is set.
+        """
+        fields = line.split()
+        if fields[0] == 'install' and self.installBusy:
+            self.installBusy -= 1
+            return "Another install procedure may be in progress. (0x401E0007)"
+        images = [fields[i + 1] for i, field in enumerate(fields[:-1]) if field in ('nxos', 'system', 'kickstart')]
+        missing = [image for image in images if image not in self.images]
+        if missing:
+            return "Pre-upgrade check failed. Return code 0x40930011 (Image verification failed for " + missing[0] + ")."
+        target = self.images[images[0]]
+        if 'non-disruptive' in fields and not self.issuCapable:
+            return "Pre-upgrade check failed. Return code 0x4093001E (ISSU is not supported)."
+        impact = 'non-disruptive' if self.issuCapable else 'disruptive'
+        upgrade = 'yes' if target != self.version else 'no'
+        output = ("Verifying image bootflash:/" + images[0] + " for boot variable \"system\".\n"
+                  "[####################] 100% -- SUCCESS\n\n"
+                  "Compatibility check is done:\n"
+                  "Module  bootable          Impact  Install-type  Reason\n"
+                  "------  --------  --------------  ------------  ------\n"
+                  "     1       yes  " + impact.rjust(14) + "         reset  \n\n"
+                  "Images will be upgraded according to following table:\n"
+                  "Module       Image  Running-Version(pri:alt)    New-Version   Upg-Required\n"
+                  "------  ----------  ----------------------------------------  ------------\n"
+                  "     1      system  " + self.version.rjust(24) + "  " + target.rjust(13) + "  " + upgrade.rjust(12) + "\n"
+                  "     1   kickstart  " + self.version.rjust(24) + "  " + target.rjust(13) + "  " + upgrade.rjust(12) + "\n")
+        if fields[0] == 'install':
+            self.installs.append(line)
+            self.version = target
+            output = output + "\nInstall is in progress, please wait.\nFinishing the upgrade, switch will reboot in 10 seconds.\n"
+        return output
+
+    # Config commands
+
+    def getMemberLine(self, member):
+        # The member as the switch shows it, 'pwwn <pwwn> [<devtype>]' or 'device-alias <name> [<devtype>]'
+        fields = member.split()
+        if fields[0] == 'pwwn':
+            fields[1] = normalizePwwn(fields[1])
+        if len(fields) > 2:
+            fields[2] = DEVTYPES.get(fields[2], fields[2])
+        return ' '.join(fields)
+
+    def activate(self, db, zsname):
+        db.active = zsname
+        db.activeZones = OrderedDict((zname, list(db.zones.get(zname, []))) for zname in db.zonesets[zsname])
+
+    def editAliases(self):
+        # With distribution enabled the changes go to a session, applied by 'device-alias commit'
+        if not self.daDistribute:
+            return self.aliases
+        if self.daPending is None:
+            self.daPending = OrderedDict(self.aliases)
+        return self.daPending
+
+    def configure(self, line, context):
+        # Applies a config line and returns the config context it leaves, e.g. ('zone', vsan, name)
+        if line in ('terminal dont-ask', 'no terminal dont-ask', 'end', 'exit'):
+            return context
+        if line == 'vsan database':
+            return ('vsan',)
+        if line == 'device-alias database':
+            return ('device-alias',)
+
+        m = re.match(r"(no )?device-alias (distribute|mode enhanced|commit)$", line)
+        if m:
+            if m.group(2) == 'distribute':
+                self.daDistribute = not m.group(1)
+            elif m.group(2) == 'mode enhanced':
+                self.daMode = 'basic' if m.group(1) else 'enhanced'
+            elif self.daPending is not None:
+                self.aliases = self.daPending
+                self.daPending = None
+            return None
+        if context == ('device-alias',):
+            aliases = self.editAliases()
+            m = re.match(r"device-alias name (\S+) pwwn (\S+)$", line)
+            if m:
+                aliases[m.group(1)] = normalizePwwn(m.group(2))
+                return context
+            m = re.match(r"no device-alias name (\S+)$", line)
+            if m:
+                aliases.pop(m.group(1), None)
+                return context
+            m = re.match(r"device-alias rename (\S+) (\S+)$", line)
+            if m:
+                aliases[m.group(2)] = aliases.pop(m.group(1))
+                return context
+
+        if context == ('vsan',):
+            m = re.match(r"(no )?vsan (\d+)(?: (name|suspend|interface) ?(.*))?$", line)
+            if m:
+                self.configureVsan(m.group(2), m.group(1) is not None, m.group(3), m.group(4))
+                return context
+
+        m = re.match(r"(no )?zone (default-zone permit|mode enhanced|smart-zoning enable|commit) vsan (\d+)$", line)
+        if m:
+            zoning = self.zoning[m.group(3)]
+            if m.group(2) == 'default-zone permit':
+                zoning.defaultZone = 'deny' if m.group(1) else 'permit'
+            elif m.group(2) == 'mode enhanced':
+                zoning.mode = 'basic' if m.group(1) else 'enhanced'
+            elif m.group(2) == 'smart-zoning enable':
+                zoning.smartZoning = not m.group(1)
+            else:
+                zoning.commit()
+            return None
+        m = re.match(r"(no )?(zone|zoneset) name (\S+) vsan (\d+)$", line)
+        if m:
+            db = self.zoning[m.group(4)].edit()
+            objects = db.zones if m.group(2) == 'zone' else db.zonesets
+            if m.group(1):
+                objects.pop(m.group(3), None)
+                return None
+            objects.setdefault(m.group(3), [])
+            return (m.group(2), m.group(4), m.group(3))
+        m = re.match(r"(no )?zoneset activate name (\S+) vsan (\d+)$", line)
+        if m:
+            db = self.zoning[m.group(3)].edit()
+            if m.group(1):
+                db.active = None
+                db.activeZones = OrderedDict()
+            else:
+                self.activate(db, m.group(2))
+            return None
+        m = re.match(r"(no )?member (.+)$", line)
+        if m and context is not None and context[0] in ('zone', 'zoneset'):
+            db = self.zoning[context[1]].edit()
+            if context[0] == 'zone':
+                members = db.zones[context[2]]
+                member = self.getMemberLine(m.group(2))
+            else:
+                members = db.zonesets[context[2]]
+                member = m.group(2)
+            if m.group(1) and member in members:
+                members.remove(member)
+            elif not m.group(1) and member not in members:
+                members.append(member)
+            return context
+        raise ValueError("The simulator does not support the config command '" + line + "'")
+
+    def configureVsan(self, vsanid, negate, keyword, value):
+        if keyword is None:
+            if negate:
+                self.vsans.pop(vsanid, None)
+                self.zoning.pop(vsanid, None)
+            elif vsanid not in self.vsans:
+                self.addVsan(vsanid)
+        elif keyword == 'name':
+            self.vsans[vsanid]['name'] = value
+        elif keyword == 'suspend':
+            self.vsans[vsanid]['state'] = 'active' if negate else 'suspended'
+        else:
+            interface = re.sub(' +', '', value)
+            for vsan in self.vsans.values():
+                if interface in vsan['interfaces']:
+                    vsan['interfaces'].remove(interface)
+            self.vsans[vsanid]['interfaces'].append(interface)
@@ -0,0 +1,48 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import copy
+import os
+
+import pytest
+import yaml
+
+__metaclass__ = type
+
+SCENARIOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenarios', 'interaction_budgets.yml')
+
+with open(SCENARIOS) as f:
+    scenarios = yaml.safe_load(f)
+
+
+def setupSwitch(switch, setup):
+    for vsan in setup.get('vsans', []):
+        switch.addVsan(vsan).mode = setup.get('zone_mode', 'basic')
+        per_vsan = setup.get('per_vsan', {})
+        for zname, members in per_vsan.get('zones', {}).items():
+            switch.addZone(vsan, zname, members)
+        for zsname, zones in per_vsan.get('zonesets', {}).items():
+            switch.addZoneset(vsan, zsname, zones, active=zsname == per_vsan.get('active'))
+    for name, pwwn in setup.get('device_aliases', {}).items():
+        switch.addDeviceAlias(name, pwwn)
+
+
+def getModuleArgs(scenario):
+    args = copy.deepcopy(scenario['args'])
+    per_vsan = args.pop('per_vsan', None)
+    if per_vsan is not None:
+        args['zone_zoneset_details'] = [dict(copy.deepcopy(per_vsan), vsan=vsan) for vsan in scenario['setup']['vsans']]
+    return args
+
+
+@pytest.mark.parametrize('scenario', scenarios, ids=[scenario['name'] for scenario in scenarios])
+def test_interaction_budget(switch, run_module, scenario):
+    setupSwitch(switch, scenario.get('setup', {}))
+    result = run_module(scenario['module'], getModuleArgs(scenario))
+    assert not result.get('failed'), result.get('msg')
+
+    exceeded = ["%s %d > %d" % (key, result['interactions'][key], limit)
+                for key, limit in sorted(scenario['budget'].items()) if result['interactions'][key] > limit]
+    assert not exceeded, 'Device interaction budget exceeded: ' + ', '.join(exceeded)
@@ -0,0 +1,262 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import json
+import time
+
+__metaclass__ = type
+
+
+def test_vsan_apply_then_idempotent(switch, run_module):
+    switch.addVsan(922, interfaces=['fc1/1'])
+    args = dict(vsan=[dict(id=922, name='vsan-SAN-A', interface=['fc1/1', 'fc1/2']), dict(id=923, suspend=True)])
+
+    result = run_module('nxos_vsan', args)
+    assert result['changed'] is True
+    assert switch.vsans['922']['name'] == 'vsan-SAN-A'
+    assert switch.vsans['922']['interfaces'] == ['fc1/1', 'fc1/2']
+    assert switch.vsans['923']['state'] == 'suspended'
+
+    result = run_module('nxos_vsan', args)
+    assert result['changed'] is False
+    assert result['commands'] == []
+
+
+def test_vsan_remove(switch, run_module):
+    switch.addVsan(923)
+    result = run_module('nxos_vsan', dict(vsan=[dict(id=923, remove=True)]))
+    assert result['changed'] is True
+    assert '923' not in switch.vsans
+
+
+def test_devicealias_apply_then_idempotent(switch, run_module):
+    switch.addDeviceAlias('dev1', '21:00:00:00:00:00:00:01')
+    switch.addDeviceAlias('abc', '21:00:00:00:00:00:00:02')
+    args = dict(da=[dict(name='new1', pwwn='21:00:00:00:00:00:00:09'), dict(name='abc', remove=True)],
+                rename=[dict(old_name='dev1', new_name='dev1new')], verify=True)
+
+    result = run_module('nxos_devicealias', args)
+    assert result['changed'] is True
+    assert result['drift'] == []
+    assert dict(switch.aliases) == {'dev1new': '21:00:00:00:00:00:00:01', 'new1': '21:00:00:00:00:00:00:09'}
+    assert switch.daPending is None
+
+    args['rename'] = None
+    result = run_module('nxos_devicealias', args)
+    assert result['changed'] is False
+
+
+def test_devicealias_waits_for_lock(switch, run_module):
+    switch.daLockedBy = 'other'
+    result = run_module('nxos_devicealias', dict(da=[dict(name='new1', pwwn='21:00:00:00:00:00:00:09')],
+                                                 lock_wait=dict(timeout=0)))
+    assert result['failed'] is True
+    assert 'lock' in result['msg']
+
+
+def test_devicealias_plan_then_apply(switch, run_module, tmp_path):
+    switch.addDeviceAlias('dev1', '21:00:00:00:00:00:00:01')
+    switch.addDeviceAlias('dev2', '21:00:00:00:00:00:00:02')
+    args = dict(rename=[dict(old_name='dev1', new_name='dev1new')], plan=dict(mode='plan', path=str(tmp_path / 'plan.json')))
+
+    result = run_module('nxos_devicealias', args)
+    assert result['changed'] is False
+    assert result['plan']['pushes'] == 1
+    # The digest covers the entries, not only their number
+    assert switch.calls[0] == ('show', ['show device-alias status', 'show device-alias database'])
+
+    args['plan']['mode'] = 'apply'
+    result = run_module('nxos_devicealias', args, check_mode=True)
+    assert result['changed'] is True
+    assert 'dev1' in switch.aliases
+
+    switch.aliases['dev2'] = '21:00:00:00:00:00:00:22'
+    result = run_module('nxos_devicealias', args)
+    assert result['failed'] is True
+    assert 'changed since the plan was written' in result['msg']
+    assert 'dev1' in switch.aliases
+
+
+def test_zone_apply_then_idempotent(switch, run_module):
+    switch.addVsan(22).mode = 'enhanced'
+    switch.addDeviceAlias('host1', '21:00:00:00:00:00:00:01')
+    switch.addZone(22, 'zoneA', ['pwwn 11:11:11:11:11:11:11:11'])
+    switch.addZoneset(22, 'zsetname1', ['zoneA'], active=True)
+    args = dict(zone_zoneset_details=[dict(
+        vsan=22,
+        zone=[dict(name='zoneA', members=[dict(pwwn='11:11:11:11:11:11:11:11'), {'device-alias': 'host1'}]),
+              dict(name='zoneB', members=[dict(pwwn='22:22:22:22:22:22:22:22')])],
+        zoneset=[dict(name='zsetname1', members=[dict(name='zoneA'), dict(name='zoneB')], action='activate')])])
+
+    result = run_module('nxos_zone_zoneset', dict(args, verify=True))
+    assert result['changed'] is True
+    assert result['drift'] == []
+    db = switch.zoning['22'].db
+    assert db.zones['zoneA'] == ['pwwn 11:11:11:11:11:11:11:11', 'device-alias host1']
+    assert db.zonesets['zsetname1'] == ['zoneA', 'zoneB']
+    assert list(db.activeZones) == ['zoneA', 'zoneB']
+    assert switch.zoning['22'].pending is None
+
+    result = run_module('nxos_zone_zoneset', args)
+    assert result['changed'] is False
+    assert result['commands'] == []
+
+
+def test_zone_capacity_in_plan_mode(switch, run_module, tmp_path):
+    switch.addVsan(22)
+    switch.addVsan(23)
+    for z in range(15999):
+        switch.addZone(23, 'zone%d' % z)
+    args = dict(zone_zoneset_details=[dict(vsan=22, zone=[dict(name='zoneA', members=[dict(pwwn='10:00:00:00:00:00:00:01')]),
+                                                          dict(name='zoneB', members=[dict(pwwn='10:00:00:00:00:00:00:02')])])],
+                plan=dict(mode='plan', path=str(tmp_path / 'plan.json')))
+
+    # The zones of vsan 23, which is not probed for the plan, count towards the limit of the switch
+    result = run_module('nxos_zone_zoneset', args)
+    assert result['failed'] is True
+    assert 'the switch would have 16001 zones' in result['msg']
+    assert ['show zone status'] in [commands for kind, commands in switch.calls]
+
+
+def test_zone_reference_check(switch, run_module):
+    switch.addVsan(22)
+    result = run_module('nxos_zone_zoneset', dict(zone_zoneset_details=[dict(
+        vsan=22, zone=[dict(name='zoneA', members=[{'device-alias': 'nosuch'}])])]))
+    assert result['failed'] is True
+    assert 'device-alias nosuch' in result['msg']
+    assert [kind for kind, commands in switch.calls] == ['show', 'show']
+
+
+def test_san_apply_then_idempotent(switch, run_module):
+    args = dict(vsan=[dict(id=923, name='newvsan')],
+                device_alias=dict(da=[dict(name='new1', pwwn='21:00:00:00:00:00:00:09')]),
+                zone_zoneset_details=[dict(vsan=923, zone=[dict(name='zoneA', members=[{'device-alias': 'new1'}])],
+                                           zoneset=[dict(name='zs1', members=[dict(name='zoneA')], action='activate')])])
+
+    result = run_module('nxos_san', args)
+    assert result['changed'] is True
+    assert switch.vsans['923']['name'] == 'newvsan'
+    assert switch.aliases['new1'] == '21:00:00:00:00:00:00:09'
+    assert switch.zoning['923'].db.active == 'zs1'
+
+    result = run_module('nxos_san', args)
+    assert result['changed'] is False
+
+
+def test_install_os_upgrade_then_idempotent(switch, run_module, monkeypatch):
+    switch.images.update({'m9700-sf4ek9-kickstart-mz.8.4.2.bin': '8.4(2)', 'm9700-sf4ek9-mz.8.4.2.bin': '8.4(2)'})
+    args = dict(system_image_file='m9700-sf4ek9-mz.8.4.2.bin', kickstart_image_file='m9700-sf4ek9-kickstart-mz.8.4.2.bin')
+
+    result = run_module('nxos_install_os_mds', args, check_mode=True)
+    assert result['changed'] is True
+    assert switch.version == '8.4(1)'
+
+    # The first install request finds the impact check still running and is retried
+    switch.installBusy = 1
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    result = run_module('nxos_install_os_mds', args)
+    assert result['changed'] is True
+    assert switch.version == '8.4(2)'
+    assert switch.installs == ['install all force system m9700-sf4ek9-mz.8.4.2.bin kickstart m9700-sf4ek9-kickstart-mz.8.4.2.bin']
+
+    result = run_module('nxos_install_os_mds', args)
+    assert result['changed'] is False
+    assert len(switch.installs) == 1
+
+
+def test_install_os_missing_image(switch, run_module):
+    result = run_module('nxos_install_os_mds', dict(system_image_file='nosuch.bin', kickstart_image_file='nosuch-kickstart.bin'))
+    assert result['failed'] is True
+    assert switch.installs == []
+
+
+def test_zone_scale(switch, run_module):
+    switch.addVsan(22).mode = 'enhanced'
+    # 1000 zones of 100 members
+    for z in range(1000):
+        switch.addZone(22, 'zone%d' % z, ['pwwn 10:00:00:00:00:%02x:%02x:%02x' % (z >> 8, z & 0xff, m) for m in range(100)])
+    switch.addZoneset(22, 'zs1', ['zone%d' % z for z in range(1000)], active=True)
+    # That many members do not fit the zone database of a switch, the capacity check is left out
+    args = dict(zone_zoneset_details=[dict(vsan=22, zone=[dict(name='zoneNew', members=[dict(pwwn='20:00:00:00:00:00:00:01')])])],
+                zone_capacity=dict(enabled=False))
+
+    start = time.time()
+    result = run_module('nxos_zone_zoneset', args)
+    elapsed = time.time() - start
+    assert not result.get('failed'), result['msg']
+    assert result['changed'] is True
+    assert result['interactions']['round_trips'] <= 3
+    assert result['interactions']['config_pushes'] == 1
+    # The show outputs of the 100000 members are parsed within seconds
+    assert elapsed < 10, 'Took %.1fs' % elapsed
+
+
+def test_zone_smart_zoning_active_zoneset_not_reactivated(switch, run_module):
+    zoning = switch.addVsan(22)
+    zoning.mode = 'enhanced'
+    zoning.smartZoning = True
+    switch.addDeviceAlias('host1', '21:00:00:00:00:00:00:01')
+    switch.addZone(22, 'zoneA', ['pwwn 10:00:00:00:00:00:00:01 initiator', 'device-alias host1 initiator',
+                                 'pwwn 50:00:00:00:00:00:00:01 target'])
+    switch.addZoneset(22, 'zs1', ['zoneA'], active=True)
+    # Logged in members are shown with their fcid in the active zoneset
+    switch.loggedIn.update({'10:00:00:00:00:00:00:01': '0x010000', '21:00:00:00:00:00:00:01': '0x010001'})
+    members = [dict(pwwn='10:00:00:00:00:00:00:01', devtype='initiator'), {'device-alias': 'host1', 'devtype': 'initiator'},
+               dict(pwwn='50:00:00:00:00:00:00:01', devtype='target')]
+    args = dict(zone_zoneset_details=[dict(vsan=22, zone=[dict(name='zoneA', members=members)],
+                                           zoneset=[dict(name='zs1', action='activate')])])
+
+    result = run_module('nxos_zone_zoneset', args)
+    assert result['changed'] is False
+    assert [kind for kind, commands in switch.calls] == ['show', 'show']
+    assert "zoneset 'zs1' in vsan 22 is already active with the same zones and members, hence nothing to activate" in result['messages']
+
+
+def test_zone_targeted_fetch_with_missing_zoneset(switch, run_module):
+    switch.addVsan(22).mode = 'enhanced'
+    switch.addZone(22, 'zoneA', ['pwwn 10:00:00:00:00:00:00:01'])
+    for zsname in ['zs1', 'zs2', 'zs3', 'zs4']:
+        switch.addZoneset(22, zsname, ['zoneA'], active=zsname == 'zs1')
+    args = dict(zone_zoneset_details=[dict(vsan=22, zoneset=[dict(name='zs1', action='activate'), dict(name='zs9', remove=True)])])
+
+    # zs1 and zs9 are read one by one, the reply for the missing zs9 is not a member of zs1
+    result = run_module('nxos_zone_zoneset', args)
+    assert result['changed'] is False
+    assert "zoneset 'zs9' is not present in vsan 22 ,hence there is nothing to remove" in result['messages']
+    assert ['show zoneset name zs1 vsan 22', 'show zoneset name zs9 vsan 22'] == [
+        command for kind, commands in switch.calls for command in commands if command.startswith('show zoneset name')]
+
+
+def test_zone_zones_file(switch, run_module, tmp_path):
+    switch.addVsan(22)
+    path = tmp_path / 'zones.csv'
+    path.write_text(u'vsan,zone,pwwn,device_alias,devtype,remove,zoneset\n'
+                    u'22,zoneA,10:00:00:00:00:00:00:01,,,,zs1\n'
+                    u'22,zoneA,10:00:00:00:00:00:00:01,,,,zs1\n'
+                    u'22,zoneB,10:00:00:00:00:00:00:02,,,,zs1\n')
+
+    # The repeated line adds the member and the zoneset member once
+    result = run_module('nxos_zone_zoneset', dict(zones_file=dict(path=str(path))))
+    assert result['changed'] is True
+    db = switch.zoning['22'].db
+    assert db.zones == {'zoneA': ['pwwn 10:00:00:00:00:00:00:01'], 'zoneB': ['pwwn 10:00:00:00:00:00:00:02']}
+    assert db.zonesets['zs1'] == ['zoneA', 'zoneB']
+
+
+def test_san_consistency_with_objects_named_settings(switch, run_module, tmp_path):
+    switch.addVsan(22)
+    switch.addZone(22, 'settings', ['pwwn 10:00:00:00:00:00:00:01'])
+    switch.addDeviceAlias('settings', '21:00:00:00:00:00:00:01')
+
+    # Runs with the default wait_timeout, the nxos provider timeout is a separate option
+    result = run_module('nxos_san_consistency', dict(key='f1', switch='sw1', switches=['sw1'], exchange_dir=str(tmp_path)))
+    assert result['consistent'] is True
+    assert result['incomplete'] == []
+    with open(str(tmp_path / 'f1' / 'sw1.objects.json')) as f:
+        objects = json.load(f)
+    assert objects['device-alias settings'] == ['21:00:00:00:00:00:00:01']
+    assert objects['device-alias-settings'][0].startswith('distribute ')
+    assert objects['zone settings vsan 22'] == ['pwwn 10:00:00:00:00:00:00:01']
+    assert objects['zone-settings vsan 22'][0].startswith('default_zone ')
@@ -0,0 +1,57 @@
+# Copyright: Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import (absolute_import, division, print_function)
+
+import pytest
+
+__metaclass__ = type
+
+
+def setupZonesets(switch, transport):
+    switch.transport = transport
+    switch.addVsan(22).mode = 'enhanced'
+    switch.addZone(22, 'zoneA', ['pwwn 10:00:00:00:00:00:00:01'])
+    for zsname in ['zs1', 'zs2', 'zs3', 'zs4']:
+        switch.addZoneset(22, zsname, ['zoneA'], active=zsname == 'zs1')
+    # zs1 and zs9 are read in one batch along with the active zoneset
+    return dict(zone_zoneset_details=[dict(vsan=22, zoneset=[dict(name='zs1', action='activate'), dict(name='zs9', remove=True)])])
+
+
+def getShowRequests(switch):
+    return [commands for kind, commands in switch.calls if kind == 'show']
+
+
+def test_httpapi_batch_with_an_error_is_run_one_command_at_a_time(switch, run_module):
+    args = setupZonesets(switch, 'httpapi')
+    switch.errors['show zoneset name zs9 vsan 22'] = '% Zoneset not present'
+
+    result = run_module('nxos_zone_zoneset', args)
+    assert result['changed'] is False
+    assert "zoneset 'zs9' is not present in vsan 22 ,hence there is nothing to remove" in result['messages']
+    assert getShowRequests(switch) == [['show zone status'],
+                                       ['show zoneset name zs1 vsan 22', 'show zoneset name zs9 vsan 22', 'show zoneset active vsan 22'],
+                                       ['show zoneset name zs1 vsan 22'], ['show zoneset name zs9 vsan 22'], ['show zoneset active vsan 22']]
+    assert result['interactions']['round_trips'] == 5
+
+
+def test_nxapi_error_dict_is_read_as_text(switch, run_module):
+    args = setupZonesets(switch, 'nxapi')
+    switch.errors['show zoneset name zs9 vsan 22'] = '% Zoneset not present'
+
+    result = run_module('nxos_zone_zoneset', args)
+    assert result['changed'] is False
+    assert "zoneset 'zs9' is not present in vsan 22 ,hence there is nothing to remove" in result['messages']
+    assert len(getShowRequests(switch)) == 2
+
+
+@pytest.mark.parametrize('transport', ['httpapi', 'nxapi'])
+def test_command_error_fails_with_the_switch_message(switch, run_module, transport):
+    args = setupZonesets(switch, transport)
+    switch.errors['show zoneset active vsan 22'] = '% Permission denied for the role'
+
+    # The batch is read without checking the errors, the parser reading the output fails on it
+    result = run_module('nxos_zone_zoneset', args)
+    assert result['failed'] is True
+    assert result['msg'] == 'show zoneset active vsan 22: % Permission denied for the role'
+    assert switch.zoning['22'].db.active == 'zs1'